@@ -27,13 +27,79 @@ def create_app():
         get_remote_address,
         app=app,
         default_limits=app.config.get('RATELIMIT_DEFAULTS', ["1000 per day", "200 per hour"]),
-        storage_uri="memory://"
+        storage_uri=app.config['RATELIMIT_STORAGE_URI']
     )
     app.extensions['limiter'] = limiter
 
-    from app.data.models import db
+    from app.data.models import db, bulk_update_balances, record_rounds
     db.init_app(app)
 
+    import atexit
+    from app.data.game_store import GameStore
+    os.makedirs(app.instance_path, exist_ok=True)
+    game_store = GameStore(
+        path=os.path.join(app.instance_path, app.config['GAME_STORE_PATH']),
+        max_entries=app.config['GAME_STORE_MAX_ENTRIES'],
+        flush_interval=app.config['GAME_STORE_FLUSH_INTERVAL'],
+        ttl=app.config['GAME_STORE_TTL'],
+    )
+    game_store.start()
+    atexit.register(game_store.close)
+    app.extensions['game_store'] = game_store
+
+    from app.data.write_behind import WriteBehindQueue
+
+    def write_balances(rows):
+        with app.app_context():
+            bulk_update_balances(rows)
+
+    balance_writer = WriteBehindQueue(
+        write_balances,
+        interval=app.config['BALANCE_FLUSH_INTERVAL'],
+        min_interval=app.config['BALANCE_FLUSH_MIN_INTERVAL'],
+        name='balance-writer',
+    )
+    balance_writer.start()
+    atexit.register(balance_writer.close)
+    app.extensions['balance_writer'] = balance_writer
+
+    from app.data.identity import IdentityCache
+    app.extensions['identities'] = IdentityCache(
+        ttl=app.config['IDENTITY_CACHE_TTL'],
+        max_entries=app.config['IDENTITY_CACHE_MAX_ENTRIES'],
+    )
+
+    def write_history(items):
+        with app.app_context():
+            record_rounds([row for _, row in items])
+
+    history_writer = WriteBehindQueue(
+        write_history,
+        interval=app.config['HISTORY_FLUSH_INTERVAL'],
+        min_interval=app.config['BALANCE_FLUSH_MIN_INTERVAL'],
+        name='history-writer',
+    )
+    history_writer.start()
+    atexit.register(history_writer.close)
+    app.extensions['history_writer'] = history_writer
+
+    from app.sim.autoplay import AutoplayJobs
+    autoplay_jobs = AutoplayJobs(max_jobs=app.config['AUTOPLAY_MAX_JOBS'])
+    atexit.register(autoplay_jobs.close)
+    app.extensions['autoplay'] = autoplay_jobs
+
+    if app.config['SESSION_TYPE'] == 'filesystem':
+        from app.data.session_sweeper import SessionSweeper
+        sweeper = SessionSweeper(
+            app.config.get('SESSION_FILE_DIR', os.path.join(os.getcwd(), 'flask_session')),
+            max_age=app.config['SESSION_MAX_AGE'],
+            max_files=app.config['SESSION_MAX_FILES'],
+            max_bytes=app.config['SESSION_MAX_BYTES'],
+            interval=app.config['SESSION_SWEEP_INTERVAL'],
+        )
+        sweeper.start()
+        app.extensions['session_sweeper'] = sweeper
+
     # Register Blueprints
     from app.web.controllers.main import web_bp
     app.register_blueprint(web_bp)
@@ -44,10 +110,71 @@ def create_app():
     from app.web.controllers.api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
-    from app.web.controllers.sockets import socketio
-    socketio.init_app(app)
+    from app.web.controllers.sockets import socketio, spectators
+    # With a message queue, emits reach clients connected to any worker.
+    socketio.init_app(app, message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+
+    from app.core.room_manager import game_manager
+    if socketio.async_mode == 'eventlet':
+        # Handlers run as greenlets: a thread lock would not serialize them.
+        from eventlet.semaphore import Semaphore
+        room_lock = Semaphore
+    else:
+        import threading
+        room_lock = threading.RLock
+    room_store = None
+    if app.config['ROOM_STORE_PATH']:
+        from app.data.room_store import RoomStore
+        offload = None
+        if socketio.async_mode == 'eventlet':
+            # SQLite and pickling run in eventlet's native thread pool.
+            from eventlet import tpool
+            offload = tpool.execute
+        room_store = RoomStore(
+            path=os.path.join(app.instance_path, app.config['ROOM_STORE_PATH']),
+            owner_ttl=app.config['ROOM_OWNER_TTL'],
+            offload=offload,
+        )
+        atexit.register(room_store.close)
+    game_manager.configure(
+        max_rooms=app.config['ROOM_MAX_ROOMS'],
+        max_seats=app.config['ROOM_MAX_SEATS'],
+        idle_ttl=app.config['ROOM_IDLE_TTL'],
+        lock_factory=room_lock,
+        store=room_store,
+    )
+    spectators.configure(
+        max_rate=app.config['SPECTATOR_MAX_RATE'],
+        max_per_room=app.config['SPECTATOR_MAX_PER_ROOM'],
+    )
+    from app.web.passwords import PasswordHasher, LoopMonitor
+    hasher_options = dict(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        max_concurrent=app.config['PASSWORD_HASH_CONCURRENCY'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    if socketio.async_mode == 'eventlet':
+        # Hash in eventlet's native thread pool; the greenlet yields meanwhile.
+        from eventlet import tpool
+        from eventlet.semaphore import BoundedSemaphore
+        hasher = PasswordHasher(offload=tpool.execute, semaphore_factory=BoundedSemaphore,
+                                **hasher_options)
+        loop_monitor = LoopMonitor(sleep=socketio.sleep)
+        socketio.start_background_task(loop_monitor.run)
+        app.extensions['loop_monitor'] = loop_monitor
+    else:
+        hasher = PasswordHasher(**hasher_options)
+    app.extensions['password_hasher'] = hasher
+
+    from app.ai import betting
+    betting.configure(default=app.config['AI_BET_RAMP'])
+    from app.ai import counter
+    counter.configure(app.config['COUNTING_SYSTEM'])
 
     with app.app_context():
+        from app.data.models import upgrade_schema
+        upgrade_schema()
         db.create_all()
 
     return app, socketio
@@ -0,0 +1,70 @@
+"""Strategy analytics computed once per Q-table version.
+
+The ``/api/strategy/*`` endpoints only change when the Q-table does (i.e. after
+training or reloading it), so the heatmap, the per-state details for every
+(player_sum, dealer_card) cell and the basic-strategy comparison are built as
+one artifact keyed by ``QLearningAgent.version``. The artifact also carries an
+ETag derived from its content, so clients can revalidate with a conditional
+GET and unchanged answers survive process restarts.
+"""
+
+import hashlib
+import json
+import threading
+
+PLAYER_SUMS = range(4, 22)
+DEALER_CARDS = range(2, 12)
+
+
+class StrategyAnalytics:
+    def __init__(self, agent):
+        self.agent = agent
+        self._lock = threading.Lock()
+        self._version = None
+        self._artifact = None
+
+    def artifact(self):
+        """Return the artifact for the agent's current version, rebuilding if stale."""
+        with self._lock:
+            if self._artifact is None or self._version != self.agent.version:
+                self._build()
+            return self._artifact
+
+    def refresh(self):
+        """Rebuild now (called after a training run)."""
+        with self._lock:
+            self._build()
+            return self._artifact
+
+    def _build(self):
+        version = self.agent.version
+        heatmap = {
+            'heatmap': self.agent.generate_strategy_heatmap(),
+            'rows': list(PLAYER_SUMS),
+            'cols': list(DEALER_CARDS),
+            'legend': {0: 'Stand', 1: 'Hit', 2: 'Equal'},
+        }
+        details = {
+            (player_sum, dealer_card): self.agent.get_strategy_details(player_sum, dealer_card)
+            for player_sum in PLAYER_SUMS for dealer_card in DEALER_CARDS
+        }
+        compare = self.agent.compare_with_basic_strategy()
+
+        digest = hashlib.sha1(json.dumps(
+            [heatmap['heatmap'], sorted((str(k), v) for k, v in details.items()), compare],
+            sort_keys=True,
+        ).encode()).hexdigest()[:16]
+
+        self._artifact = {
+            'etag': f"qt-{digest}",
+            'heatmap': heatmap,
+            'details': details,
+            'compare': compare,
+        }
+        self._version = version
+
+    def details(self, player_sum, dealer_card):
+        cached = self.artifact()['details'].get((player_sum, dealer_card))
+        if cached is not None:
+            return cached
+        return self.agent.get_strategy_details(player_sum, dealer_card)
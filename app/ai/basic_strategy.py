@@ -0,0 +1,95 @@
+"""Full basic strategy for this table's rules.
+
+Rules assumed (as implemented by ``BlackJackGame``): 6-deck shoe, dealer
+stands on all 17s, double on any first two cards (also after a split), split
+only identical ranks, no surrender. ``basic_action`` (from cards) and
+``basic_decision`` (from totals) return one of:
+
+    'H' hit, 'S' stand, 'D' double, 'P' split
+
+When doubling or splitting is not allowed the chart's fallback is returned
+(``Ds`` on soft 18 falls back to stand, every other double to hit).
+"""
+
+HIT, STAND, DOUBLE, SPLIT = 'H', 'S', 'D', 'P'
+
+
+def hand_total(cards):
+    """Return ``(total, is_soft)`` counting at most one ace as 11."""
+    hard = sum(1 if c.rank == 'A' else c.value for c in cards)
+    if any(c.rank == 'A' for c in cards) and hard + 10 <= 21:
+        return hard + 10, True
+    return hard, False
+
+
+def _split_decision(pair_value, dealer):
+    if pair_value in (11, 8):
+        return True
+    if pair_value == 9:
+        return dealer not in (7, 10, 11)
+    if pair_value == 7:
+        return dealer <= 7
+    if pair_value == 6:
+        return dealer <= 6
+    if pair_value == 4:
+        return dealer in (5, 6)
+    if pair_value in (2, 3):
+        return dealer <= 7
+    return False  # 5s play as hard 10, 10s stand
+
+
+def _soft_action(total, dealer):
+    if total >= 19:
+        return STAND
+    if total == 18:
+        if 3 <= dealer <= 6:
+            return 'Ds'
+        return STAND if dealer in (2, 7, 8) else HIT
+    if total == 17:
+        return DOUBLE if 3 <= dealer <= 6 else HIT
+    if total in (15, 16):
+        return DOUBLE if 4 <= dealer <= 6 else HIT
+    return DOUBLE if dealer in (5, 6) else HIT  # soft 13-14
+
+
+def _hard_action(total, dealer):
+    if total >= 17:
+        return STAND
+    if total >= 13:
+        return STAND if dealer <= 6 else HIT
+    if total == 12:
+        return STAND if 4 <= dealer <= 6 else HIT
+    if total == 11:
+        return DOUBLE if dealer <= 10 else HIT
+    if total == 10:
+        return DOUBLE if dealer <= 9 else HIT
+    if total == 9:
+        return DOUBLE if 3 <= dealer <= 6 else HIT
+    return HIT
+
+
+def basic_decision(total, soft, pair_value, dealer_value, can_double=True, can_split=True):
+    """Basic-strategy action from hand totals.
+
+    ``pair_value`` is the value of the paired card when the hand is a splittable
+    pair (two cards of the same rank), otherwise ``None``.
+    """
+    if can_split and pair_value is not None and _split_decision(pair_value, dealer_value):
+        return SPLIT
+
+    action = _soft_action(total, dealer_value) if soft else _hard_action(total, dealer_value)
+
+    if action == 'Ds':
+        return DOUBLE if can_double else STAND
+    if action == DOUBLE and not can_double:
+        return HIT
+    return action
+
+
+def basic_action(cards, dealer_value, can_double=True, can_split=True):
+    """Best basic-strategy action for ``cards`` against the dealer up-card value."""
+    pair_value = None
+    if len(cards) == 2 and cards[0].rank == cards[1].rank:
+        pair_value = cards[0].value
+    total, soft = hand_total(cards)
+    return basic_decision(total, soft, pair_value, dealer_value, can_double, can_split)
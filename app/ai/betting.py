@@ -0,0 +1,281 @@
+"""Bet sizing for AI seats: ramps from the true count, and their bankroll outlook.
+
+A ramp turns ``(balance, true_count)`` into a stake:
+
+  * ``flat:N``          - always ``N``,
+  * ``fraction:F``      - ``F`` of the balance, at least the minimum (``fraction:0.1``
+                          is the AI seats' historic rule and the default),
+  * ``spread:U``        - one minimum unit per true count above +1, up to ``U`` units,
+  * ``kelly:F``         - ``F`` times the Kelly stake ``edge / variance * balance``
+                          when the count gives the player an edge, else the minimum.
+
+The player's edge at a true count is the line ``BASE_EDGE + EDGE_PER_TC * tc``.
+Both constants were fitted with ``estimate_edge`` on this game's rules (basic
+strategy, 6 decks, no dealer peek) and can be re-fitted the same way. They are
+on the Hi-Lo scale (``CALIBRATED_SYSTEM``); games counting with another system
+size bets at a neutral count (``ramp_count``).
+
+``simulate_bankrolls`` compares ramps on many thousands of bankroll paths at
+once with numpy: each round of every path draws a ``(true_count, result per
+unit bet)`` pair from rounds played by ``app.sim.engine``, sizes the bet with
+the ramp for that path's balance and count, and updates all paths in one
+vector step. Rounds are drawn independently, so the count's persistence
+within a shoe is ignored; the ramps see the right mix of counts and the right
+payoff at each count, which is what growth and ruin depend on most::
+
+    python -m app.ai.betting --ramps fraction:0.1 spread:8 kelly:0.5 --paths 20000 --rounds 2000
+"""
+
+import random
+import time
+
+import numpy as np
+
+from .deviations import tc_bucket
+
+MIN_BET = 10
+BASE_EDGE = 0.0007  # player's edge per initial bet at true count 0
+EDGE_PER_TC = 0.0048  # edge gained per point of true count
+HAND_VARIANCE = 1.34  # variance of one round's result, in squared initial bets
+TC_FIT_RANGE = (-4, 6)
+DEFAULT_RAMP = 'fraction:0.1'
+CALIBRATED_SYSTEM = 'hi_lo'  # counting system the edge line was fitted on
+
+
+def edge_for(true_count, base_edge=BASE_EDGE, edge_per_tc=EDGE_PER_TC):
+    """Estimated player edge (per initial bet) at ``true_count``."""
+    return base_edge + edge_per_tc * true_count
+
+
+def ramp_count(counter):
+    """The true count to size bets on: ``counter``'s own, or 0 if it is on another scale."""
+    return counter.true_count if counter.system == CALIBRATED_SYSTEM else 0.0
+
+
+class FlatRamp:
+    __slots__ = ('amount', 'minimum')
+
+    def __init__(self, amount=MIN_BET):
+        self.amount = amount
+        self.minimum = amount
+
+    def amounts(self, balances, true_counts):
+        return np.full(np.shape(balances), float(self.amount))
+
+    def __call__(self, balance, true_count):
+        return self.amount
+
+
+class FractionRamp:
+    __slots__ = ('fraction', 'minimum')
+
+    def __init__(self, fraction=0.1, minimum=MIN_BET):
+        self.fraction = fraction
+        self.minimum = minimum
+
+    def amounts(self, balances, true_counts):
+        return np.maximum(self.minimum, np.floor(balances * self.fraction))
+
+    def __call__(self, balance, true_count):
+        return max(self.minimum, int(balance * self.fraction))
+
+
+class SpreadRamp:
+    __slots__ = ('units', 'minimum')
+
+    def __init__(self, units=8, minimum=MIN_BET):
+        self.units = units
+        self.minimum = minimum
+
+    def amounts(self, balances, true_counts):
+        units = np.clip(np.floor(np.asarray(true_counts) + 0.5) - 1, 1, self.units)
+        return np.broadcast_to(units * self.minimum, np.shape(balances)).astype(float)
+
+    def __call__(self, balance, true_count):
+        return min(max(tc_bucket(true_count) - 1, 1), self.units) * self.minimum
+
+
+class KellyRamp:
+    __slots__ = ('fraction', 'minimum', 'base_edge', 'edge_per_tc', 'variance')
+
+    def __init__(self, fraction=0.5, minimum=MIN_BET, base_edge=BASE_EDGE,
+                 edge_per_tc=EDGE_PER_TC, variance=HAND_VARIANCE):
+        self.fraction = fraction
+        self.minimum = minimum
+        self.base_edge = base_edge
+        self.edge_per_tc = edge_per_tc
+        self.variance = variance
+
+    def amounts(self, balances, true_counts):
+        edge = edge_for(np.asarray(true_counts), self.base_edge, self.edge_per_tc)
+        stake = np.floor(np.maximum(edge, 0.0) * self.fraction / self.variance * balances)
+        return np.maximum(self.minimum, stake)
+
+    def __call__(self, balance, true_count):
+        edge = edge_for(true_count, self.base_edge, self.edge_per_tc)
+        return max(self.minimum, int(max(edge, 0.0) * self.fraction / self.variance * balance))
+
+
+def make_ramp(spec):
+    """Parse ``flat:N``, ``fraction:F``, ``spread:U`` or ``kelly:F`` (``ai`` = ``fraction:0.1``)."""
+    name, _, arg = str(spec).partition(':')
+    try:
+        if name == 'flat':
+            return FlatRamp(int(arg or MIN_BET))
+        if name == 'fraction':
+            return FractionRamp(float(arg or 0.1))
+        if name == 'ai':
+            return FractionRamp(0.1)
+        if name == 'spread':
+            return SpreadRamp(int(arg or 8))
+        if name == 'kelly':
+            return KellyRamp(float(arg or 0.5))
+    except ValueError:
+        pass
+    raise ValueError(f"Unknown bet ramp: {spec!r}")
+
+
+_ramps = {}
+_default = DEFAULT_RAMP
+
+
+def configure(default=None):
+    """Set the ramp used by games that do not name their own."""
+    global _default
+    if default:
+        make_ramp(default)  # fail at start-up, not at the first bet
+        _default = default
+
+
+def get_ramp(spec=None):
+    """Shared ramp for ``spec`` (``None``: the configured default)."""
+    spec = spec or _default
+    ramp = _ramps.get(spec)
+    if ramp is None:
+        ramp = _ramps[spec] = make_ramp(spec)
+    return ramp
+
+
+# -- data from the table simulator ---------------------------------------------
+
+def sample_rounds(rounds=200000, num_decks=6, seed=None):
+    """Play ``rounds`` basic-strategy rounds; returns ``(true_counts, results)`` arrays.
+
+    ``true_counts`` is the Hi-Lo true count when the bet was placed (nearest
+    integer) and ``results`` the round's net result per unit bet.
+    """
+    from app.sim.engine import Seat, Table, basic_policy
+
+    unit = 1000  # large enough that ``int(bet * 2.5)`` is exact
+    seen = []
+
+    def recording_bet(balance, table):
+        seen.append(tc_bucket(table.running_count / max(table.decks_remaining, 0.5)))
+        return unit
+
+    seat = Seat(basic_policy, recording_bet, balance=10 ** 15)
+    table = Table([seat], num_decks=num_decks, rng=random.Random(seed))
+    results = np.empty(rounds, dtype=np.float32)
+    for i in range(rounds):
+        before = seat.balance
+        table.play_round()
+        results[i] = (seat.balance - before) / unit
+    return np.array(seen, dtype=np.int8), results
+
+
+def estimate_edge(true_counts, results, tc_range=TC_FIT_RANGE):
+    """Fit ``(base_edge, edge_per_tc, variance)`` to sampled rounds.
+
+    The line is fitted to the per-count mean results in ``tc_range``,
+    weighted by how often each count occurs.
+    """
+    inside = (true_counts >= tc_range[0]) & (true_counts <= tc_range[1])
+    slope, base = np.polyfit(true_counts[inside].astype(float), results[inside].astype(float), 1)
+    return float(base), float(slope), float(np.var(results))
+
+
+# -- vectorized bankroll paths -------------------------------------------------
+
+def simulate_bankrolls(ramps, paths=10000, rounds=1000, bankroll=1000, samples=None, seed=None):
+    """Play ``paths`` bankrolls for ``rounds`` rounds with each ramp.
+
+    ``samples`` is ``(true_counts, results)`` from ``sample_rounds`` (played
+    here if not given). Every ramp sees the same draws. A path is ruined once
+    its balance cannot cover the ramp's minimum bet. Returns one summary per
+    ramp: risk of ruin, mean and median final bankroll, and the growth rate
+    (mean log growth per round of the surviving paths).
+    """
+    rng = np.random.default_rng(seed)
+    if samples is None:
+        samples = sample_rounds(seed=int(rng.integers(2 ** 32)))
+    true_counts, results = samples
+    # Round ``n`` draws from its own generator seeded with (draw_seed, n): every
+    # ramp sees the same draws without holding a (rounds, paths) index array.
+    draw_seed = int(rng.integers(2 ** 63))
+
+    report = {}
+    for spec in ramps:
+        ramp = make_ramp(spec) if isinstance(spec, str) else spec
+        started = time.perf_counter()
+        balances = np.full(paths, float(bankroll))
+        alive = np.ones(paths, dtype=bool)
+        ruined_at = np.full(paths, -1)
+        wagered, placed = 0.0, 0
+        for n in range(rounds):
+            index = np.random.default_rng([draw_seed, n]).integers(0, len(results), size=paths)
+            bets = np.minimum(ramp.amounts(balances, true_counts[index]), balances)
+            bets[~alive] = 0.0
+            wagered += bets.sum()
+            placed += int(alive.sum())
+            balances += bets * results[index]
+            broke = alive & (balances < ramp.minimum)
+            ruined_at[broke] = n + 1
+            alive &= ~broke
+        survivors = balances[alive]
+        ruined = int((~alive).sum())
+        report[str(spec)] = {
+            'paths': paths,
+            'rounds': rounds,
+            'bankroll': bankroll,
+            'risk_of_ruin': ruined / paths,
+            'mean_final_bankroll': float(balances.mean()),
+            'median_final_bankroll': float(np.median(balances)),
+            'growth_per_round': float(np.log(survivors / bankroll).mean() / rounds) if len(survivors) else None,
+            'median_rounds_to_ruin': float(np.median(ruined_at[ruined_at > 0])) if ruined else None,
+            'mean_bet': wagered / placed if placed else 0.0,
+            'elapsed': time.perf_counter() - started,
+        }
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Compare AI bet ramps on simulated bankroll paths.")
+    parser.add_argument('--ramps', nargs='+', default=['flat:10', 'fraction:0.1', 'spread:8', 'kelly:0.5'])
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--bankroll', type=int, default=1000)
+    parser.add_argument('--samples', type=int, default=200000, help="simulated rounds to draw from")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--fit', action='store_true', help="also print the fitted edge line")
+    args = parser.parse_args(argv)
+
+    try:
+        for spec in args.ramps:
+            make_ramp(spec)
+    except ValueError as e:
+        parser.error(str(e))
+    samples = sample_rounds(args.samples, num_decks=args.decks, seed=args.seed)
+    result = {'ramps': simulate_bankrolls(args.ramps, paths=args.paths, rounds=args.rounds,
+                                          bankroll=args.bankroll, samples=samples, seed=args.seed)}
+    if args.fit:
+        base, slope, variance = estimate_edge(*samples)
+        result['edge'] = {'base_edge': base, 'edge_per_tc': slope, 'variance': variance}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
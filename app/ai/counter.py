@@ -1,39 +1,170 @@
-from app.core.cards import Card
+"""Card counting with table-driven tags for several systems.
+
+Each system is a tuple of tags indexed like ``app.core.cards.RANKS``
+(2, 3, ..., 10, J, Q, K, A). A counter expands its system into a 52-entry
+table indexed by ``Card.code``, so ``update`` is one lookup and one addition
+per card, and ``update_many`` sums a whole batch of dealt cards at once.
+
+The counter tracks the exact number of cards left in the shoe (``reset``
+takes ``Deck.remaining()``), and keeps ``true_count`` current on every update
+rather than deriving it later from an estimated number of decks:
+
+    true_count = (running_count - expected_running) / decks_remaining
+
+``expected_running`` is zero for balanced systems. Unbalanced systems such as
+KO start from an initial running count (IRC) and drift upwards on average by
+their imbalance per card; subtracting that drift puts their true count on the
+same scale as a balanced count. ``decks_remaining`` is floored at half a deck.
+
+New games count with the system set by ``configure`` (``COUNTING_SYSTEM``,
+Hi-Lo by default); a saved game keeps the system it was started with. The
+AI's index plays and bet ramps are calibrated on Hi-Lo true counts (level-2
+systems count about twice as far), so with another system they are skipped
+unless a deviation artifact was generated for it.
+"""
+
+#               2  3  4  5  6  7  8  9  10  J   Q   K   A
+SYSTEMS = {
+    'hi_lo':    (1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1, -1),
+    'ko':       (1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1, -1),
+    'hi_opt_2': (1, 1, 2, 2, 1, 1, 0, 0, -2, -2, -2, -2, 0),
+    'omega_2':  (1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2, 0),
+    'zen':      (1, 1, 2, 2, 2, 1, 0, 0, -2, -2, -2, -2, -1),
+}
+# Initial running count per deck in the shoe (KO's standard IRC is 4 - 4 * decks).
+IRC = {'ko': (4, -4)}
+
+DEFAULT_SYSTEM = 'hi_lo'
+CARDS_PER_DECK = 52
+MIN_DECKS = 0.5
+STATE_VERSION = 1
+
+_default_system = DEFAULT_SYSTEM
+
+
+def configure(system=None):
+    """Set the system used by counters that do not name their own."""
+    global _default_system
+    if system:
+        if system not in SYSTEMS:
+            raise ValueError(f"Unknown counting system '{system}'")
+        _default_system = system
+
 
 class CardCounter:
-    def __init__(self):
-        self.running_count = 0
-        self.total_cards_dealt = 0
-    
-    def reset(self):
-        self.running_count = 0
+    __slots__ = ('system', 'num_decks', 'level', 'total_cards_dealt', 'cards_remaining',
+                 'true_count', '_tags', '_running', '_irc', '_drift')
+
+    def __init__(self, system=None, num_decks=1):
+        system = system or _default_system
+        if system not in SYSTEMS:
+            raise ValueError(f"Unknown counting system '{system}'")
+        self.system = system
+        self.num_decks = num_decks
+        rank_tags = SYSTEMS[system]
+        self.level = max(abs(tag) for tag in rank_tags)
+        self._tags = tuple(rank_tags[code % 13] for code in range(CARDS_PER_DECK))
+        self._drift = sum(rank_tags) / len(rank_tags)  # expected tag of a random card
+        self.reset()
+
+    def __getstate__(self):
+        return (STATE_VERSION, self.system, self.num_decks, self._running,
+                self.total_cards_dealt, self.cards_remaining)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # Legacy Hi-Lo counter: running count and cards dealt only. The
+            # game re-aligns ``cards_remaining`` with its shoe after loading.
+            num_decks = 6
+            state = (STATE_VERSION, 'hi_lo', num_decks, state.get('running_count', 0),
+                     state.get('total_cards_dealt', 0),
+                     num_decks * CARDS_PER_DECK - state.get('total_cards_dealt', 0))
+        _, system, num_decks, running, dealt, remaining = state
+        self.__init__(system, num_decks)
+        self._running = running
+        self.total_cards_dealt = dealt
+        self.cards_remaining = remaining
+        self._refresh()
+
+    def reset(self, cards_remaining=None):
+        """Start a fresh shoe of ``cards_remaining`` cards (default: ``num_decks`` decks)."""
+        if cards_remaining is None:
+            cards_remaining = self.num_decks * CARDS_PER_DECK
+        base, per_deck = IRC.get(self.system, (0, 0))
+        self._irc = base + per_deck * round(cards_remaining / CARDS_PER_DECK)
+        self._running = self._irc
         self.total_cards_dealt = 0
-        
+        self.cards_remaining = cards_remaining
+        self.true_count = 0.0
+
+    def align(self, cards_remaining):
+        """Match the shoe's exact size (e.g. after loading an older game)."""
+        self.cards_remaining = cards_remaining
+        self._refresh()
+
+    @property
+    def running_count(self):
+        return self._running
+
+    @running_count.setter
+    def running_count(self, value):
+        self._running = value
+        self._refresh()
+
+    @property
+    def decks_remaining(self):
+        return self.cards_remaining / CARDS_PER_DECK
+
+    def tag(self, card):
+        return self._tags[card.code]
+
     def update(self, card):
-        """
-        Updates count based on Hi-Lo System:
-        2-6: +1
-        7-9: 0
-        10-A: -1
-        """
-        if card.value >= 2 and card.value <= 6:
-            self.running_count += 1
-        elif card.value >= 10: # 10, J, Q, K, A (A is 11)
-            self.running_count -= 1
-        # 7, 8, 9 are neutral (0)
-        
+        """Count one dealt card."""
+        self._running += self._tags[card.code]
         self.total_cards_dealt += 1
-        
-    def get_true_count(self, decks_remaining):
-        if decks_remaining < 0.5: return self.running_count # Avoid division by zero/small
-        return self.running_count / decks_remaining
+        self.cards_remaining -= 1
+        self._refresh()
+
+    def update_many(self, cards):
+        """Count a batch of dealt cards with a single true-count refresh."""
+        codes = [card.code for card in cards]
+        self._running += sum(map(self._tags.__getitem__, codes))
+        self.total_cards_dealt += len(codes)
+        self.cards_remaining -= len(codes)
+        self._refresh()
+
+    def _expected_running(self):
+        return self._irc + self._drift * self.total_cards_dealt
+
+    def _refresh(self):
+        decks = max(self.cards_remaining / CARDS_PER_DECK, MIN_DECKS)
+        self.true_count = (self._running - self._expected_running()) / decks
+
+    def without(self, card):
+        """``(running_count, true_count)`` as if ``card`` had not been seen yet."""
+        running = self._running - self._tags[card.code]
+        expected = self._irc + self._drift * (self.total_cards_dealt - 1)
+        decks = max((self.cards_remaining + 1) / CARDS_PER_DECK, MIN_DECKS)
+        return running, (running - expected) / decks
+
+    def get_true_count(self, decks_remaining=None):
+        """The maintained true count, or the count over an explicit ``decks_remaining``."""
+        if decks_remaining is None:
+            return self.true_count
+        if decks_remaining < MIN_DECKS:
+            return self._running - self._expected_running() # Avoid division by zero/small
+        return (self._running - self._expected_running()) / decks_remaining
 
     def get_suggestion(self):
-        # Basic derivation: High count = Bet More / Stand more?
-        # Actually in blackjack, high count means more 10s/As remaining.
-        # Player gets more blackjacks (3:2 payout), dealer busts more on stiff hands.
-        if self.running_count > 2:
+        return self.suggestion_for(self.true_count)
+
+    def suggestion_for(self, true_count):
+        # High true count means more 10s/As remaining: the player gets more
+        # blackjacks (3:2 payout) and the dealer busts more on stiff hands.
+        # Level-2 systems count twice as far, so their thresholds double.
+        threshold = 2 * self.level
+        if true_count >= threshold:
             return "Bet High / Aggressive"
-        elif self.running_count < -2:
+        elif true_count <= -threshold:
             return "Bet Low / Conservative"
         return "Neutral"
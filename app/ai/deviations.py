@@ -0,0 +1,351 @@
+"""Count-based deviations from basic strategy (index plays).
+
+An index play replaces the basic-strategy action for one hand against one
+dealer up-card once the true count crosses that play's index, e.g. "stand on
+16 against a 10 at true count 0 or higher". ``generate`` derives the indices
+of the Illustrious-18 plays (plus the insurance index) for THIS game's rules
+by simulation:
+
+  * a shoe is dealt down to a random depth (up to ``max_penetration``), the
+    remaining composition is drawn with ``numpy``'s multivariate
+    hypergeometric sampler, and the true count of the seen cards is bucketed
+    to the nearest integer,
+  * the basic action and the deviation are both played out against the SAME
+    shuffled remainder (common random numbers, so only the decision differs),
+    with later decisions by basic strategy and the game's settlement rules:
+    no dealer peek, dealer stands on all 17s, a dealer two-card 21 only beats
+    hands below 21, no resplits,
+  * a weighted line through the mean gain of the deviation per bucket gives
+    the count where it becomes better than basic strategy.
+
+Insurance needs no play-out: its gain per unit is ``3 * p_ten - 1``.
+
+The result is a small JSON artifact (``deviations.json`` next to this module)
+that ``DeviationTable`` loads into a dict keyed by ``(total, soft, pair_value,
+upcard)``, so a decision costs one lookup and one comparison::
+
+    python -m app.ai.deviations --trials 200000 --workers 4
+
+Without an artifact the table falls back to the published Hi-Lo indices
+(6 decks, dealer stands on soft 17). Indices only mean something on the scale
+of the system they were derived for, so a count from another system (see
+``COUNTING_SYSTEM``) matches no play; generate an artifact with ``--system``
+to use index plays with it.
+"""
+
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .basic_strategy import HIT, STAND, DOUBLE, SPLIT, basic_decision, hand_total
+from .counter import SYSTEMS
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deviations.json')
+ARTIFACT_VERSION = 1
+
+RANK_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+TEN, ACE = 8, 12  # rank indices of '10' and 'A'
+TC_RANGE = (-8, 10)
+MIN_BUCKET_SAMPLES = 200
+SEQUENCE = 48  # cards drawn per trial; more than any play can use
+
+# (name, player rank indices, dealer up-card rank index, deviation). The
+# basic action is computed from ``basic_decision`` for the same cards.
+PLAYS = (
+    ("16 vs 10", (TEN, 4), TEN, STAND),
+    ("15 vs 10", (TEN, 3), TEN, STAND),
+    ("10,10 vs 5", (TEN, TEN), 3, SPLIT),
+    ("10,10 vs 6", (TEN, TEN), 4, SPLIT),
+    ("10 vs 10", (4, 2), TEN, DOUBLE),
+    ("12 vs 3", (TEN, 0), 1, STAND),
+    ("12 vs 2", (TEN, 0), 0, STAND),
+    ("11 vs A", (4, 3), ACE, DOUBLE),
+    ("9 vs 2", (3, 2), 0, DOUBLE),
+    ("10 vs A", (4, 2), ACE, DOUBLE),
+    ("9 vs 7", (3, 2), 5, DOUBLE),
+    ("16 vs 9", (TEN, 4), 7, STAND),
+    ("13 vs 2", (TEN, 1), 0, HIT),
+    ("12 vs 4", (TEN, 0), 2, HIT),
+    ("12 vs 5", (TEN, 0), 3, HIT),
+    ("12 vs 6", (TEN, 0), 4, HIT),
+    ("13 vs 3", (TEN, 1), 1, HIT),
+)
+
+# Published Hi-Lo indices: (name, index, direction), direction '>=' meaning
+# "deviate at this true count or higher" and '<=' "at this count or lower".
+DEFAULT_INDICES = {
+    "16 vs 10": (0, '>='), "15 vs 10": (4, '>='), "10,10 vs 5": (5, '>='),
+    "10,10 vs 6": (4, '>='), "10 vs 10": (4, '>='), "12 vs 3": (2, '>='),
+    "12 vs 2": (3, '>='), "11 vs A": (1, '>='), "9 vs 2": (1, '>='),
+    "10 vs A": (4, '>='), "9 vs 7": (3, '>='), "16 vs 9": (5, '>='),
+    "13 vs 2": (-2, '<='), "12 vs 4": (-1, '<='), "12 vs 5": (-3, '<='),
+    "12 vs 6": (-2, '<='), "13 vs 3": (-3, '<='),
+}
+DEFAULT_INSURANCE = 3
+
+
+def tc_bucket(true_count):
+    """Nearest integer true count (the unit indices are expressed in)."""
+    return math.floor(true_count + 0.5)
+
+
+def play_key(ranks, upcard):
+    """Lookup key ``(total, soft, pair_value, upcard_value)`` of a two-card play."""
+    hard = sum(1 if r == ACE else RANK_VALUES[r] for r in ranks)
+    soft = ACE in ranks and hard + 10 <= 21
+    total = hard + 10 if soft else hard
+    pair = RANK_VALUES[ranks[0]] if len(ranks) == 2 and ranks[0] == ranks[1] else None
+    return total, soft, pair, RANK_VALUES[upcard]
+
+
+# -- play-out ----------------------------------------------------------------
+
+def _total(ranks):
+    hard = sum(1 if r == ACE else RANK_VALUES[r] for r in ranks)
+    if ACE in ranks and hard + 10 <= 21:
+        return hard + 10, True
+    return hard, False
+
+
+def _play_basic(ranks, up_value, seq, pos, can_double):
+    """Finish a hand by basic strategy (no splits); returns ``(total, stake, pos)``."""
+    while True:
+        total, soft = _total(ranks)
+        if total > 21:
+            return total, 1, pos
+        action = basic_decision(total, soft, None, up_value,
+                                can_double=can_double and len(ranks) == 2, can_split=False)
+        if action == STAND:
+            return total, 1, pos
+        ranks = ranks + [seq[pos]]
+        pos += 1
+        if action == DOUBLE:
+            return _total(ranks)[0], 2, pos
+
+
+def _resolve(action, player, upcard, seq):
+    """Net result, in initial bets, of taking ``action`` first on this shoe order."""
+    up_value = RANK_VALUES[upcard]
+    hole, pos = seq[0], 1
+    hands = []  # (total, stake)
+    if action == STAND:
+        hands.append((_total(player)[0], 1))
+    elif action == DOUBLE:
+        hands.append((_total(player + [seq[pos]])[0], 2))
+        pos += 1
+    elif action == SPLIT:
+        for rank in player:
+            total, stake, pos = _play_basic([rank, seq[pos]], up_value, seq, pos + 1, True)
+            hands.append((total, stake))
+    else:
+        total, stake, pos = _play_basic(player + [seq[pos]], up_value, seq, pos + 1, False)
+        hands.append((total, stake))
+
+    if all(total > 21 for total, _ in hands):
+        return -sum(stake for _, stake in hands)
+    dealer = [upcard, hole]
+    while _total(dealer)[0] < 17:
+        dealer.append(seq[pos])
+        pos += 1
+    dealer_total = _total(dealer)[0]
+    net = 0
+    for total, stake in hands:
+        if total > 21:
+            net -= stake
+        elif dealer_total > 21 or total > dealer_total:
+            net += stake
+        elif total < dealer_total:
+            net -= stake
+    return net
+
+
+# -- generation --------------------------------------------------------------
+
+def _simulate_play(play, trials, num_decks, system, max_penetration, seed):
+    """Per-bucket ``{tc: [n, sum, sum_sq]}`` of the deviation's gain over basic."""
+    import numpy as np
+
+    name, player, upcard, deviation = play
+    rng = np.random.default_rng(seed)
+    tags = np.array(SYSTEMS[system], dtype=float)
+    drift = tags.sum() / len(tags)
+    full = np.full(13, 4 * num_decks, dtype=np.int64)
+    start = full.copy()
+    for rank in player + (upcard,):
+        start[rank] -= 1
+    total, soft = _total(list(player))
+    pair = RANK_VALUES[player[0]] if player[0] == player[1] else None
+    basic = basic_decision(total, soft, pair, RANK_VALUES[upcard])
+    ranks = np.arange(13)
+    buckets = {}
+    for _ in range(trials):
+        burn = int(rng.integers(0, int(start.sum() * max_penetration) + 1))
+        counts = start - rng.multivariate_hypergeometric(start, burn)
+        seen = full - counts
+        remaining = counts.sum()
+        tc = (tags @ seen - drift * seen.sum()) / max(remaining / 52, 0.5)
+        bucket = min(max(tc_bucket(tc), TC_RANGE[0]), TC_RANGE[1])
+        if upcard == ACE and deviation == 'I':
+            gain = 3 * counts[TEN:ACE].sum() / remaining - 1
+        else:
+            seq = rng.permutation(np.repeat(ranks, counts))[:SEQUENCE].tolist()
+            gain = _resolve(deviation, list(player), upcard, seq) - _resolve(basic, list(player), upcard, seq)
+        stats = buckets.setdefault(bucket, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += gain
+        stats[2] += gain * gain
+    return name, basic, buckets
+
+
+def fit_index(buckets, min_samples=MIN_BUCKET_SAMPLES):
+    """Crossing point of the gain-vs-count line: ``(index, direction)`` or ``(None, None)``.
+
+    Buckets are weighted by their sample size and the crossing is rounded to
+    the nearest true count; ``direction`` is '>=' when the deviation gains as
+    the count rises.
+    """
+    points = [(tc, n, s / n) for tc, (n, s, _) in buckets.items() if n >= min_samples]
+    if len(points) < 2:
+        return None, None
+    weight = sum(n for _, n, _ in points)
+    mean_tc = sum(tc * n for tc, n, _ in points) / weight
+    mean_gain = sum(g * n for _, n, g in points) / weight
+    sxx = sum(n * (tc - mean_tc) ** 2 for tc, n, _ in points)
+    sxy = sum(n * (tc - mean_tc) * (g - mean_gain) for tc, n, g in points)
+    if sxx == 0 or sxy == 0:
+        return None, None
+    slope = sxy / sxx
+    root = mean_tc - mean_gain / slope
+    if not TC_RANGE[0] <= root <= TC_RANGE[1]:
+        return None, None
+    return tc_bucket(root), '>=' if slope > 0 else '<='
+
+
+def generate(trials=50000, num_decks=6, system='hi_lo', max_penetration=0.8, workers=1,
+             seed=None, plays=PLAYS):
+    """Simulate every play (and insurance) and return the artifact dict."""
+    import numpy as np
+
+    seeds = np.random.SeedSequence(seed).generate_state(len(plays) + 1)
+    jobs = [(play, trials, num_decks, system, max_penetration, int(s))
+            for play, s in zip(plays + (("insurance", (TEN, TEN), ACE, 'I'),), seeds)]
+    started = time.perf_counter()
+    if workers <= 1:
+        results = [_simulate_play(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_play, *zip(*jobs)))
+
+    rows, insurance = [], None
+    for (name, basic, buckets), (play, *_rest) in zip(results, jobs):
+        index, direction = fit_index(buckets)
+        if name == "insurance":
+            insurance = index
+            continue
+        _, player, upcard, deviation = play
+        total, soft, pair, up_value = play_key(player, upcard)
+        rows.append([name, total, soft, pair, up_value, basic, deviation, index, direction])
+    return {
+        'version': ARTIFACT_VERSION,
+        'system': system,
+        'num_decks': num_decks,
+        'trials': trials,
+        'insurance': insurance,
+        'plays': rows,
+        'elapsed': round(time.perf_counter() - started, 1),
+    }
+
+
+def _default_artifact():
+    rows = []
+    for name, player, upcard, deviation in PLAYS:
+        total, soft, pair, up_value = play_key(player, upcard)
+        basic = basic_decision(total, soft, pair, up_value)
+        index, direction = DEFAULT_INDICES[name]
+        rows.append([name, total, soft, pair, up_value, basic, deviation, index, direction])
+    return {'version': ARTIFACT_VERSION, 'system': 'hi_lo', 'num_decks': 6, 'trials': 0,
+            'insurance': DEFAULT_INSURANCE, 'plays': rows}
+
+
+# -- lookup ------------------------------------------------------------------
+
+class DeviationTable:
+    """Index plays keyed by ``(total, soft, pair_value, upcard_value)``."""
+
+    def __init__(self, artifact):
+        self.system = artifact['system']
+        self.num_decks = artifact['num_decks']
+        self.insurance_index = artifact['insurance']
+        self.plays = {}
+        for name, total, soft, pair, up, basic, deviation, index, direction in artifact['plays']:
+            if index is not None:
+                self.plays[(total, bool(soft), pair, up)] = (name, deviation, index, direction == '>=')
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """Load a generated artifact, or the published defaults if there is none."""
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    return cls(json.load(f))
+            except Exception as e:
+                print(f"Error loading deviations: {e}")
+        return cls(_default_artifact())
+
+    def lookup(self, total, soft, pair_value, upcard, true_count, system=None):
+        """``(name, action, index)`` of the index play that applies, or ``None``.
+
+        ``system`` is the counting system of ``true_count`` (default: the
+        table's own); counts from any other system match nothing.
+        """
+        play = self.plays.get((total, soft, pair_value, upcard))
+        if play is None or (system is not None and system != self.system):
+            return None
+        name, action, index, at_or_above = play
+        tc = tc_bucket(true_count)
+        if (tc >= index) if at_or_above else (tc <= index):
+            return name, action, index
+        return None
+
+    def decide(self, cards, upcard, true_count, can_double=True, can_split=True, system=None):
+        """Basic strategy with index plays: ``(action, play_name or None)``."""
+        total, soft = hand_total(cards)
+        pair = cards[0].value if len(cards) == 2 and cards[0].rank == cards[1].rank else None
+        play = self.lookup(total, soft, pair, upcard, true_count, system)
+        if play is not None:
+            name, action, _ = play
+            if (action != DOUBLE or can_double) and (action != SPLIT or can_split):
+                return action, name
+        return basic_decision(total, soft, pair, upcard, can_double, can_split), None
+
+    def take_insurance(self, true_count, system=None):
+        if system is not None and system != self.system:
+            return False
+        return self.insurance_index is not None and tc_bucket(true_count) >= self.insurance_index
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate count-based index plays by simulation.")
+    parser.add_argument('--trials', type=int, default=50000, help="trials per play")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--system', choices=sorted(SYSTEMS), default='hi_lo')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    artifact = generate(trials=args.trials, num_decks=args.decks, system=args.system,
+                        workers=args.workers, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'))
+    for name, *_, index, direction in artifact['plays']:
+        print(f"{name:12} {direction or '':2} {index}")
+    print(f"insurance    >= {artifact['insurance']}")
+
+
+if __name__ == '__main__':
+    main()
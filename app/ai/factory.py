@@ -8,12 +8,27 @@ instance (the game is serialised into the Flask session).
 """
 
 _agent = None
+_agents = {}
 _simulators = {}
+_analytics = None
+_grader = None
+_deviations = None
 
 
-def get_agent():
-    """Return the shared Q-Learning agent (lazy-loaded)."""
+def get_agent(model_path=None):
+    """Return the shared Q-Learning agent (lazy-loaded).
+
+    ``model_path`` selects another saved Q-table (one shared agent per file),
+    e.g. to seat two versions of the model at the same table. Those agents
+    are evaluated, not trained, so they act greedily (``epsilon=0``).
+    """
     global _agent
+    if model_path is not None:
+        agent = _agents.get(model_path)
+        if agent is None:
+            from .qlearning import QLearningAgent
+            agent = _agents[model_path] = QLearningAgent(epsilon=0.0, model_path=model_path)
+        return agent
     if _agent is None:
         from .qlearning import QLearningAgent
         _agent = QLearningAgent()
@@ -30,8 +45,39 @@ def get_simulator(num_simulations=500):
     return sim
 
 
+def get_analytics():
+    """Return the shared strategy-analytics cache for the shared agent."""
+    global _analytics
+    if _analytics is None:
+        from .analytics import StrategyAnalytics
+        _analytics = StrategyAnalytics(get_agent())
+    return _analytics
+
+
+def get_grader():
+    """Return the shared background grader for human decisions."""
+    global _grader
+    if _grader is None:
+        from .grading import DecisionGrader
+        _grader = DecisionGrader(get_simulator(num_simulations=100))
+    return _grader
+
+
+def get_deviations():
+    """Return the shared table of count-based index plays."""
+    global _deviations
+    if _deviations is None:
+        from .deviations import DeviationTable
+        _deviations = DeviationTable.load()
+    return _deviations
+
+
 def reset():
     """Clear cached singletons (used by tests)."""
-    global _agent, _simulators
+    global _agent, _agents, _simulators, _analytics, _grader, _deviations
     _agent = None
+    _agents = {}
     _simulators = {}
+    _analytics = None
+    _grader = None
+    _deviations = None
@@ -0,0 +1,136 @@
+"""Background grading of human hit/stand decisions.
+
+Grading a move means running two Monte Carlo estimates (hit vs stand), which
+used to happen inside ``player_hit`` / ``player_stand`` before the card was
+dealt. Instead the game now submits a compact snapshot and gets a ticket
+back; a worker thread scores snapshots in submission order and the game folds
+finished tickets into ``stats`` on its next state change.
+
+A snapshot is ``(hand_codes, upcard_code, shoe_counts, action)``: the card
+codes of the hand, the dealer up-card code, the number of cards of each rank
+left in the shoe (13 ints, which is all the simulator needs from the shoe) and
+0 for stand / 1 for hit.
+"""
+
+import itertools
+import queue
+import secrets
+import threading
+from collections import OrderedDict
+
+from app.core.cards import CARDS, RANKS, Deck
+from app.core.codec import decode_cards, encode_cards
+
+MAX_QUEUE = 1000
+MAX_RESULTS = 10000
+
+
+def snapshot(hand, upcard, deck, action):
+    counts = [0] * len(RANKS)
+    for card in deck.cards:
+        counts[card.code % 13] += 1
+    return (encode_cards(hand.cards), upcard.code, tuple(counts), action)
+
+
+def _shoe_from_counts(counts):
+    deck = Deck.__new__(Deck)
+    deck.cards = [CARDS[rank] for rank, n in enumerate(counts) for _ in range(n)]
+    return deck
+
+
+def grade(snap, simulator):
+    """Return ``True`` when the snapshot's action matches the better estimate."""
+    from app.core.game import Hand
+    codes, upcard_code, counts, action = snap
+    hand = Hand("Grader")
+    hand.cards = decode_cards(codes)
+    hand.calculate()
+    upcard = CARDS[upcard_code]
+    deck = _shoe_from_counts(counts)
+    p_hit = simulator.simulate_hit_win_rate(hand, upcard, deck=deck)
+    p_stand = simulator.simulate_stand_win_rate(hand, upcard, deck=deck)
+    return (action == 1 and p_hit >= p_stand) or (action == 0 and p_stand > p_hit)
+
+
+class DecisionGrader:
+    def __init__(self, simulator, max_queue=MAX_QUEUE, max_results=MAX_RESULTS):
+        self.simulator = simulator
+        self.max_results = max_results
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._results = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        # Tickets outlive the process inside pickled games (restarts, rooms
+        # claimed by another worker), so each grader numbers its own series.
+        self._series = secrets.token_hex(8)
+        self._tickets = itertools.count(1)
+        self._thread = None
+        self.stats = {'submitted': 0, 'graded': 0, 'dropped': 0, 'errors': 0}
+
+    def submit(self, snap):
+        """Queue a snapshot; returns its ticket, or ``None`` if the queue is full."""
+        self._ensure_started()
+        ticket = f"{self._series}-{next(self._tickets)}"
+        with self._lock:
+            self._pending.add(ticket)
+        try:
+            self._queue.put_nowait((ticket, snap))
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(ticket)
+                self.stats['dropped'] += 1
+            return None
+        with self._lock:
+            self.stats['submitted'] += 1
+        return ticket
+
+    def collect(self, tickets):
+        """Split ``tickets`` into finished results and those still in flight.
+
+        Returns ``(results, pending)`` where ``results`` maps ticket to the
+        grade. Tickets this grader never issued (a game restored after a
+        restart or in another worker) or whose result was evicted appear in
+        neither and are dropped; ticket series never repeat across graders.
+        """
+        results, pending = {}, []
+        with self._lock:
+            for ticket in tickets:
+                if ticket in self._results:
+                    results[ticket] = self._results.pop(ticket)
+                elif ticket in self._pending:
+                    pending.append(ticket)
+        return results, pending
+
+    def drain(self):
+        """Block until every queued snapshot has been graded (used by tests)."""
+        self._queue.join()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='decision-grader', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            ticket, snap = self._queue.get()
+            try:
+                result = grade(snap, self.simulator)
+            except Exception as e:
+                print(f"Decision grading error: {e}")
+                result = None
+            with self._lock:
+                self._pending.discard(ticket)
+                if result is None:
+                    self.stats['errors'] += 1
+                else:
+                    self._results[ticket] = result
+                    self.stats['graded'] += 1
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+            self._queue.task_done()
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, queued=self._queue.qsize(), unclaimed=len(self._results))
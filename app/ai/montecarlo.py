@@ -89,3 +89,95 @@ class MonteCarloSimulator:
     def simulate_stand_win_rate(self, current_player_hand, dealer_upcard, deck=None):
         """Estimated win rate if the player stands now."""
         return self._simulate(current_player_hand, dealer_upcard, deck, hit_first=False)
+
+    def evaluator(self, deck=None):
+        """Shared-shoe evaluator for a batch of decisions (see ``ShoeEvaluator``)."""
+        return ShoeEvaluator(deck, num_decks=self.num_decks)
+
+
+class ShoeEvaluator:
+    """Hit/stand win rates for many hands against one snapshot of the shoe.
+
+    AI seats decide one after another against nearly the same shoe, so instead
+    of shuffling a shoe copy for every sample of every decision this builds the
+    shoe's card-value composition once and derives, per dealer up-card, the
+    distribution of the dealer's final total (computed once and cached). A
+    stand estimate is then a lookup in that distribution and a hit estimate a
+    weighted sum over the next card's value. Within one evaluation each draw
+    uses the snapshot's composition, which is what a single shuffled sample
+    approximates anyway; ``MonteCarloSimulator``'s fallback to a fresh shoe
+    when fewer than 15 cards remain is kept.
+    """
+
+    def __init__(self, deck=None, num_decks=6):
+        cards = list(deck.cards) if deck is not None and getattr(deck, "cards", None) else []
+        if len(cards) < 15:
+            cards = [Card(rank, suit) for suit in SUITS for rank in RANKS] * num_decks
+        counts = {}
+        for card in cards:
+            counts[card.value] = counts.get(card.value, 0) + 1
+        total = len(cards)
+        self.probabilities = {value: n / total for value, n in counts.items()}
+        self._dealer = {}
+        self._rates = {}
+
+    def dealer_distribution(self, upcard_value):
+        """``{final_total: probability}`` for the dealer; 22 stands for any bust."""
+        dist = self._dealer.get(upcard_value)
+        if dist is None:
+            memo = {}
+            dist = self._dealer_from(upcard_value if upcard_value != 11 else 1, upcard_value == 11, memo)
+            self._dealer[upcard_value] = dist
+        return dist
+
+    def _dealer_from(self, hard, has_ace, memo):
+        value = hard + 10 if has_ace and hard + 10 <= 21 else hard
+        if value >= 17:
+            return {min(value, 22): 1.0}
+        key = (hard, has_ace)
+        if key in memo:
+            return memo[key]
+        dist = {}
+        for card_value, p in self.probabilities.items():
+            ace = card_value == 11
+            sub = self._dealer_from(hard + (1 if ace else card_value), has_ace or ace, memo)
+            for final, q in sub.items():
+                dist[final] = dist.get(final, 0.0) + p * q
+        memo[key] = dist
+        return dist
+
+    def stand_win_rate(self, player_value, upcard_value):
+        """Win rate (draws count half) when standing on ``player_value``."""
+        if player_value > 21:
+            return 0.0
+        rate = 0.0
+        for final, p in self.dealer_distribution(upcard_value).items():
+            result = determine_winner(player_value, final)
+            if result == 1:
+                rate += p
+            elif result == 0:
+                rate += 0.5 * p
+        return rate
+
+    def hit_win_rate(self, cards, upcard_value):
+        """Win rate when taking exactly one more card and then standing."""
+        hard = sum(1 if c.rank == 'A' else c.value for c in cards)
+        has_ace = any(c.rank == 'A' for c in cards)
+        key = (hard, has_ace, upcard_value)
+        rate = self._rates.get(key)
+        if rate is None:
+            rate = 0.0
+            for card_value, p in self.probabilities.items():
+                ace = card_value == 11
+                new_hard = hard + (1 if ace else card_value)
+                new_value = new_hard + 10 if (has_ace or ace) and new_hard + 10 <= 21 else new_hard
+                rate += p * self.stand_win_rate(new_value, upcard_value)
+            self._rates[key] = rate
+        return rate
+
+    def evaluate(self, requests):
+        """Resolve ``[(hand, dealer_upcard), ...]`` into ``[(p_hit, p_stand), ...]``."""
+        return [
+            (self.hit_win_rate(hand.cards, upcard.value), self.stand_win_rate(hand.value, upcard.value))
+            for hand, upcard in requests
+        ]
@@ -3,8 +3,30 @@ import os
 import json
 from app.core.rules import determine_winner
 
+def _build_basic_strategy():
+    """Simplified hard-total basic strategy: (player_sum, dealer_card) -> 0=Stand, 1=Hit."""
+    basic_strategy = {}
+    for player_sum in range(4, 22):
+        for dealer_card in range(2, 12):
+            if player_sum >= 17:
+                basic_strategy[(player_sum, dealer_card)] = 0  # Stand
+            elif player_sum <= 11:
+                basic_strategy[(player_sum, dealer_card)] = 1  # Hit
+            elif player_sum >= 13 and dealer_card <= 6:
+                basic_strategy[(player_sum, dealer_card)] = 0  # Stand
+            elif player_sum == 12 and 4 <= dealer_card <= 6:
+                basic_strategy[(player_sum, dealer_card)] = 0  # Stand
+            else:
+                basic_strategy[(player_sum, dealer_card)] = 1  # Hit
+    return basic_strategy
+
+
+BASIC_STRATEGY = _build_basic_strategy()
+DEFAULT_MODEL_PATH = 'q_table.json'
+
+
 class QLearningAgent:
-    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, model_path='q_table.json'):
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, model_path=DEFAULT_MODEL_PATH):
         """
         alpha: Learning Rate
         gamma: Discount Factor
@@ -16,6 +38,7 @@ class QLearningAgent:
         self.epsilon = epsilon
         self.training_stats = []
         self.model_path = model_path
+        self.version = 0  # Bumped whenever learned values are saved or loaded
         self.load()
 
     def save(self):
@@ -37,6 +60,7 @@ class QLearningAgent:
             except Exception as e:
                 print(f"Error loading Q-table: {e}")
                 self.q_table = {}
+            self.version += 1
 
     def get_state(self, game, player_hand):
         """
@@ -71,7 +95,7 @@ class QLearningAgent:
         """
         Returns 0 (Stand) or 1 (Hit)
         """
-        if random.random() < self.epsilon:
+        if self.epsilon and random.random() < self.epsilon:
             return random.choice([0, 1])
         
         q_vals = self.get_q_values(state)
@@ -96,6 +120,7 @@ class QLearningAgent:
         
         if done:
             self.save()
+            self.version += 1  # Once per saved episode, not per update
 
     def train(self, num_episodes=10000):
         wins = 0
@@ -212,32 +237,12 @@ class QLearningAgent:
         Compare Q-Learning strategy with basic Blackjack strategy.
         Returns accuracy percentage and differences.
         """
-        # Basic strategy rules (simplified)
-        basic_strategy = {
-            # (player_sum, dealer_card): action (0=Stand, 1=Hit)
-        }
-        
-        # Hard totals basic strategy
-        for player_sum in range(4, 22):
-            for dealer_card in range(2, 12):
-                # Simplified basic strategy
-                if player_sum >= 17:
-                    basic_strategy[(player_sum, dealer_card)] = 0  # Stand
-                elif player_sum <= 11:
-                    basic_strategy[(player_sum, dealer_card)] = 1  # Hit
-                elif player_sum >= 13 and dealer_card <= 6:
-                    basic_strategy[(player_sum, dealer_card)] = 0  # Stand
-                elif player_sum == 12 and 4 <= dealer_card <= 6:
-                    basic_strategy[(player_sum, dealer_card)] = 0  # Stand
-                else:
-                    basic_strategy[(player_sum, dealer_card)] = 1  # Hit
-        
         # Compare Q-Learning with basic strategy
         matches = 0
         total = 0
         differences = []
         
-        for (player_sum, dealer_card), basic_action in basic_strategy.items():
+        for (player_sum, dealer_card), basic_action in BASIC_STRATEGY.items():
             state = (player_sum, dealer_card, 0)  # Use neutral count
             q_vals = self.get_q_values(state)
             q_action = 0 if q_vals[0] >= q_vals[1] else 1
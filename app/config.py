@@ -10,10 +10,61 @@ import os
 class BaseConfig:
     SESSION_TYPE = 'filesystem'
     SESSION_PERMANENT = False
+    # Background sweeper for the filesystem session directory (0 disables).
+    SESSION_SWEEP_INTERVAL = int(os.environ.get('SESSION_SWEEP_INTERVAL', 300))
+    SESSION_MAX_AGE = int(os.environ.get('SESSION_MAX_AGE', 24 * 3600))
+    SESSION_MAX_FILES = int(os.environ.get('SESSION_MAX_FILES', 5000))
+    SESSION_MAX_BYTES = int(os.environ.get('SESSION_MAX_BYTES', 50 * 1024 * 1024))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///blackjack.db')
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-only-insecure-key')
     RATELIMIT_DEFAULTS = ["1000 per day", "200 per hour"]
+    # Shared limiter storage for several workers (e.g. redis://localhost:6379).
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
+
+    # Server-side game store (only the game id is kept in the session).
+    # Relative paths resolve inside the Flask instance folder.
+    GAME_STORE_PATH = os.environ.get('GAME_STORE_PATH', 'game_state.db')
+    GAME_STORE_MAX_ENTRIES = int(os.environ.get('GAME_STORE_MAX_ENTRIES', 1000))
+    GAME_STORE_FLUSH_INTERVAL = float(os.environ.get('GAME_STORE_FLUSH_INTERVAL', 2.0))
+    GAME_STORE_TTL = int(os.environ.get('GAME_STORE_TTL', 7 * 24 * 3600))
+
+    # Write-behind balance persistence: flush period and minimum gap (seconds).
+    BALANCE_FLUSH_INTERVAL = float(os.environ.get('BALANCE_FLUSH_INTERVAL', 5.0))
+    BALANCE_FLUSH_MIN_INTERVAL = float(os.environ.get('BALANCE_FLUSH_MIN_INTERVAL', 1.0))
+    HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 10.0))
+
+    # Multiplayer room registry limits; idle rooms are evicted after the TTL (seconds).
+    ROOM_MAX_ROOMS = int(os.environ.get('ROOM_MAX_ROOMS', 500))
+    ROOM_MAX_SEATS = int(os.environ.get('ROOM_MAX_SEATS', 6))
+    ROOM_IDLE_TTL = int(os.environ.get('ROOM_IDLE_TTL', 1800))
+    # Read-only spectators: updates per second per room (coalesced) and watchers per room.
+    SPECTATOR_MAX_RATE = float(os.environ.get('SPECTATOR_MAX_RATE', 2.0))
+    SPECTATOR_MAX_PER_ROOM = int(os.environ.get('SPECTATOR_MAX_PER_ROOM', 500))
+    # Signed-in player's name/balance: per-request memo plus a process cache (seconds, 0 disables).
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL', 30))
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.environ.get('IDENTITY_CACHE_MAX_ENTRIES', 10000))
+    # Password hashing (Werkzeug method, e.g. scrypt or pbkdf2:sha256:600000), run off the
+    # event loop: hashes at once and seconds to wait for a free slot.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 4))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5.0))
+    # AI bet sizing (app.ai.betting): fraction:0.1, flat:10, spread:8 or kelly:0.5
+    AI_BET_RAMP = os.environ.get('AI_BET_RAMP', 'fraction:0.1')
+    # Card counting for new games (app.ai.counter): hi_lo, ko, hi_opt_2, omega_2 or zen
+    COUNTING_SYSTEM = os.environ.get('COUNTING_SYSTEM', 'hi_lo')
+
+    # Multi-worker mode: Socket.IO fan-out between workers goes through the
+    # message queue (e.g. redis://localhost:6379/0) and rooms live in a shared
+    # SQLite file (relative to the instance folder). Empty keeps both in-process.
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+    ROOM_STORE_PATH = os.environ.get('ROOM_STORE_PATH', '')
+    ROOM_OWNER_TTL = int(os.environ.get('ROOM_OWNER_TTL', 30))
+
+    # Server-side autoplay simulations (POST /api/autoplay).
+    AUTOPLAY_MAX_JOBS = int(os.environ.get('AUTOPLAY_MAX_JOBS', 2))
+    AUTOPLAY_MAX_ROUNDS = int(os.environ.get('AUTOPLAY_MAX_ROUNDS', 100000))
 
 
 class DevelopmentConfig(BaseConfig):
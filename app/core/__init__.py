@@ -1,3 +1,4 @@
 from .cards import Card, Deck
 from .game import BlackJackGame, Hand
+from .ledger import Account
 from .rules import calculate_hand_value
@@ -4,11 +4,34 @@ SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 VALUES = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10, 'J': 10, 'Q': 10, 'K': 10, 'A': 11}
 
+# A card's compact code is ``suit_index * 13 + rank_index`` (0..51). It is the
+# unit used by the session codec (see ``app.core.codec``).
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+
 class Card:
+    __slots__ = ('rank', 'suit', 'value', 'code')
+
     def __init__(self, rank, suit):
         self.rank = rank
         self.suit = suit
         self.value = VALUES[rank]
+        self.code = SUIT_INDEX[suit] * 13 + RANK_INDEX[rank]
+
+    @staticmethod
+    def from_code(code):
+        """Return the shared (immutable by convention) card for ``code``."""
+        return CARDS[code]
+
+    def __reduce__(self):
+        return (Card.from_code, (self.code,))
+
+    def __setstate__(self, state):
+        # Sessions pickled before cards were slotted carry a plain ``__dict__``.
+        if isinstance(state, tuple):
+            state = state[1] or state[0]
+        self.__init__(state['rank'], state['suit'])
 
     def __repr__(self):
         return f"{self.rank} of {self.suit}"
@@ -16,18 +39,38 @@ class Card:
     def to_dict(self):
         return {'rank': self.rank, 'suit': self.suit, 'value': self.value}
 
+
+# One canonical instance per code; decks and decoded hands share them.
+CARDS = tuple(Card(rank, suit) for suit in SUITS for rank in RANKS)
+
+
 class Deck:
-    def __init__(self, num_decks=1):
-        self.cards = [Card(rank, suit) for suit in SUITS for rank in RANKS] * num_decks
-        self.shuffle()
+    __slots__ = ('cards',)
+
+    def __init__(self, num_decks=1, rng=None):
+        self.cards = list(CARDS) * num_decks
+        self.shuffle(rng)
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def __getstate__(self):
+        return bytes(card.code for card in self.cards)
+
+    def __setstate__(self, state):
+        if isinstance(state, (bytes, bytearray)):
+            self.cards = [CARDS[code] for code in state]
+        else:
+            # Legacy pickles: ``{'cards': [Card, ...]}``
+            if isinstance(state, tuple):
+                state = state[1] or state[0]
+            self.cards = list(state['cards'])
+
+    def shuffle(self, rng=None):
+        """Shuffle in place with ``rng`` (a ``random.Random``; default: the global RNG)."""
+        (rng or random).shuffle(self.cards)
 
     def deal(self):
         if not self.cards:
             return None # Or raise EmptyDeckException
         return self.cards.pop()
-    
+
     def remaining(self):
         return len(self.cards)
@@ -0,0 +1,82 @@
+"""Compact, schema-versioned serialization for hands.
+
+The whole game is pickled into the session on every request, so ``Hand``
+pickles itself as a flat tuple instead of a ``__dict__``::
+
+    (schema_version, owner_name, player_id, flags, card_codes,
+     account, current_bet, initial_bet, split_pair_value)
+
+``card_codes`` is a ``bytes`` string of ``Card.code`` values and ``flags`` a
+bitmask of the boolean fields. ``value`` and ``busted`` are derived from the
+cards and recomputed on decode. ``account`` is the ``Account`` object itself,
+so split hands pickled together keep sharing it; schema 2 stored a plain
+``balance`` there and gets a fresh account on load (see
+``BlackJackGame.link_split_accounts``).
+
+Pickles written before the codec existed hold a plain attribute dict; they are
+migrated through ``migrate_hand_state`` so old sessions keep loading.
+"""
+
+from .cards import CARDS
+from .ledger import Account
+
+HAND_SCHEMA_VERSION = 3
+
+# Bit positions of the boolean hand fields inside ``flags``.
+HAND_FLAGS = ('is_ai', 'standing', 'withdrawn', 'is_double_down', 'is_split', 'is_insurance')
+
+# Field defaults for schema 1 (the legacy ``__dict__`` pickles).
+LEGACY_HAND_DEFAULTS = {
+    'is_ai': False, 'player_id': None, 'standing': False, 'withdrawn': False,
+    'balance': 1000, 'current_bet': 0, 'initial_bet': 0, 'is_double_down': False,
+    'is_split': False, 'is_insurance': False, 'split_pair_value': None,
+}
+
+
+def encode_cards(cards):
+    return bytes(card.code for card in cards)
+
+
+def decode_cards(codes):
+    return [CARDS[code] for code in codes]
+
+
+def encode_hand(hand):
+    flags = 0
+    for bit, name in enumerate(HAND_FLAGS):
+        if getattr(hand, name):
+            flags |= 1 << bit
+    return (HAND_SCHEMA_VERSION, hand.owner_name, hand.player_id, flags,
+            encode_cards(hand.cards), hand.account, hand.current_bet,
+            hand.initial_bet, hand.split_pair_value)
+
+
+def decode_hand(hand, state):
+    """Populate ``hand`` (a bare instance) from an encoded or legacy state."""
+    if isinstance(state, dict):
+        state = migrate_hand_state(state)
+    version = state[0]
+    if version == 2:
+        state = state[:5] + (Account(state[5]),) + state[6:]
+    elif version != HAND_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported hand schema version: {version}")
+
+    (_, hand.owner_name, hand.player_id, flags, codes,
+     hand.account, hand.current_bet, hand.initial_bet, hand.split_pair_value) = state
+    for bit, name in enumerate(HAND_FLAGS):
+        setattr(hand, name, bool(flags & (1 << bit)))
+    hand.cards = decode_cards(codes)
+    hand.calculate()
+
+
+def migrate_hand_state(legacy):
+    """Upgrade a schema-1 attribute dict to the current encoded tuple."""
+    fields = dict(LEGACY_HAND_DEFAULTS)
+    fields.update(legacy)
+    flags = 0
+    for bit, name in enumerate(HAND_FLAGS):
+        if fields[name]:
+            flags |= 1 << bit
+    return (HAND_SCHEMA_VERSION, fields.get('owner_name', 'Player'), fields['player_id'],
+            flags, encode_cards(fields.get('cards', [])), Account(fields['balance']),
+            fields['current_bet'], fields['initial_bet'], fields['split_pair_value'])
@@ -1,10 +1,20 @@
 from .cards import Deck
+from .codec import encode_hand, decode_hand
+from .ledger import Account
 from .rules import calculate_hand_value, is_bust, determine_winner
+from app.ai.basic_strategy import hand_total
+from app.ai.betting import get_ramp, ramp_count
 from app.ai.counter import CardCounter
 
 
 class Hand:
-    def __init__(self, owner_name="Player", balance=1000, is_ai=False, player_id=None):
+    __slots__ = (
+        'owner_name', 'player_id', 'is_ai', 'cards', 'value', 'busted', 'standing',
+        'withdrawn', 'account', 'current_bet', 'initial_bet', 'is_double_down',
+        'is_split', 'is_insurance', 'split_pair_value',
+    )
+
+    def __init__(self, owner_name="Player", balance=1000, is_ai=False, player_id=None, account=None):
         self.owner_name = owner_name
         self.player_id = player_id  # Socket ID or User ID
         self.is_ai = is_ai
@@ -13,7 +23,7 @@ class Hand:
         self.busted = False
         self.standing = False
         self.withdrawn = False
-        self.balance = balance
+        self.account = account if account is not None else Account(balance)
         self.current_bet = 0
         self.initial_bet = 0  # To track for double down
         self.is_double_down = False
@@ -21,18 +31,20 @@ class Hand:
         self.is_insurance = False
         self.split_pair_value = None
 
+    @property
+    def balance(self):
+        return self.account.balance
+
+    @balance.setter
+    def balance(self, value):
+        self.account.balance = value
+
+    def __getstate__(self):
+        return encode_hand(self)
+
     def __setstate__(self, state):
-        self.__dict__ = state
-        # Backward compatibility for existing pickled sessions
-        defaults = {
-            'is_ai': False, 'player_id': None, 'value': 0, 'busted': False,
-            'standing': False, 'withdrawn': False, 'current_bet': 0,
-            'initial_bet': 0, 'is_double_down': False, 'is_split': False,
-            'is_insurance': False, 'split_pair_value': None,
-        }
-        for key, val in defaults.items():
-            if key not in self.__dict__:
-                setattr(self, key, val)
+        # Accepts both the versioned tuple and legacy ``__dict__`` pickles.
+        decode_hand(self, state)
 
     def reset_for_round(self):
         """Clear per-round state while preserving balance and identity."""
@@ -90,10 +102,12 @@ class Hand:
 
 
 class BlackJackGame:
-    def __init__(self, num_decks=6):
+    def __init__(self, num_decks=6, track_accuracy=True, rng=None):
         self.num_decks = num_decks
-        self.deck = Deck(num_decks=num_decks)
-        self.counter = CardCounter()
+        self.track_accuracy = track_accuracy  # Grade human moves (costs two MC runs each)
+        self.rng = rng  # Shuffles with its own ``random.Random`` (simulations); None = global
+        self.deck = Deck(num_decks=num_decks, rng=rng)
+        self.counter = CardCounter(num_decks=num_decks)
         self.dealer_hand = Hand("Dealer", balance=1000000)
         self.players = []
         self.current_player_idx = 0
@@ -103,6 +117,13 @@ class BlackJackGame:
         self.message = "Place your bets!"
         self.decision_history = []
         self.winner_indices = []
+        self.round_results = []  # Per-hand outcomes of the last settled round
+        self.version = 0  # Incremented on every state change (see ``touch``)
+        self.pending_grades = []  # Grader tickets for human moves not scored yet
+        # Per-seat AI overrides {player_id: (difficulty, q_table_path or None)};
+        # seats not listed play ``difficulty`` with the shared agent.
+        self.seat_policies = {}
+        self.bet_ramp = None  # AI bet sizing spec (``app.ai.betting``); None = configured default
         self.stats = {
             'rounds_played': 0,
             'player_wins': 0,
@@ -113,8 +134,50 @@ class BlackJackGame:
             'player_decisions_correct': 0,
         }
 
+    def __setstate__(self, state):
+        # Games pickled by older versions lack attributes added since.
+        self.__dict__.update(state)
+        self.__dict__.setdefault('round_results', [])
+        self.__dict__.setdefault('version', 0)
+        self.__dict__.setdefault('track_accuracy', True)
+        self.__dict__.setdefault('pending_grades', [])
+        self.__dict__.setdefault('seat_policies', {})
+        self.__dict__.setdefault('bet_ramp', None)
+        self.__dict__.setdefault('rng', None)
+        self.counter.align(self.deck.remaining())
+        self.link_split_accounts()
+
+    def link_split_accounts(self):
+        """Make every split hand share the account of the hand it came from.
+
+        Hands are already linked when created; this re-links games pickled
+        before balances moved to a shared ``Account``. A split hand always sits
+        right after its source hand (or after another split of the same owner).
+        """
+        previous = None
+        for hand in self.players:
+            if hand.is_split and previous is not None and previous.owner_name == hand.owner_name:
+                hand.account = previous.account
+            previous = hand
+
+    def touch(self):
+        """Record a state change. Clients use ``version`` for conditional requests."""
+        self.version += 1
+        if self.pending_grades:
+            self.fold_grades()
+
+    def fold_grades(self):
+        """Add finished background grades of human moves to ``stats``."""
+        from app.ai.factory import get_grader
+        results, self.pending_grades = get_grader().collect(self.pending_grades)
+        for correct in results.values():
+            self.stats['player_decisions_total'] += 1
+            if correct:
+                self.stats['player_decisions_correct'] += 1
+
     def add_player(self, name, player_id=None, balance=1000):
         """Adds a human player to the game dynamically."""
+        self.touch()
         new_hand = Hand(name, balance=balance, is_ai=False, player_id=player_id)
         self.players.append(new_hand)
         return new_hand
@@ -125,6 +188,7 @@ class BlackJackGame:
         This is the critical entry point: it must clear each hand and, above
         all, set ``game_over = False`` so that hit/stand actions are honoured.
         """
+        self.touch()
         self.difficulty = difficulty
 
         if not self.players:
@@ -132,11 +196,16 @@ class BlackJackGame:
             for i in range(num_ai):
                 self.players.append(Hand(f"AI_{i + 1}", is_ai=True))
 
+        # Hands created by a split only live for the round they were split in.
+        self.players = [p for p in self.players if not p.is_split]
+
         # Reset every hand for the new round, keeping balance and identity.
+        # AI stakes follow the bet ramp, sized on the count before the deal.
+        ramp = get_ramp(self.bet_ramp)
         for p in self.players:
             p.reset_for_round()
             if p.is_ai:
-                p.place_bet(max(10, int(p.balance * 0.1)))
+                p.place_bet(ramp(p.balance, ramp_count(self.counter)))
 
         # Fresh dealer hand.
         self.dealer_hand = Hand("Dealer", balance=1000000)
@@ -145,6 +214,7 @@ class BlackJackGame:
         self.current_player_idx = 0
         self.decision_history = []
         self.winner_indices = []
+        self.round_results = []
         self.game_over = False          # <-- without this, hit/stand are no-ops
         self.waiting_for_bets = True
         self.message = "Place your bets!"
@@ -154,11 +224,12 @@ class BlackJackGame:
         """Called once the human places a bet to deal the opening cards."""
         if not self.waiting_for_bets:
             return
+        self.touch()
 
         # Reshuffle the shoe if it is running low.
         if self.deck.remaining() < 20:
-            self.deck = Deck(num_decks=self.num_decks)
-            self.counter.reset()
+            self.deck = Deck(num_decks=self.num_decks, rng=self.rng)
+            self.counter.reset(self.deck.remaining())
 
         # Deal initial two cards to each player and the dealer.
         for _ in range(2):
@@ -177,17 +248,47 @@ class BlackJackGame:
             self.message = "Blackjack! Press Stand to finish."
 
     def _advance_to_human_or_finish(self):
-        """Play AI turns from the current index until a human must act."""
+        """Play AI turns from the current index until a human must act.
+
+        The consecutive AI seats share one ``ShoeEvaluator``: their opening
+        hands are evaluated in a single batch and later decisions reuse its
+        cached dealer-outcome distribution.
+        """
+        evaluator = None
         while self.current_player_idx < len(self.players):
             player = self.players[self.current_player_idx]
             if player.is_ai:
-                self.ai_turn(player)
+                if evaluator is None:
+                    evaluator = self._ai_evaluator()
+                self.ai_turn(player, evaluator)
                 self.current_player_idx += 1
             else:
                 return
         self.dealer_turn()
 
+    def _dealer_upcard(self):
+        if len(self.dealer_hand.cards) >= 2:
+            return self.dealer_hand.cards[1]
+        if self.dealer_hand.cards:
+            return self.dealer_hand.cards[0]
+        return None
+
+    def _ai_evaluator(self):
+        """Evaluator over the current shoe, primed with the waiting AI hands."""
+        from app.ai.factory import get_simulator
+        evaluator = get_simulator(num_simulations=50).evaluator(self.deck)
+        upcard = self._dealer_upcard()
+        if upcard is not None and self.difficulty != "EASY":
+            waiting = []
+            for hand in self.players[self.current_player_idx:]:
+                if not hand.is_ai:
+                    break
+                waiting.append((hand, upcard))
+            evaluator.evaluate(waiting)
+        return evaluator
+
     def next_turn(self):
+        self.touch()
         self.current_player_idx += 1
         self._advance_to_human_or_finish()
 
@@ -198,6 +299,7 @@ class BlackJackGame:
         """
         if self.game_over or self.waiting_for_bets:
             return
+        self.touch()
         if self.current_player_idx >= len(self.players):
             self.dealer_turn()
             return
@@ -208,6 +310,7 @@ class BlackJackGame:
     def player_double_down(self):
         if self.game_over or self.waiting_for_bets:
             return
+        self.touch()
         p = self.players[self.current_player_idx]
         if len(p.cards) == 2 and p.balance >= p.initial_bet:
             p.double_bet()
@@ -220,11 +323,12 @@ class BlackJackGame:
     def player_split(self):
         if self.game_over or self.waiting_for_bets:
             return
+        self.touch()
         idx = self.current_player_idx
         p = self.players[idx]
 
         if len(p.cards) == 2 and p.cards[0].rank == p.cards[1].rank and p.balance >= p.initial_bet:
-            new_hand = Hand(p.owner_name, balance=p.balance, is_ai=p.is_ai, player_id=p.player_id)
+            new_hand = Hand(p.owner_name, is_ai=p.is_ai, player_id=p.player_id, account=p.account)
             new_hand.is_split = True
             new_hand.current_bet = p.initial_bet
             new_hand.initial_bet = p.initial_bet
@@ -239,8 +343,7 @@ class BlackJackGame:
             self.players.insert(idx + 1, new_hand)
             self.message = "Hand Split! Playing first hand."
 
-            self._update_owner_balance(p.owner_name, -p.initial_bet)
-            self._sync_balances()
+            p.account.balance -= p.initial_bet
         else:
             self.message = "Cannot split (not a pair or insufficient funds)"
 
@@ -248,6 +351,7 @@ class BlackJackGame:
         """Allows the human player to take insurance if the dealer shows an Ace."""
         if self.game_over or self.waiting_for_bets:
             return
+        self.touch()
         p = self.players[0]
         if (len(p.cards) == 2 and len(self.dealer_hand.cards) >= 2
                 and self.dealer_hand.cards[1].rank == 'A'
@@ -258,25 +362,11 @@ class BlackJackGame:
         else:
             self.message = "Cannot take insurance."
 
-    def _sync_balances(self):
-        """Ensures all hands for the same owner show the same balance."""
-        owner_balances = {}
-        for p in self.players:
-            if p.owner_name not in owner_balances:
-                owner_balances[p.owner_name] = p.balance
-            else:
-                p.balance = owner_balances[p.owner_name]
-
-    def _update_owner_balance(self, owner_name, net_change):
-        for p in self.players:
-            if p.owner_name == owner_name:
-                p.balance += net_change
-
     def _deal_card_to(self, hand):
         card = self.deck.deal()
         if card is None:
-            self.deck = Deck(num_decks=self.num_decks)
-            self.counter.reset()
+            self.deck = Deck(num_decks=self.num_decks, rng=self.rng)
+            self.counter.reset(self.deck.remaining())
             card = self.deck.deal()
         self.counter.update(card)
         hand.add_card(card)
@@ -287,6 +377,7 @@ class BlackJackGame:
         player = self.players[self.current_player_idx]
         if player.standing or player.withdrawn:
             return
+        self.touch()
 
         if not player.is_ai:
             self._track_human_accuracy(1)  # Action 1 = Hit
@@ -298,6 +389,7 @@ class BlackJackGame:
     def player_stand(self):
         if self.game_over:
             return
+        self.touch()
         player = self.players[self.current_player_idx]
         if not player.is_ai:
             self._track_human_accuracy(0)  # Action 0 = Stand
@@ -305,70 +397,84 @@ class BlackJackGame:
         self.next_turn()
 
     def _track_human_accuracy(self, action):
-        """Compare the human move against the Monte Carlo recommendation."""
-        from app.ai.factory import get_simulator
-        sim = get_simulator(num_simulations=100)
+        """Queue the human move for grading against the Monte Carlo recommendation.
 
+        Scoring runs on the background grader (``app.ai.grading``) so the move
+        itself never waits for the simulations; see ``fold_grades``.
+        """
+        if not self.track_accuracy:
+            return
         dealer_upcard = self.dealer_hand.cards[1] if len(self.dealer_hand.cards) >= 2 else None
         if dealer_upcard is None:
             return
+        from app.ai.factory import get_grader
+        from app.ai.grading import snapshot
         human = self.players[self.current_player_idx]
-        p_hit = sim.simulate_hit_win_rate(human, dealer_upcard, deck=self.deck)
-        p_stand = sim.simulate_stand_win_rate(human, dealer_upcard, deck=self.deck)
-
-        self.stats['player_decisions_total'] += 1
-        if (action == 1 and p_hit >= p_stand) or (action == 0 and p_stand > p_hit):
-            self.stats['player_decisions_correct'] += 1
+        ticket = get_grader().submit(snapshot(human, dealer_upcard, self.deck, action))
+        if ticket is not None:
+            self.pending_grades.append(ticket)
 
     def player_withdraw(self):
         if self.game_over:
             return
+        self.touch()
         self.players[self.current_player_idx].withdrawn = True
         self.next_turn()
 
-    def ai_turn(self, player):
+    def ai_turn(self, player, evaluator=None):
         """Play a single AI hand.
 
         Difficulty tiers:
           * EASY   -> fixed rule (hit until 16).
-          * MEDIUM -> Monte Carlo probability only (no counting, no Q-table).
-          * HARD   -> Q-Learning policy enriched with card counting.
+          * MEDIUM -> exact hit/stand win rates for the remaining shoe
+            (``ShoeEvaluator``; no counting, no Q-table).
+          * HARD   -> Q-Learning policy enriched with card counting; the
+            count-based index plays (``app.ai.deviations``) override it
+            once the true count crosses their index.
+
+        Hit/stand win rates come from ``evaluator`` (a ``ShoeEvaluator``
+        shared by the AI seats acting in a row); one is built if not given.
+        ``seat_policies`` can give a seat its own tier and Q-table.
 
         Note: the agent does not *learn* during live play; training happens
         offline via ``QLearningAgent.train`` / the training socket.
         """
-        from app.ai.factory import get_agent, get_simulator
-        agent = get_agent()
-        simulator = get_simulator(num_simulations=50)
+        from app.ai.factory import get_agent, get_deviations
+        difficulty, model_path = self.seat_policies.get(player.player_id, (self.difficulty, None))
+        agent = get_agent(model_path)
+        if evaluator is None:
+            evaluator = self._ai_evaluator()
 
         while not player.busted and not player.standing:
             strategy = "Basic Rules"
             action = 0
             prob_hit = 0.0
 
-            dealer_upcard = None
-            if len(self.dealer_hand.cards) >= 2:
-                dealer_upcard = self.dealer_hand.cards[1]
-            elif len(self.dealer_hand.cards) >= 1:
-                dealer_upcard = self.dealer_hand.cards[0]
+            dealer_upcard = self._dealer_upcard()
 
-            if self.difficulty == "EASY" or dealer_upcard is None:
+            if difficulty == "EASY" or dealer_upcard is None:
                 action = 1 if player.value < 16 else 0
                 strategy = "Basic Rules"
-            elif self.difficulty == "MEDIUM":
-                prob_hit = simulator.simulate_hit_win_rate(player, dealer_upcard, deck=self.deck)
-                prob_stand = simulator.simulate_stand_win_rate(player, dealer_upcard, deck=self.deck)
+            elif difficulty == "MEDIUM":
+                prob_hit = evaluator.hit_win_rate(player.cards, dealer_upcard.value)
+                prob_stand = evaluator.stand_win_rate(player.value, dealer_upcard.value)
                 action = 1 if prob_hit > prob_stand else 0
-                strategy = "Monte Carlo"
+                strategy = "Shoe Probability"
             else:  # HARD
                 state_val = agent.get_state(self, player)
                 action = agent.choose_action(state_val)
-                prob_hit = simulator.simulate_hit_win_rate(player, dealer_upcard, deck=self.deck)
+                prob_hit = evaluator.hit_win_rate(player.cards, dealer_upcard.value)
                 strategy = "Q-Learning"
                 if abs(self.counter.running_count) >= 2:
                     strategy = "Card Counting"
                 elif prob_hit > 0.5:
-                    strategy = "Monte Carlo"
+                    strategy = "Shoe Probability"
+                total, soft = hand_total(player.cards)
+                play = get_deviations().lookup(total, soft, None, dealer_upcard.value,
+                                               self.counter.true_count, self.counter.system)
+                if play is not None and play[1] in ('H', 'S'):
+                    action = 1 if play[1] == 'H' else 0
+                    strategy = "Index Play"
 
             self.decision_history.append({
                 'player': player.owner_name,
@@ -376,11 +482,11 @@ class BlackJackGame:
                 'reason': strategy,
                 'prob_hit': prob_hit,
                 'count': self.counter.running_count,
-                'difficulty': self.difficulty,
+                'difficulty': difficulty,
             })
 
             self.stats['ai_decisions_total'] += 1
-            if self.difficulty in ("MEDIUM", "HARD"):
+            if difficulty in ("MEDIUM", "HARD"):
                 if (action == 0 and prob_hit < 0.5) or (action == 1 and prob_hit >= 0.5):
                     self.stats['ai_decisions_correct'] += 1
 
@@ -399,8 +505,18 @@ class BlackJackGame:
         self.game_over = True
         self.determine_winners()
 
+    def _record_result(self, hand, outcome, payout=0):
+        self.round_results.append({
+            'owner': hand.owner_name,
+            'is_ai': hand.is_ai,
+            'outcome': outcome,
+            'bet': hand.current_bet,
+            'payout': payout,
+        })
+
     def determine_winners(self):
         self.winner_indices = []
+        self.round_results = []
         results = []
         dealer_val = self.dealer_hand.value
         dealer_bj = (dealer_val == 21 and len(self.dealer_hand.cards) == 2)
@@ -408,11 +524,12 @@ class BlackJackGame:
         for i, p in enumerate(self.players):
             if p.is_insurance and dealer_bj:
                 payout = (p.initial_bet // 2) * 3  # 2:1 payout + original insurance back
-                self._update_owner_balance(p.owner_name, payout)
+                p.account.balance += payout
                 results.append(f"{p.owner_name}: Insurance Payout (+{payout})")
 
             if p.withdrawn:
                 results.append(f"{p.owner_name}: Withdrawn")
+                self._record_result(p, 'withdrawn')
                 continue
 
             win_val = determine_winner(p.value, dealer_val)
@@ -420,20 +537,22 @@ class BlackJackGame:
                 self.winner_indices.append(i)
                 multiplier = 2.5 if (p.value == 21 and len(p.cards) == 2 and not p.is_split) else 2.0
                 payout = int(p.current_bet * multiplier)
-                self._update_owner_balance(p.owner_name, payout)
+                p.account.balance += payout
                 results.append(f"{p.owner_name}: WIN (+{payout})")
+                self._record_result(p, 'win', payout)
                 if not p.is_ai:
                     self.stats['player_wins'] += 1
                 else:
                     self.stats['ai_wins'] += 1
             elif win_val == -1:
                 results.append(f"{p.owner_name}: LOSS")
+                self._record_result(p, 'loss')
             else:
-                self._update_owner_balance(p.owner_name, p.current_bet)
+                p.account.balance += p.current_bet
                 results.append(f"{p.owner_name}: DRAW")
+                self._record_result(p, 'draw', p.current_bet)
 
         self.message = " | ".join(results)
-        self._sync_balances()
 
     def get_state(self):
         return {
@@ -447,4 +566,5 @@ class BlackJackGame:
             'message': self.message,
             'stats': self.stats,
             'decision_history': self.decision_history,
+            'version': self.version,
         }
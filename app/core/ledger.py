@@ -0,0 +1,21 @@
+"""Per-owner balance shared by all of that owner's hands.
+
+Splitting a hand creates a second ``Hand`` for the same player. Both hold a
+reference to one ``Account``, so a bet, payout or refund on either hand is a
+single O(1) update and the hands can never disagree about the balance (nor be
+confused with another player who happens to use the same name).
+"""
+
+
+class Account:
+    __slots__ = ('balance',)
+
+    def __init__(self, balance=1000):
+        self.balance = balance
+
+    def __reduce__(self):
+        # Pickle memoises the object, so hands sharing an account still share it after loading.
+        return (Account, (self.balance,))
+
+    def __repr__(self):
+        return f"Account(balance={self.balance})"
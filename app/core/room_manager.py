@@ -1,58 +1,295 @@
-import uuid
+"""Registry of multiplayer rooms.
+
+Each ``Room`` wraps one ``BlackJackGame`` with its own lock (socket handlers
+hold it while they mutate and broadcast, so actions within a room are
+serialized), its member sids and a last-activity timestamp. The registry
+bounds memory on a long-lived server:
+
+  * a room is removed as soon as its last member leaves,
+  * rooms idle for longer than ``idle_ttl`` are evicted (checked whenever a
+    room is created, and by ``evict_idle``),
+  * at most ``max_rooms`` rooms and ``max_seats`` members per room.
+
+Room ids are random codes from an unambiguous alphabet, re-drawn on collision.
+Joining/leaving the matching Socket.IO rooms is left to the socket handlers.
+
+With several worker processes a shared ``RoomStore`` (``configure(store=...)``)
+holds the authoritative copy of each room: ``rooms`` is then this worker's
+cache, handlers call ``sync`` before and ``commit`` after changing a game, and
+room and seat limits are counted across workers. A room whose shared row is
+gone (its last seat left on another worker, or it expired) is dropped from
+the cache as soon as ``sync``/``commit`` notice.
+
+``on_remove(room_id, closed)`` is called whenever a room leaves the registry;
+``closed`` is ``False`` when only this worker's copy went away and the room
+is still played elsewhere.
+"""
+
+import secrets
+import threading
+import time
+
 from app.core.game import BlackJackGame
-from flask_socketio import join_room, leave_room, emit
+
+ROOM_ID_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # no 0/O, 1/I
+ROOM_ID_LENGTH = 6
+
+
+class Room:
+    __slots__ = ('room_id', 'game', 'lock', 'members', 'created_at', 'last_active', 'version')
+
+    def __init__(self, room_id, game, lock, version=0):
+        self.room_id = room_id
+        self.game = game
+        self.lock = lock
+        self.version = version  # shared-store version this copy was loaded at
+        self.members = set()
+        self.created_at = self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
 
 class GameManager:
-    def __init__(self):
-        self.rooms = {} # {room_id: BlackJackGame}
-        self.player_rooms = {} # {sid: room_id}
+    def __init__(self, max_rooms=500, max_seats=6, idle_ttl=1800, lock_factory=threading.RLock):
+        self.max_rooms = max_rooms
+        self.max_seats = max_seats
+        self.idle_ttl = idle_ttl
+        self.lock_factory = lock_factory
+        self.on_remove = None  # callback(room_id, closed) when a room goes away
+        self.store = None  # shared RoomStore when running several workers
+        self.rooms = {}  # {room_id: Room}
+        self.player_rooms = {}  # {sid: room_id}
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'removed_empty': 0, 'evicted_idle': 0, 'rejected_full': 0,
+                      'reloads': 0, 'conflicts': 0, 'gone': 0}
+
+    def configure(self, max_rooms=None, max_seats=None, idle_ttl=None, lock_factory=None,
+                  store=None):
+        if max_rooms is not None:
+            self.max_rooms = max_rooms
+        if max_seats is not None:
+            self.max_seats = max_seats
+        if idle_ttl is not None:
+            self.idle_ttl = idle_ttl
+        if lock_factory is not None:
+            self.lock_factory = lock_factory
+            # Store calls may yield (eventlet.tpool) while the registry lock is held.
+            self._lock = lock_factory()
+        if store is not None:
+            self.store = store
+
+    def _new_room_id(self, game):
+        while True:
+            room_id = ''.join(secrets.choice(ROOM_ID_ALPHABET) for _ in range(ROOM_ID_LENGTH))
+            if room_id in self.rooms:
+                continue
+            if self.store is None or self.store.create(room_id, game):
+                return room_id
 
     def create_room(self, host_sid, difficulty="HARD"):
-        room_id = str(uuid.uuid4())[:6].upper()
+        """Create an empty room and return its id (``None`` when at capacity)."""
+        self.evict_idle()
         game = BlackJackGame()
-        game.start_new_round(num_ai=0, difficulty=difficulty) # Start empty
-        # Host is automatically Player 1 (Human)
-        # Note: We need to map SIDs to players in the game engine to know whose turn it is
-        # For simplicity, we'll append players as they join
-        
-        self.rooms[room_id] = game
+        game.difficulty = difficulty
+        with self._lock:
+            total = self.store.count() if self.store is not None else len(self.rooms)
+            if total >= self.max_rooms:
+                self.stats['rejected_full'] += 1
+                return None
+            room_id = self._new_room_id(game)
+            self.rooms[room_id] = Room(room_id, game, self.lock_factory())
+            self.stats['created'] += 1
         return room_id
 
     def join_room(self, room_id, sid, username):
-        if room_id not in self.rooms:
+        with self._lock:
+            room = self.rooms.get(room_id) or self._load(room_id)
+            if room is None:
+                return None, "Room not found"
+            if sid in self.player_rooms:
+                return None, "Already in a room"
+            gone = False
+            if self.store is not None:
+                seated = self.store.reserve_seat(room_id, self.max_seats)
+                gone = not seated and self.store.version(room_id) is None
+            else:
+                seated = len(room.members) < self.max_seats
+            if seated:
+                room.members.add(sid)
+                room.touch()
+                self.player_rooms[sid] = room_id
+            elif not gone:
+                self.stats['rejected_full'] += 1
+        if gone:
+            self._drop(room)
             return None, "Room not found"
-        
-        game = self.rooms[room_id]
-        
-        # Check if already joined
-        if sid in self.player_rooms:
-            return None, "Already in a room"
-
-        # Add player logic
-        # Ideally, Game class needs to accept a specific player object or we manage mapping here
-        # Let's map sid -> player index or owner name
-        # For now, we assume standard flow:
-        # If game has < 2 humans, allow join.
-        
-        # We need to modify BlackJackGame to support dynamic adding of humans?
-        # Current logic: `start_new_round` resets players.
-        # We might need a "Lobby Phase" where players gather before round starts.
-        
-        self.player_rooms[sid] = room_id
-        join_room(room_id)
-        return game, "Joined"
+        if not seated:
+            return None, "Room is full"
+        return room.game, "Joined"
+
+    def _load(self, room_id):
+        """Cache a room another worker created (``None`` if unknown)."""
+        if self.store is None:
+            return None
+        loaded = self.store.load(room_id)
+        if loaded is None:
+            return None
+        version, game = loaded
+        room = self.rooms[room_id] = Room(room_id, game, self.lock_factory(), version)
+        return room
+
+    def _drop(self, room):
+        """Forget a room whose shared row is gone; ``False`` if already dropped."""
+        with self._lock:
+            if self.rooms.get(room.room_id) is not room:
+                return False
+            del self.rooms[room.room_id]
+            for sid in room.members:
+                self.player_rooms.pop(sid, None)
+            self.stats['gone'] += 1
+        if self.on_remove:
+            self.on_remove(room.room_id, True)
+        return True
+
+    def is_live(self, room):
+        """``False`` once ``room`` has left the registry (e.g. dropped by ``sync``)."""
+        return self.rooms.get(room.room_id) is room
+
+    def sync(self, room):
+        """Bring ``room`` up to date with the shared store (hold ``room.lock``).
+
+        Returns ``True`` when the game was replaced by a newer copy, so cached
+        broadcast state for the room is stale. A room that is gone from the
+        store is dropped (see ``on_remove``). Without a store this is a no-op.
+        """
+        if self.store is None:
+            return False
+        version = self.store.version(room.room_id)
+        if version == room.version:
+            return False
+        loaded = self.store.load(room.room_id) if version is not None else None
+        if loaded is None:
+            self._drop(room)
+            return False
+        room.version, room.game = loaded
+        self.stats['reloads'] += 1
+        return True
+
+    def commit(self, room):
+        """Publish ``room.game`` to the shared store (hold ``room.lock``).
+
+        Returns ``False`` if another worker changed the room since ``sync``;
+        the local change is then discarded by reloading the stored copy. It
+        is also ``False`` when the room is gone, which drops it (``is_live``
+        then tells the two apart).
+        """
+        if self.store is None:
+            return True
+        version = self.store.save(room.room_id, room.game, room.version)
+        if version is None:
+            if self.store.version(room.room_id) is None:
+                self._drop(room)
+                return False
+            self.stats['conflicts'] += 1
+            self.sync(room)
+            return False
+        room.version = version
+        return True
+
+    def find_room(self, room_id):
+        """The room with ``room_id`` (loaded from the shared store if needed), or ``None``."""
+        with self._lock:
+            return self.rooms.get(room_id) or self._load(room_id)
+
+    def get_room(self, sid):
+        """The caller's room (marks it active), or ``None``."""
+        room = self.rooms.get(self.player_rooms.get(sid))
+        if room is not None:
+            room.touch()
+        return room
 
     def get_game(self, sid):
-        room_id = self.player_rooms.get(sid)
-        if room_id:
-            return self.rooms.get(room_id)
-        return None
+        room = self.get_room(sid)
+        return room.game if room is not None else None
 
     def remove_player(self, sid):
-        if sid in self.player_rooms:
-            room_id = self.player_rooms[sid]
-            leave_room(room_id)
-            del self.player_rooms[sid]
-            # Handle game cleanup if empty?
-            
+        """Forget ``sid``; returns the room id it was in (``None`` if none)."""
+        with self._lock:
+            room_id = self.player_rooms.pop(sid, None)
+            room = self.rooms.get(room_id)
+            emptied = False
+            if room is not None:
+                room.members.discard(sid)
+                seats_left = len(room.members)
+                if self.store is not None:
+                    seats_left = self.store.release_seat(room_id)
+                if not room.members:
+                    # With a store this only drops the local copy; the shared
+                    # row goes with its last seat.
+                    del self.rooms[room_id]
+                    self.stats['removed_empty'] += 1
+                    emptied = True
+        if emptied and self.on_remove:
+            self.on_remove(room_id, seats_left == 0)
+        return room_id
+
+    def evict_idle(self, now=None):
+        """Drop rooms with no activity for ``idle_ttl`` seconds; returns how many."""
+        now = time.monotonic() if now is None else now
+        refresh = []
+        with self._lock:
+            expired = [r for r in self.rooms.values() if now - r.last_active > self.idle_ttl]
+            if self.store is not None:
+                # Still played on another worker: not idle.
+                versions = {r.room_id: self.store.version(r.room_id) for r in expired}
+                for room in [r for r in expired if versions[r.room_id] not in (None, r.version)]:
+                    room.last_active = now
+                    expired.remove(room)
+                    refresh.append(room)
+            for room in expired:
+                del self.rooms[room.room_id]
+                for sid in room.members:
+                    self.player_rooms.pop(sid, None)
+                    if self.store is not None:
+                        self.store.release_seat(room.room_id)
+            self.stats['evicted_idle'] += len(expired)
+        for room in refresh:
+            if room.lock.acquire(blocking=False):  # busy means active anyway
+                try:
+                    self.sync(room)
+                finally:
+                    room.lock.release()
+        closed = {room.room_id: True for room in expired}
+        if self.store is not None:
+            # A local eviction only closes the room if no other worker holds a seat.
+            for room in expired:
+                closed[room.room_id] = self.store.version(room.room_id) is None
+            self.store.heartbeat()
+            for room_id in self.store.expire(self.idle_ttl):
+                room = self.rooms.get(room_id)
+                if room is not None:
+                    self._drop(room)
+                else:
+                    closed[room_id] = True
+        if self.on_remove:
+            for room_id, is_closed in closed.items():
+                self.on_remove(room_id, is_closed)
+        return len(expired)
+
+    def metrics(self):
+        with self._lock:
+            seats = [len(r.members) for r in self.rooms.values()]
+            return dict(
+                self.stats,
+                rooms=len(seats),
+                max_rooms=self.max_rooms,
+                players=sum(seats),
+                max_seats=self.max_seats,
+                full_rooms=sum(1 for n in seats if n >= self.max_seats),
+                avg_occupancy=(sum(seats) / len(seats) / self.max_seats) if seats else 0.0,
+                store=self.store.metrics() if self.store is not None else None,
+            )
+
+
 game_manager = GameManager()
@@ -0,0 +1,126 @@
+"""Read-only spectators of multiplayer rooms.
+
+Spectators are not seated in the room and never receive the players' own
+broadcasts. A spectator-only background tick (see ``sockets.spectator_tick``)
+visits each watched room at most ``max_rate`` times per second and, if the
+game's version moved, builds ONE redacted message for the room and emits it
+to the room's spectator sub-room. Any number of actions between ticks are
+coalesced into that message, and the Socket.IO server encodes it once for all
+recipients, so player actions cost the same with zero or hundreds of
+spectators.
+
+While a round is in play the dealer's hole card (``cards[0]``) is hidden,
+and so is everything derived from it: the dealer total and the hole card's
+share of the count and of the suggestion (in the state and in the round's
+decision log).
+"""
+
+import copy
+
+from .state_diff import PatchStream
+
+HIDDEN_CARD = {'rank': '?', 'suit': '?', 'value': 0}
+
+
+def spectator_state(game):
+    """``game.get_state()`` with the hidden information removed."""
+    state = game.get_state()
+    dealer = game.dealer_hand.cards
+    if game.game_over or game.waiting_for_bets or len(dealer) < 2:
+        return state
+    state = copy.copy(state)
+    counter = game.counter
+    hole_tag = counter.tag(dealer[0])
+    hand = state['dealer_hand'] = dict(state['dealer_hand'])
+    hand['cards'] = [HIDDEN_CARD] + hand['cards'][1:]
+    hand['value'] = dealer[1].value
+    state['count'], true_count = counter.without(dealer[0])
+    state['suggestion'] = counter.suggestion_for(true_count)
+    # The log is reset every round, so every entry was made after the deal.
+    state['decision_history'] = [dict(entry, count=entry['count'] - hole_tag)
+                                 for entry in state['decision_history']]
+    return state
+
+
+class SpectatorFeed:
+    """Who watches which room, and the coalesced message stream of each room."""
+
+    def __init__(self, max_rate=2.0, max_per_room=500):
+        self.interval = 1.0 / max_rate
+        self.max_per_room = max_per_room
+        self.watchers = {}  # {room_id: set(sid)}
+        self.watching = {}  # {sid: room_id}
+        self.streams = {}  # {room_id: PatchStream} - last state spectators got
+        self.stats = {'ticks': 0, 'messages': 0, 'coalesced': 0, 'rejected_full': 0}
+
+    def configure(self, max_rate=None, max_per_room=None):
+        if max_rate:
+            self.interval = 1.0 / max_rate
+        if max_per_room is not None:
+            self.max_per_room = max_per_room
+
+    def add(self, room_id, sid):
+        """Start watching ``room_id``; ``False`` when the room has no spectator seats."""
+        sids = self.watchers.setdefault(room_id, set())
+        if len(sids) >= self.max_per_room:
+            self.stats['rejected_full'] += 1
+            return False
+        sids.add(sid)
+        self.watching[sid] = room_id
+        return True
+
+    def remove(self, sid):
+        """Stop watching; returns the room id (``None`` if ``sid`` was not watching)."""
+        room_id = self.watching.pop(sid, None)
+        sids = self.watchers.get(room_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self.watchers[room_id]
+                self.streams.pop(room_id, None)
+        return room_id
+
+    def forget(self, room_id):
+        """Drop a room that went away; returns the sids that were watching it."""
+        sids = self.watchers.pop(room_id, set())
+        for sid in sids:
+            self.watching.pop(sid, None)
+        self.streams.pop(room_id, None)
+        return sids
+
+    def rooms(self):
+        return list(self.watchers)
+
+    def snapshot(self, room_id, game):
+        """The state a new spectator starts from.
+
+        That is the state the room's spectators last received, so the next
+        coalesced patch applies to it; a room nobody has been sent yet starts
+        its stream now.
+        """
+        stream = self.streams.get(room_id)
+        if stream is None or stream.last_state is None:
+            self.message(room_id, game)
+            stream = self.streams[room_id]
+        return stream.last_state
+
+    def message(self, room_id, game):
+        """``(event, payload)`` for the room's spectators, or ``None`` if unchanged."""
+        stream = self.streams.get(room_id)
+        if stream is None:
+            stream = self.streams[room_id] = PatchStream()
+        if stream.last_version == game.version:
+            return None
+        if stream.last_version is not None:
+            self.stats['coalesced'] += max(0, game.version - stream.last_version - 1)
+        self.stats['messages'] += 1
+        return stream.message(spectator_state(game))
+
+    def metrics(self):
+        return dict(
+            self.stats,
+            rooms=len(self.watchers),
+            spectators=len(self.watching),
+            max_rate=round(1.0 / self.interval, 3),
+            max_per_room=self.max_per_room,
+        )
@@ -0,0 +1,113 @@
+"""Incremental updates of ``BlackJackGame.get_state()`` for Socket.IO rooms.
+
+A patch is a list of short operations on the JSON state, each addressed by a
+path of dict keys and list indices:
+
+    ['s', path, value]    set (or add) the value at ``path``
+    ['d', path]           delete the dict key at ``path``
+    ['a', path, values]   append ``values`` to the list at ``path``
+    ['t', path, length]   truncate the list at ``path`` to ``length``
+
+Most actions change a handful of leaves (a card appended, a balance, the turn
+index), so the patch is a small fraction of the full state. ``PatchStream``
+turns successive states of one room into ``game_patch`` messages carrying the
+version they apply to, with a full ``game_update`` snapshot every
+``snapshot_every`` messages or whenever a patch would not be much smaller.
+Clients that see a ``base_version`` other than their own ask for a resync.
+"""
+
+import copy
+
+SNAPSHOT_EVERY = 20
+MAX_PATCH_OPS = 40
+
+
+def diff(old, new, path=()):
+    """Return the operations that turn ``old`` into ``new``."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append(['s', list(path) + [key], value])
+            else:
+                ops.extend(diff(old[key], value, path + (key,)))
+        for key in old:
+            if key not in new:
+                ops.append(['d', list(path) + [key]])
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        shared = min(len(old), len(new))
+        for i in range(shared):
+            ops.extend(diff(old[i], new[i], path + (i,)))
+        if len(new) > shared:
+            ops.append(['a', list(path), new[shared:]])
+        elif len(old) > shared:
+            ops.append(['t', list(path), shared])
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [['s', list(path), new]]
+
+
+def apply(state, ops):
+    """Apply ``ops`` to ``state`` in place and return it (mirrors the JS client)."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == 's':
+                state = op[2]
+                continue
+            target = state
+        else:
+            target = state
+            for key in path[:-1]:
+                target = target[key]
+        if kind == 's':
+            target[path[-1]] = op[2]
+        elif kind == 'd':
+            del target[path[-1]]
+        else:
+            seq = target[path[-1]] if path else target
+            if kind == 'a':
+                seq.extend(op[2])
+            else:
+                del seq[op[2]:]
+    return state
+
+
+class PatchStream:
+    """Turn successive full states of one room into patch or snapshot messages."""
+
+    def __init__(self, snapshot_every=SNAPSHOT_EVERY, max_ops=MAX_PATCH_OPS):
+        self.snapshot_every = snapshot_every
+        self.max_ops = max_ops
+        self.last_state = None
+        self.last_version = None
+        self.since_snapshot = 0
+        self.stats = {'patches': 0, 'snapshots': 0}
+
+    def message(self, state, version=None):
+        """Return ``(event, payload)`` to broadcast for ``state``.
+
+        ``version`` defaults to ``state['version']``; pass it for states that
+        are not dicts (the compact wire format).
+        """
+        if version is None:
+            version = state['version']
+        previous, base_version = self.last_state, self.last_version
+        self.last_state = copy.deepcopy(state)
+        self.last_version = version
+        if previous is not None and self.since_snapshot < self.snapshot_every:
+            ops = diff(previous, state)
+            if len(ops) <= self.max_ops:
+                self.since_snapshot += 1
+                self.stats['patches'] += 1
+                return 'game_patch', {
+                    'base_version': base_version,
+                    'version': version,
+                    'ops': ops,
+                }
+        self.since_snapshot = 0
+        self.stats['snapshots'] += 1
+        return 'game_update', state
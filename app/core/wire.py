@@ -0,0 +1,122 @@
+"""Compact wire format for room state (opt-in per Socket.IO client).
+
+``get_state()`` builds a dict per hand and per card on every emit. Clients that
+opt in receive the same information as positional arrays instead, built
+straight from the game objects, with each card sent as its ``Card.code``
+(0..51, ``suit_index * 13 + rank_index``)::
+
+    state = [version, players, dealer, current_player_idx, count, suggestion,
+             game_over, waiting_for_bets, message, stats, decision_history]
+    hand  = [owner, player_id, flags, cards, value, balance, bet]
+    stats = values of STAT_KEYS, in order
+    entry = values of HISTORY_KEYS, in order
+
+``flags`` packs the booleans of ``HAND_FLAGS``. Messages are
+``['S', state]`` (snapshot) or ``['P', base_version, version, ops]`` (a
+``state_diff`` patch of the compact state), serialized with MessagePack when
+``msgpack`` (or ``msgspec``) is installed and sent as plain arrays otherwise.
+``app/web/static/js/wire.js`` is the client-side decoder.
+"""
+
+from .cards import CARDS
+
+WIRE_VERSION = 1
+
+HAND_FLAGS = ('is_ai', 'busted', 'standing', 'withdrawn', 'is_double')
+STAT_KEYS = (
+    'rounds_played', 'player_wins', 'ai_wins', 'ai_decisions_total',
+    'ai_decisions_correct', 'player_decisions_total', 'player_decisions_correct',
+)
+HISTORY_KEYS = ('player', 'action', 'reason', 'prob_hit', 'count', 'difficulty')
+
+try:
+    import msgpack
+
+    def pack(message):
+        return msgpack.packb(message, use_bin_type=True)
+
+    def unpack(data):
+        return msgpack.unpackb(data, raw=False)
+
+    BINARY = True
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import msgspec
+
+        _encoder, _decoder = msgspec.msgpack.Encoder(), msgspec.msgpack.Decoder()
+        pack, unpack = _encoder.encode, _decoder.decode
+        BINARY = True
+    except ImportError:
+        def pack(message):
+            return message
+
+        def unpack(data):
+            return data
+
+        BINARY = False
+
+
+def compact_hand(hand):
+    flags = (hand.is_ai | hand.busted << 1 | hand.standing << 2
+             | hand.withdrawn << 3 | hand.is_double_down << 4)
+    return [hand.owner_name, hand.player_id, flags, [c.code for c in hand.cards],
+            hand.value, hand.balance, hand.current_bet]
+
+
+def compact_state(game):
+    stats = game.stats
+    return [
+        game.version,
+        [compact_hand(p) for p in game.players],
+        compact_hand(game.dealer_hand),
+        game.current_player_idx,
+        game.counter.running_count,
+        game.counter.get_suggestion(),
+        game.game_over,
+        game.waiting_for_bets,
+        game.message,
+        [stats.get(key, 0) for key in STAT_KEYS],
+        [[entry.get(key) for key in HISTORY_KEYS] for entry in game.decision_history],
+    ]
+
+
+def expand_hand(hand):
+    owner, player_id, flags, codes, value, balance, bet = hand
+    expanded = {
+        'owner': owner,
+        'player_id': player_id,
+        'cards': [CARDS[code].to_dict() for code in codes],
+        'value': value,
+        'balance': balance,
+        'bet': bet,
+    }
+    for bit, name in enumerate(HAND_FLAGS):
+        expanded[name] = bool(flags & (1 << bit))
+    return expanded
+
+
+def expand_state(state):
+    """Rebuild the ``get_state()`` dict from a compact state (what wire.js does)."""
+    (version, players, dealer, idx, count, suggestion, game_over, waiting,
+     message, stats, history) = state
+    return {
+        'players': [expand_hand(p) for p in players],
+        'dealer_hand': expand_hand(dealer),
+        'current_player_idx': idx,
+        'count': count,
+        'suggestion': suggestion,
+        'game_over': game_over,
+        'waiting_for_bets': waiting,
+        'message': message,
+        'stats': dict(zip(STAT_KEYS, stats)),
+        'decision_history': [dict(zip(HISTORY_KEYS, entry)) for entry in history],
+        'version': version,
+    }
+
+
+def snapshot_message(state):
+    return pack(['S', state])
+
+
+def patch_message(base_version, version, ops):
+    return pack(['P', base_version, version, ops])
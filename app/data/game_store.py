@@ -0,0 +1,210 @@
+"""Server-side store for in-progress games.
+
+Only a ``game_id`` lives in the user's session. Games are kept in an in-memory
+LRU table and written behind to a local SQLite file, so a request no longer
+pickles and rewrites the whole game (shoe included) to disk:
+
+  * ``put`` marks a game dirty; a background thread flushes dirty games in
+    one transaction every ``flush_interval`` seconds (and on ``close``).
+  * When the table exceeds ``max_entries`` the least recently used game is
+    evicted; if it is still dirty it is written out first, so eviction never
+    loses state.
+  * A cache miss falls back to SQLite, which is what lets games survive a
+    restart. Rows untouched for ``ttl`` seconds are purged by the same
+    background thread.
+
+A flush may race with a request that is mutating the same game. Every request
+ends with ``put``, which re-marks the game dirty, so a torn snapshot is always
+superseded by the next flush.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class GameStore:
+    def __init__(self, path='game_state.db', max_entries=1000, flush_interval=2.0,
+                 ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._games = OrderedDict()  # {game_id: BlackJackGame}, LRU order
+        self._dirty = set()
+        self._lock = threading.RLock()  # cache and dirty set
+        self._db_lock = threading.Lock()  # the SQLite connection; taken before ``_lock``
+        self._flush_lock = threading.Lock()
+        self._deleted = set()  # deleted since the last flush snapshot
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS games ('
+            ' game_id TEXT PRIMARY KEY,'
+            ' state BLOB NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_games_updated_at ON games (updated_at)')
+        self._conn.commit()
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'writes': 0,
+                      'flushes': 0, 'evictions': 0, 'expired': 0, 'errors': 0}
+
+    # -- lookup -----------------------------------------------------------
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def get(self, game_id):
+        """Return the game for ``game_id`` or ``None`` if it is unknown."""
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is not None:
+                self._games.move_to_end(game_id)
+                self.stats['hits'] += 1
+                return game
+            self.stats['misses'] += 1
+        with self._db_lock:
+            row = self._conn.execute(
+                'SELECT state FROM games WHERE game_id = ?', (game_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            game = pickle.loads(row[0])
+        except Exception as e:
+            print(f"Game Store Load Error ({game_id}): {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+            return None
+        with self._lock:
+            if game_id in self._deleted:
+                return None
+            cached = self._games.get(game_id)
+            if cached is not None:  # loaded or replaced meanwhile
+                return cached
+            self.stats['loads'] += 1
+            self._games[game_id] = game
+            evicted = self._evict()
+        self._write(evicted)
+        return game
+
+    def put(self, game_id, game):
+        """Cache ``game`` and schedule it for the next write-behind flush."""
+        with self._lock:
+            self._games[game_id] = game
+            self._games.move_to_end(game_id)
+            self._dirty.add(game_id)
+            evicted = self._evict()
+        self._write(evicted)
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+            self._dirty.discard(game_id)
+            self._deleted.add(game_id)  # a flush already holding a snapshot must not revive it
+        with self._db_lock, self._conn:
+            self._conn.execute('DELETE FROM games WHERE game_id = ?', (game_id,))
+
+    # -- persistence ------------------------------------------------------
+    def flush(self):
+        """Write every dirty game in a single transaction. Returns the count.
+
+        Only taking the snapshot holds the store lock; pickling and the
+        SQLite write run without it, so requests are not held up by a flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                snapshot = [(game_id, self._games[game_id])
+                            for game_id in self._dirty if game_id in self._games]
+                self._dirty.clear()
+                self._deleted.clear()
+            rows = []
+            now = time.time()
+            for game_id, game in snapshot:
+                try:
+                    rows.append((game_id, pickle.dumps(game, pickle.HIGHEST_PROTOCOL), now))
+                except Exception as e:
+                    # Most likely mutated mid-pickle; it stays dirty for the next pass.
+                    print(f"Game Store Snapshot Error ({game_id}): {e}")
+                    with self._lock:
+                        self.stats['errors'] += 1
+                        self._dirty.add(game_id)
+            self._write(rows)
+            with self._lock:
+                self.stats['flushes'] += 1
+            return len(rows)
+
+    def _write(self, rows):
+        if not rows:
+            return
+        with self._db_lock:
+            with self._lock:
+                rows = [row for row in rows if row[0] not in self._deleted]
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO games (game_id, state, updated_at) VALUES (?, ?, ?)',
+                        rows)
+            except sqlite3.Error as e:
+                print(f"Game Store Write Error: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+                    self._dirty.update(game_id for game_id, _, _ in rows)
+                return
+        with self._lock:
+            self.stats['writes'] += len(rows)
+
+    def expire(self):
+        """Delete persisted games that have not been written for ``ttl`` seconds."""
+        if not self.ttl:
+            return 0
+        with self._db_lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM games WHERE updated_at < ?', (time.time() - self.ttl,))
+        with self._lock:
+            self.stats['expired'] += cursor.rowcount
+        return cursor.rowcount
+
+    def _evict(self):
+        """Drop LRU games over the limit; returns the dirty ones' rows for ``_write``."""
+        rows = []
+        while len(self._games) > self.max_entries:
+            game_id, game = self._games.popitem(last=False)
+            if game_id in self._dirty:
+                self._dirty.discard(game_id)
+                rows.append((game_id, pickle.dumps(game, pickle.HIGHEST_PROTOCOL), time.time()))
+            self.stats['evictions'] += 1
+        return rows
+
+    # -- lifecycle --------------------------------------------------------
+    def start(self):
+        """Start the background write-behind thread (idempotent)."""
+        if self._thread is not None or not self.flush_interval:
+            return
+        self._thread = threading.Thread(target=self._run, name='game-store-flush', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.expire()
+            except Exception as e:
+                print(f"Game Store Flush Error: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+        self._conn.close()
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, cached=len(self._games), dirty=len(self._dirty))
@@ -0,0 +1,181 @@
+"""Cache of the signed-in player's identity (id, name, balance).
+
+Pages and game actions only need the player's name and balance, but each
+used to load the ``PlayerModel`` row again. ``IdentityCache.get`` answers
+from, in order:
+
+  * ``flask.g`` - a memo for the current request, so repeated lookups in one
+    request (e.g. several actions in ``/api/batch``) cost nothing,
+  * a process-wide LRU table of immutable ``Identity`` snapshots, each valid
+    for ``ttl`` seconds (0 disables it),
+  * the database.
+
+Snapshots are plain tuples, never ORM instances, so they are safe to share
+across requests and threads. Balance changes made by this process are written
+through with ``update_balance`` when they are queued for the database, and
+``invalidate`` drops a player (logout). Changes made by other processes are
+picked up when the snapshot expires.
+
+    python -m app.data.identity --rounds 200   # database queries per round, cache off vs on
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import g, has_request_context
+
+from .models import db, PlayerModel
+
+Identity = namedtuple('Identity', 'id name balance')
+
+
+def load_identity(user_id):
+    user = db.session.get(PlayerModel, user_id)
+    return Identity(user.id, user.name, user.balance) if user else None
+
+
+class IdentityCache:
+    def __init__(self, loader=load_identity, ttl=30.0, max_entries=10000):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # {user_id: (Identity, expires_at)}, LRU order
+        self._lock = threading.Lock()
+        self.stats = {'request_hits': 0, 'hits': 0, 'misses': 0, 'expired': 0,
+                      'invalidations': 0, 'balance_updates': 0}
+
+    def _memo(self):
+        if not has_request_context():
+            return None
+        memo = g.get('_identities')
+        if memo is None:
+            memo = g._identities = {}
+        return memo
+
+    def get(self, user_id):
+        """The player's ``Identity``, or ``None`` if the player does not exist."""
+        memo = self._memo()
+        if memo is not None and user_id in memo:
+            with self._lock:
+                self.stats['request_hits'] += 1
+            return memo[user_id]
+
+        identity = None
+        if self.ttl:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None:
+                    if entry[1] > now:
+                        self._entries.move_to_end(user_id)
+                        identity = entry[0]
+                        self.stats['hits'] += 1
+                    else:
+                        del self._entries[user_id]
+                        self.stats['expired'] += 1
+        if identity is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            identity = self.loader(user_id)
+            if identity is not None and self.ttl:
+                self._store(identity)
+        if memo is not None:
+            memo[user_id] = identity
+        return identity
+
+    def _store(self, identity):
+        with self._lock:
+            self._entries[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update_balance(self, user_id, balance):
+        """Write a new balance through to the cached snapshot (if any)."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0].balance != balance:
+                self._entries[user_id] = (entry[0]._replace(balance=balance), entry[1])
+                self.stats['balance_updates'] += 1
+        memo = self._memo()
+        if memo and memo.get(user_id) is not None:
+            memo[user_id] = memo[user_id]._replace(balance=balance)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.stats['invalidations'] += 1
+        memo = self._memo()
+        if memo:
+            memo.pop(user_id, None)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), ttl=self.ttl)
+
+
+def main(argv=None):
+    """Play rounds through the HTTP API and count database queries per round."""
+    import argparse
+    import json
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Database queries per round with and without the identity cache.")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--ttl', type=float, default=30.0, help="cache TTL for the cached run")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='identity-bench-')
+    os.chdir(workdir)  # the filesystem session directory is relative to the cwd
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'players.db')}")
+    os.environ.setdefault('GAME_STORE_PATH', os.path.join(workdir, 'games.db'))
+    os.environ.setdefault('BALANCE_FLUSH_MIN_INTERVAL', '0')
+
+    from sqlalchemy import event
+    from app import create_app
+
+    app, _ = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['RATELIMIT_ENABLED'] = False
+    app.extensions['limiter'].enabled = False
+    queries = {'players': 0, 'total': 0}
+
+    with app.app_context():
+        def count(conn, cursor, statement, *rest):
+            queries['total'] += 1
+            queries['players'] += statement.lstrip().upper().startswith('SELECT') and 'players' in statement
+        event.listen(db.engine, 'before_cursor_execute', count)
+        user = PlayerModel(name='bench', balance=10 ** 9)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    cache = app.extensions['identities']
+    results = {}
+    for label, ttl in (('uncached', 0), ('cached', args.ttl)):
+        cache.ttl = ttl
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s['user_id'] = user_id
+        client.get('/')
+        queries.update(players=0, total=0)
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            client.post('/api/start', json={'num_ai': 0})
+            client.post('/api/bet', json={'amount': 10})
+            client.post('/api/stand', json={})
+        elapsed = time.perf_counter() - started
+        app.extensions['balance_writer'].flush()
+        results[label] = {
+            'player_selects_per_round': queries['players'] / args.rounds,
+            'queries_per_round': queries['total'] / args.rounds,
+            'rounds_per_second': args.rounds / elapsed,
+        }
+    results['cache'] = cache.metrics()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
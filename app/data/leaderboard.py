@@ -0,0 +1,106 @@
+"""Leaderboard queries: best-result upserts, cached top-N, keyset pages.
+
+Ranking is ``peak_balance DESC, id DESC`` which the ``ix_leaderboard_rank``
+index serves directly. Deeper ranks are paged with a keyset cursor
+(``"<peak_balance>:<id>"`` of the last row seen) instead of ``OFFSET`` so every
+page costs the same regardless of depth.
+
+The top of the board is read on every page load but only changes when someone
+saves a better result, so it is cached in-process and dropped on writes. The
+TTL bounds staleness when several worker processes share one database.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.data.models import Leaderboard, db
+
+TOP_N = 10
+MAX_PAGE_SIZE = 100
+
+_cache = {'entries': None, 'expires': 0.0}
+_cache_lock = threading.Lock()
+CACHE_TTL = 30.0
+
+
+def invalidate():
+    with _cache_lock:
+        _cache['entries'] = None
+
+
+def top(limit=TOP_N):
+    """Return the ``limit`` best entries (``limit <= TOP_N`` is cached)."""
+    if limit > TOP_N:
+        return page(limit=limit)['entries']
+    now = time.monotonic()
+    with _cache_lock:
+        if _cache['entries'] is not None and _cache['expires'] > now:
+            return _cache['entries'][:limit]
+    entries = [e.to_dict() for e in _ranked().limit(TOP_N).all()]
+    with _cache_lock:
+        _cache['entries'] = entries
+        _cache['expires'] = now + CACHE_TTL
+    return entries[:limit]
+
+
+def page(after=None, limit=TOP_N):
+    """Keyset page of the ranking, starting after the ``after`` cursor."""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = _ranked()
+    if after:
+        peak, last_id = parse_cursor(after)
+        query = query.filter(db.or_(
+            Leaderboard.peak_balance < peak,
+            db.and_(Leaderboard.peak_balance == peak, Leaderboard.id < last_id),
+        ))
+    rows = query.limit(limit + 1).all()
+    entries = [e.to_dict() for e in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last.peak_balance}:{last.id}"
+    return {'entries': entries, 'next': next_cursor}
+
+
+def parse_cursor(cursor):
+    try:
+        peak, last_id = cursor.split(':', 1)
+        return int(peak), int(last_id)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid leaderboard cursor: {cursor!r}")
+
+
+def submit(player_name, peak_balance, **fields):
+    """Upsert ``player_name``'s row, keeping only their best ``peak_balance``.
+
+    Returns ``True`` when the stored result changed.
+    """
+    for attempt in range(2):
+        entry = Leaderboard.query.filter_by(player_name=player_name).first()
+        if entry is not None and entry.peak_balance >= peak_balance:
+            return False
+        if entry is None:
+            entry = Leaderboard(player_name=player_name)
+            db.session.add(entry)
+        entry.peak_balance = peak_balance
+        for name, value in fields.items():
+            setattr(entry, name, value)
+        entry.achieved_at = datetime.utcnow()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request inserted the same player first; retry as update.
+            db.session.rollback()
+            if attempt:
+                raise
+            continue
+        invalidate()
+        return True
+    return False
+
+
+def _ranked():
+    return Leaderboard.query.order_by(Leaderboard.peak_balance.desc(), Leaderboard.id.desc())
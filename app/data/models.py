@@ -11,18 +11,127 @@ class PlayerModel(db.Model):
     balance = db.Column(db.Integer, default=1000)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+def bulk_update_balances(rows):
+    """Write ``[(player_id, balance), ...]`` in a single transaction.
+
+    A Core executemany rather than an ORM bulk update: ids of players that
+    no longer exist match no row and are skipped instead of failing the
+    whole batch.
+    """
+    table = PlayerModel.__table__
+    try:
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('pid')).values(balance=db.bindparam('bal')),
+            [{'pid': player_id, 'bal': balance} for player_id, balance in rows],
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
 class GameSession(db.Model):
+    """Pre-aggregated round outcomes per (player, difficulty).
+
+    Kept up to date by ``record_rounds`` so stats queries never scan
+    ``RoundHistory``.
+    """
     __tablename__ = 'game_sessions'
+    __table_args__ = (db.UniqueConstraint('player_id', 'difficulty', name='uq_game_sessions_player_difficulty'),)
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    difficulty = db.Column(db.String(10), nullable=False, default='HARD', index=True)
     rounds_played = db.Column(db.Integer, default=0)
     wins = db.Column(db.Integer, default=0)
     losses = db.Column(db.Integer, default=0)
     draws = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class RoundHistory(db.Model):
+    __tablename__ = 'round_history'
+    __table_args__ = (db.Index('ix_round_history_player_played', 'player_id', 'played_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    difficulty = db.Column(db.String(10), nullable=False)
+    outcome = db.Column(db.String(10), nullable=False)  # win | loss | draw | withdrawn
+    bet = db.Column(db.Integer, nullable=False, default=0)
+    payout = db.Column(db.Integer, nullable=False, default=0)
+    balance_after = db.Column(db.Integer)
+    played_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+_OUTCOME_COLUMNS = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}
+
+def record_rounds(rows):
+    """Bulk-insert round history and upsert the per-difficulty aggregates.
+
+    ``rows`` are dicts with the ``RoundHistory`` columns; everything is written
+    in a single transaction.
+    """
+    if not rows:
+        return
+    totals = {}
+    for row in rows:
+        key = (row['player_id'], row['difficulty'])
+        agg = totals.setdefault(key, {'rounds_played': 0, 'wins': 0, 'losses': 0, 'draws': 0})
+        agg['rounds_played'] += 1
+        column = _OUTCOME_COLUMNS.get(row['outcome'])
+        if column:
+            agg[column] += 1
+    try:
+        db.session.execute(db.insert(RoundHistory), rows)
+        existing = {
+            (gs.player_id, gs.difficulty): gs
+            for gs in GameSession.query.filter(
+                GameSession.player_id.in_({player_id for player_id, _ in totals}))
+        }
+        for (player_id, difficulty), agg in totals.items():
+            gs = existing.get((player_id, difficulty))
+            if gs is None:
+                db.session.add(GameSession(player_id=player_id, difficulty=difficulty, **agg))
+            else:
+                for column, delta in agg.items():
+                    setattr(gs, column, (getattr(gs, column) or 0) + delta)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def upgrade_schema():
+    """Adapt tables created by older versions before ``db.create_all``.
+
+    ``game_sessions`` predates its ``difficulty`` column; nothing ever wrote to
+    it back then, so the old table is simply recreated. ``leaderboard`` used
+    to append a row per save: duplicates are collapsed to each player's best
+    row before its indexes are created.
+    """
+    inspector = db.inspect(db.engine)
+    if inspector.has_table('game_sessions'):
+        columns = {c['name'] for c in inspector.get_columns('game_sessions')}
+        if 'difficulty' not in columns:
+            GameSession.__table__.drop(db.engine)
+
+    if inspector.has_table('leaderboard'):
+        existing = {ix['name'] for ix in inspector.get_indexes('leaderboard')}
+        if 'uq_leaderboard_player_name' not in existing:
+            db.session.execute(db.text(
+                'DELETE FROM leaderboard WHERE EXISTS ('
+                ' SELECT 1 FROM leaderboard best'
+                ' WHERE best.player_name = leaderboard.player_name'
+                ' AND (best.peak_balance > leaderboard.peak_balance'
+                '      OR (best.peak_balance = leaderboard.peak_balance AND best.id < leaderboard.id)))'
+            ))
+            db.session.commit()
+        for index in Leaderboard.__table__.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+
 class Leaderboard(db.Model):
+    """Hall of fame: one row per player holding their best result."""
     __tablename__ = 'leaderboard'
+    __table_args__ = (
+        db.Index('uq_leaderboard_player_name', 'player_name', unique=True),
+        # Serves ORDER BY peak_balance DESC, id DESC and its keyset predicate.
+        db.Index('ix_leaderboard_rank', 'peak_balance', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     player_name = db.Column(db.String(50), nullable=False)
     peak_balance = db.Column(db.Integer, nullable=False)
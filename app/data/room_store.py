@@ -0,0 +1,304 @@
+"""Shared multiplayer room state for running several worker processes on one host.
+
+With one process every room lives in ``game_manager``. With several, a room's
+players may be connected to different workers (Socket.IO fan-out between
+them goes through ``SOCKETIO_MESSAGE_QUEUE``), so the authoritative copy of
+each room lives here, in an SQLite file all workers on the host open:
+
+  * ``version`` is bumped on every ``save``, which only succeeds when the
+    caller still holds the version it loaded (compare-and-swap). A worker
+    whose copy is stale reloads it instead of overwriting a newer state.
+  * ``seats`` counts members across workers, so ``max_seats`` holds globally.
+  * ``owner`` is the worker that created the room. Rooms are not pinned to
+    it: any worker serves any room's players. The owner is the one worker
+    that feeds the room's spectators (``fed_rooms``), whichever worker they
+    are connected to. Workers heartbeat into ``workers``, and another worker
+    can ``claim`` a room whose owner has stopped doing so.
+  * ``spectators`` counts each worker's spectators per room, and
+    ``spectator_feed`` keeps the last state the owner sent them, which is the
+    baseline a new spectator on any worker starts from.
+
+Workers keep their own cached ``Room`` and only read the ``version`` column
+before acting, so a room whose players share a worker never reloads.
+
+Every call touches SQLite (and most pickle a game), so under eventlet the
+store is built with ``offload=eventlet.tpool.execute``: the calls run in
+native threads while the calling greenlet yields.
+"""
+
+import functools
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _offloaded(method):
+    """Run the method through ``self._offload`` (off the event loop)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._offload(method, self, *args, **kwargs)
+    return wrapper
+
+
+class RoomStore:
+    def __init__(self, path='rooms.db', worker_id=None, owner_ttl=30, offload=None):
+        self.path = path
+        self.worker_id = worker_id or worker_name()
+        self.owner_ttl = owner_ttl
+        # ``offload(func, *args, **kwargs)`` runs ``func`` off the event loop (default: inline).
+        self._offload = offload or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        self._lock = threading.Lock()
+        self._last_heartbeat = 0.0
+        # Autocommit; multi-statement changes open their own transaction.
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rooms ('
+            ' room_id TEXT PRIMARY KEY,'
+            ' owner TEXT NOT NULL,'
+            ' version INTEGER NOT NULL,'
+            ' seats INTEGER NOT NULL,'
+            ' state BLOB NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            ' worker_id TEXT PRIMARY KEY,'
+            ' seen_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS spectators ('
+            ' room_id TEXT NOT NULL,'
+            ' worker_id TEXT NOT NULL,'
+            ' watchers INTEGER NOT NULL,'
+            ' PRIMARY KEY (room_id, worker_id))'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS spectator_feed ('
+            ' room_id TEXT PRIMARY KEY,'
+            ' state BLOB NOT NULL)'
+        )
+        self.stats = {'creates': 0, 'loads': 0, 'saves': 0, 'conflicts': 0,
+                      'claims': 0, 'expired': 0}
+        self._heartbeat()
+
+    # -- rooms ------------------------------------------------------------
+    @_offloaded
+    def create(self, room_id, game):
+        """Insert a new room owned by this worker; ``False`` if the id is taken."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO rooms (room_id, owner, version, seats, state, updated_at)'
+                ' VALUES (?, ?, 0, 0, ?, ?)',
+                (room_id, self.worker_id, pickle.dumps(game, pickle.HIGHEST_PROTOCOL), time.time()))
+        if cursor.rowcount != 1:
+            return False
+        self.stats['creates'] += 1
+        return True
+
+    @_offloaded
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM rooms').fetchone()[0]
+
+    @_offloaded
+    def version(self, room_id):
+        """Current version of ``room_id``, or ``None`` if it no longer exists."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT version FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        return row[0] if row else None
+
+    @_offloaded
+    def load(self, room_id):
+        """Return ``(version, game)`` or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT version, state FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        if row is None:
+            return None
+        self.stats['loads'] += 1
+        return row[0], pickle.loads(row[1])
+
+    @_offloaded
+    def save(self, room_id, game, expected_version):
+        """Write ``game`` if the room is still at ``expected_version``.
+
+        Returns the new version, or ``None`` when another worker saved first
+        (or the room is gone); the caller should reload and retry.
+        """
+        state = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE rooms SET state = ?, version = version + 1, updated_at = ?'
+                ' WHERE room_id = ? AND version = ?',
+                (state, time.time(), room_id, expected_version))
+        if cursor.rowcount != 1:
+            self.stats['conflicts'] += 1
+            return None
+        self.stats['saves'] += 1
+        self._maybe_heartbeat()
+        return expected_version + 1
+
+    @_offloaded
+    def reserve_seat(self, room_id, max_seats):
+        """Take one of the room's ``max_seats`` seats; ``False`` if full or gone."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE rooms SET seats = seats + 1, updated_at = ?'
+                ' WHERE room_id = ? AND seats < ?',
+                (time.time(), room_id, max_seats))
+        return cursor.rowcount == 1
+
+    @_offloaded
+    def release_seat(self, room_id):
+        """Give a seat back; the room is deleted with its last seat. Returns seats left."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'UPDATE rooms SET seats = seats - 1 WHERE room_id = ? AND seats > 0',
+                    (room_id,))
+                row = self._conn.execute(
+                    'SELECT seats FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+                if row is not None and row[0] == 0:
+                    self._conn.execute('DELETE FROM rooms WHERE room_id = ?', (room_id,))
+                    self._delete_spectating((room_id,))
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+        return row[0] if row else 0
+
+    @_offloaded
+    def expire(self, ttl):
+        """Delete rooms not written for ``ttl`` seconds; returns their ids."""
+        cutoff = time.time() - ttl
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                room_ids = [row[0] for row in self._conn.execute(
+                    'SELECT room_id FROM rooms WHERE updated_at < ?', (cutoff,))]
+                self._conn.execute('DELETE FROM rooms WHERE updated_at < ?', (cutoff,))
+                self._delete_spectating(room_ids)
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+        self.stats['expired'] += len(room_ids)
+        return room_ids
+
+    def _delete_spectating(self, room_ids):
+        for table in ('spectators', 'spectator_feed'):
+            self._conn.executemany(f'DELETE FROM {table} WHERE room_id = ?',
+                                   [(room_id,) for room_id in room_ids])
+
+    # -- spectators -------------------------------------------------------
+    @_offloaded
+    def set_spectators(self, room_id, watchers):
+        """Record how many spectators of ``room_id`` this worker serves."""
+        with self._lock:
+            if watchers:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO spectators (room_id, worker_id, watchers)'
+                    ' VALUES (?, ?, ?)', (room_id, self.worker_id, watchers))
+            else:
+                self._conn.execute(
+                    'DELETE FROM spectators WHERE room_id = ? AND worker_id = ?',
+                    (room_id, self.worker_id))
+
+    @_offloaded
+    def fed_rooms(self):
+        """Rooms this worker owns that have spectators on a live worker."""
+        self._maybe_heartbeat()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT r.room_id FROM rooms r'
+                ' JOIN spectators s ON s.room_id = r.room_id'
+                ' JOIN workers w ON w.worker_id = s.worker_id'
+                ' WHERE r.owner = ? AND s.watchers > 0 AND w.seen_at >= ?',
+                (self.worker_id, time.time() - self.owner_ttl)).fetchall()
+        return [row[0] for row in rows]
+
+    @_offloaded
+    def publish_feed(self, room_id, state):
+        """Keep ``state``, the last state the room's spectators were sent."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO spectator_feed (room_id, state) VALUES (?, ?)',
+                (room_id, pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+
+    @_offloaded
+    def feed(self, room_id):
+        """The last state sent to the room's spectators, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT state FROM spectator_feed WHERE room_id = ?', (room_id,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    # -- ownership --------------------------------------------------------
+    @_offloaded
+    def owner(self, room_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT owner FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        return row[0] if row else None
+
+    @_offloaded
+    def claim(self, room_id):
+        """Become the room's owner if its current owner stopped heartbeating."""
+        self._maybe_heartbeat()
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE rooms SET owner = ? WHERE room_id = ? AND owner != ? AND owner NOT IN'
+                ' (SELECT worker_id FROM workers WHERE seen_at >= ?)',
+                (self.worker_id, room_id, self.worker_id, time.time() - self.owner_ttl))
+        if cursor.rowcount == 1:
+            self.stats['claims'] += 1
+            return True
+        return False
+
+    @_offloaded
+    def heartbeat(self):
+        self._heartbeat()
+
+    def _heartbeat(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO workers (worker_id, seen_at) VALUES (?, ?)',
+                (self.worker_id, now))
+        self._last_heartbeat = now
+
+    def _maybe_heartbeat(self):
+        if time.time() - self._last_heartbeat > self.owner_ttl / 3:
+            self._heartbeat()
+
+    @_offloaded
+    def close(self):
+        """Stop heartbeating so other workers can claim this worker's rooms."""
+        with self._lock:
+            self._conn.execute('DELETE FROM workers WHERE worker_id = ?', (self.worker_id,))
+            self._conn.execute('DELETE FROM spectators WHERE worker_id = ?', (self.worker_id,))
+            self._conn.close()
+
+    @_offloaded
+    def metrics(self):
+        with self._lock:
+            rooms, seats = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(seats), 0) FROM rooms').fetchone()
+            owned = self._conn.execute(
+                'SELECT COUNT(*) FROM rooms WHERE owner = ?', (self.worker_id,)).fetchone()[0]
+            workers = self._conn.execute(
+                'SELECT COUNT(*) FROM workers WHERE seen_at >= ?',
+                (time.time() - self.owner_ttl,)).fetchone()[0]
+        return dict(self.stats, worker=self.worker_id, shared_rooms=rooms,
+                    shared_seats=seats, owned_rooms=owned, live_workers=workers)
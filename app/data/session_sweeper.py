@@ -0,0 +1,138 @@
+"""Background cleanup for the filesystem session directory.
+
+Flask-Session's filesystem backend writes one file per session and never
+removes abandoned ones. ``SessionSweeper`` periodically scans the directory
+from a daemon thread and deletes:
+
+  1. expired sessions — the cachelib header stores an absolute expiry time;
+     files without one expire ``max_age`` seconds after their last write;
+  2. the least recently written sessions, until the directory is back under
+     ``max_files`` and ``max_bytes``.
+
+Each file starts with a 4-byte expiry header followed by the pickled session.
+The cachelib bookkeeping file and in-flight temp files are never touched.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import time
+
+# cachelib keeps its item counter in a file named after the hash of this key
+# (md5 in cachelib itself, sha256 when created by Flask-Session >= 0.7).
+_COUNT_FILES = {hashlib.md5(b'__wz_cache_count').hexdigest(),
+                hashlib.sha256(b'__wz_cache_count').hexdigest()}
+_TMP_SUFFIX = '.__wz_cache'
+_HEADER = struct.Struct('I')
+
+
+class SessionSweeper:
+    def __init__(self, directory, max_age=24 * 3600, max_files=5000,
+                 max_bytes=50 * 1024 * 1024, interval=300):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'files': 0, 'bytes': 0, 'sweeps': 0, 'expired': 0,
+                      'evicted': 0, 'errors': 0, 'last_sweep': None, 'last_duration': 0.0}
+
+    def _scan(self):
+        entries = []
+        try:
+            iterator = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+        with iterator:
+            for entry in iterator:
+                if entry.name in _COUNT_FILES or entry.name.endswith(_TMP_SUFFIX):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    with open(entry.path, 'rb') as f:
+                        header = f.read(_HEADER.size)
+                except OSError:
+                    continue
+                expires = _HEADER.unpack(header)[0] if len(header) == _HEADER.size else 0
+                entries.append((entry.path, st.st_mtime, st.st_size, expires))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError:
+            self.stats['errors'] += 1
+            return False
+
+    def sweep(self, now=None):
+        """Run one pass and return the updated metrics."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        with self._lock:
+            live = []
+            expired = 0
+            for path, mtime, size, expires in self._scan():
+                stale = (expires and expires <= now) or (
+                    not expires and self.max_age and mtime + self.max_age <= now)
+                if stale:
+                    expired += self._remove(path)
+                else:
+                    live.append((mtime, size, path))
+
+            live.sort()  # oldest write first
+            total_bytes = sum(size for _, size, _ in live)
+            evicted = 0
+            idx = 0
+            while idx < len(live) and (
+                    (self.max_files and len(live) - idx > self.max_files)
+                    or (self.max_bytes and total_bytes > self.max_bytes)):
+                _, size, path = live[idx]
+                evicted += self._remove(path)
+                total_bytes -= size
+                idx += 1
+
+            self.stats.update(
+                files=len(live) - idx,
+                bytes=total_bytes,
+                sweeps=self.stats['sweeps'] + 1,
+                expired=self.stats['expired'] + expired,
+                evicted=self.stats['evicted'] + evicted,
+                last_sweep=now,
+                last_duration=round(time.perf_counter() - started, 4),
+            )
+            return dict(self.stats)
+
+    # -- lifecycle --------------------------------------------------------
+    def start(self):
+        """Start the background sweep thread (idempotent)."""
+        if self._thread is not None or not self.interval:
+            return
+        self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Session Sweep Error: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def metrics(self):
+        return dict(self.stats)
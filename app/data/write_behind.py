@@ -0,0 +1,120 @@
+"""Coalescing write-behind buffer for database writes off the request path.
+
+Request handlers ``record`` a value per key; repeated records for the same key
+are coalesced in memory (the newest value wins, or ``merge(old, new)`` when a
+merge function is given). A daemon thread hands the pending batch to ``sink``
+in one call when either
+
+  * ``interval`` seconds have passed, or
+  * someone called ``request_flush`` (e.g. at round end),
+
+but never more often than once every ``min_interval`` seconds, so the write
+rate is bounded no matter how fast actions arrive. ``close`` performs a final
+synchronous flush at shutdown. ``append`` queues values that must not be
+coalesced (e.g. history rows) under a private sequence key.
+
+If ``sink`` raises, the batch is put back (without overwriting newer values)
+and retried on the next pass, so the last value for every key is eventually
+written. ``pending`` keeps answering from a batch until its write has
+succeeded, so readers never fall back to a database value that is older.
+"""
+
+import itertools
+import threading
+
+
+class WriteBehindQueue:
+    def __init__(self, sink, interval=5.0, min_interval=1.0, merge=None, name='write-behind'):
+        self.sink = sink
+        self.interval = interval
+        self.min_interval = min_interval
+        self.merge = merge
+        self.name = name
+        self._pending = {}
+        self._inflight = {}  # the batch being written; still readable via ``pending``
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'recorded': 0, 'flushes': 0, 'written': 0, 'failures': 0}
+
+    def record(self, key, value):
+        with self._lock:
+            if self.merge is not None and key in self._pending:
+                value = self.merge(self._pending[key], value)
+            self._pending[key] = value
+            self.stats['recorded'] += 1
+
+    def append(self, value):
+        """Queue ``value`` without coalescing it with anything else."""
+        self.record(('__seq__', next(self._seq)), value)
+
+    def pending(self, key, default=None):
+        """Return the not-yet-written value for ``key`` (read-your-writes)."""
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self._inflight.get(key, default)
+
+    def request_flush(self):
+        """Ask the background thread to flush soon (non-blocking)."""
+        self._wake.set()
+
+    def flush(self):
+        """Write the pending batch through ``sink``. Returns the batch size."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                self.sink(list(batch.items()))
+            except Exception as e:
+                print(f"Write-Behind Flush Error ({self.name}): {e}")
+                with self._lock:
+                    self._inflight = {}
+                    for key, value in batch.items():
+                        if key not in self._pending:
+                            self._pending[key] = value
+                        elif self.merge is not None:
+                            self._pending[key] = self.merge(value, self._pending[key])
+                    self.stats['failures'] += 1
+                return 0
+            with self._lock:
+                self._inflight = {}
+                self.stats['flushes'] += 1
+                self.stats['written'] += len(batch)
+            return len(batch)
+
+    # -- lifecycle --------------------------------------------------------
+    def start(self):
+        """Start the background flush thread (idempotent)."""
+        if self._thread is not None or not self.interval:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.flush()
+            # Rate bound: at most one flush per ``min_interval``.
+            self._stop.wait(self.min_interval)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending))
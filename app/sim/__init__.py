@@ -0,0 +1 @@
+"""Offline and background simulations (autoplay runs, table engines, tournaments)."""
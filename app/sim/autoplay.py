@@ -0,0 +1,267 @@
+"""Server-side autoplay: play many rounds of ``BlackJackGame`` with one policy.
+
+Each policy maps ``(game, hand)`` to an action letter ('H', 'S', 'D', 'P'):
+
+  * ``easy``   -> the EASY tier rule (hit until 16).
+  * ``medium`` -> the MEDIUM tier comparison of exact hit/stand win rates
+                  for the remaining shoe (``ShoeEvaluator``).
+  * ``hard``   -> the HARD tier Q-table, played greedily (no exploration).
+  * ``basic``  -> full basic strategy including doubles and splits.
+
+``autoplay`` is a generator of plain-dict events: a ``progress`` event every
+``progress_every`` rounds and a final ``summary`` (EV per hand, win/loss/push
+counts, bankroll curve, rounds per second). ``AutoplayJobs`` runs it on a
+small worker pool so HTTP handlers only relay events, and the CLI prints the
+same events as NDJSON::
+
+    python -m app.sim.autoplay --policy basic --rounds 10000
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.ai.basic_strategy import basic_action
+from app.core.game import BlackJackGame
+
+SEAT_NAME = "Autoplay"
+CURVE_POINTS = 100
+
+
+def _upcard(game):
+    return game.dealer_hand.cards[1]
+
+
+def can_double(hand):
+    # Mirrors the guard in ``BlackJackGame.player_double_down``.
+    return len(hand.cards) == 2 and hand.balance >= hand.initial_bet
+
+
+def can_split(hand):
+    # Mirrors the guard in ``BlackJackGame.player_split``.
+    return (len(hand.cards) == 2 and hand.cards[0].rank == hand.cards[1].rank
+            and hand.balance >= hand.initial_bet)
+
+
+def easy_policy(game, hand):
+    return 'H' if hand.value < 16 else 'S'
+
+
+def medium_policy(game, hand):
+    from app.ai.factory import get_simulator
+    # Same evaluator and comparison as ``BlackJackGame.ai_turn``.
+    evaluator = get_simulator(num_simulations=50).evaluator(game.deck)
+    upcard_value = _upcard(game).value
+    prob_hit = evaluator.hit_win_rate(hand.cards, upcard_value)
+    prob_stand = evaluator.stand_win_rate(hand.value, upcard_value)
+    return 'H' if prob_hit > prob_stand else 'S'
+
+
+def hard_policy(game, hand):
+    from app.ai.factory import get_agent
+    agent = get_agent()
+    stand, hit = agent.get_q_values(agent.get_state(game, hand))
+    return 'H' if hit > stand else 'S'
+
+
+def basic_policy(game, hand):
+    return basic_action(hand.cards, _upcard(game).value,
+                        can_double=can_double(hand), can_split=can_split(hand))
+
+
+POLICIES = {
+    'easy': easy_policy,
+    'medium': medium_policy,
+    'hard': hard_policy,
+    'basic': basic_policy,
+}
+
+
+def play_round(game, policy, bet):
+    """Deal and settle one round for the single autoplay seat."""
+    game.start_new_round(num_ai=0, difficulty="HARD")
+    game.players[0].place_bet(bet)
+    game.confirm_bets()
+    while not game.game_over:
+        hand = game.players[game.current_player_idx]
+        action = policy(game, hand)
+        if action == 'D':
+            game.player_double_down()
+        elif action == 'P':
+            game.player_split()
+        elif action == 'H':
+            game.player_hit()
+        else:
+            game.player_stand()
+
+
+def autoplay(policy='basic', rounds=1000, bet=10, bankroll=None, num_decks=6,
+             progress_every=None, stop=None):
+    """Play ``rounds`` rounds and yield progress events, then a summary.
+
+    ``bankroll`` defaults to an amount the seat cannot lose, so the figures
+    measure the policy rather than the risk of ruin; a smaller one ends the run
+    early once the seat cannot cover ``bet``. Setting the ``stop`` event ends
+    it after the current round.
+    """
+    choose = POLICIES[policy]
+    if bankroll is None:
+        bankroll = bet * rounds * 8
+    if progress_every is None:
+        progress_every = max(1, rounds // 20)
+    curve_every = max(1, rounds // CURVE_POINTS)
+
+    game = BlackJackGame(num_decks=num_decks, track_accuracy=False)
+    seat = game.add_player(SEAT_NAME, balance=bankroll)
+
+    outcomes = {'win': 0, 'loss': 0, 'draw': 0}
+    hands = played = 0
+    total = total_sq = 0.0
+    curve = [bankroll]
+    started = time.perf_counter()
+
+    def snapshot(kind):
+        elapsed = time.perf_counter() - started
+        mean = total / played if played else 0.0
+        variance = (total_sq / played - mean * mean) if played else 0.0
+        return {
+            'type': kind,
+            'policy': policy,
+            'rounds': played,
+            'hands': hands,
+            'wins': outcomes['win'],
+            'losses': outcomes['loss'],
+            'pushes': outcomes['draw'],
+            'ev_per_hand': mean,
+            'ev_stderr': math.sqrt(max(variance, 0.0) / played) if played else 0.0,
+            'bankroll': seat.balance,
+            'elapsed': elapsed,
+            'rounds_per_second': played / elapsed if elapsed > 0 else 0.0,
+        }
+
+    while played < rounds and seat.balance >= bet:
+        if stop is not None and stop.is_set():
+            break
+        before = seat.balance
+        play_round(game, choose, bet)
+        net = (seat.balance - before) / bet
+        total += net
+        total_sq += net * net
+        played += 1
+        for result in game.round_results:
+            hands += 1
+            outcomes[result['outcome']] = outcomes.get(result['outcome'], 0) + 1
+        if played % curve_every == 0:
+            curve.append(seat.balance)
+        if played % progress_every == 0 and played < rounds:
+            yield snapshot('progress')
+
+    summary = snapshot('summary')
+    summary['bankroll_curve'] = curve
+    summary['ruined'] = played < rounds and seat.balance < bet
+    yield summary
+
+
+class AutoplayRun:
+    """One submitted run: its event queue and a flag to stop it early."""
+
+    def __init__(self, max_events):
+        # Bounded, so a slow or vanished reader pauses the run instead of
+        # letting events pile up in memory.
+        self.events = queue.Queue(maxsize=max_events)
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the run (e.g. the client went away); safe to call repeatedly."""
+        self.cancelled.set()
+
+
+class AutoplayJobs:
+    """Bounded pool of autoplay runs whose events are read from a queue."""
+
+    def __init__(self, max_jobs=2, max_events=64):
+        self.max_jobs = max_jobs
+        self.max_events = max_events
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='autoplay')
+        self._slots = threading.Semaphore(max_jobs)
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'finished': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0,
+                      'running': 0}
+
+    def submit(self, **params):
+        """Start a run; returns an ``AutoplayRun`` whose events end with ``None``.
+
+        Returns ``None`` when every slot is busy.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return None
+        run = AutoplayRun(self.max_events)
+        with self._lock:
+            self.stats['started'] += 1
+            self.stats['running'] += 1
+        self._executor.submit(self._run, run, params)
+        return run
+
+    def _put(self, run, event):
+        """Block while the queue is full; False once the run is cancelled."""
+        while not run.cancelled.is_set():
+            try:
+                run.events.put(event, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, run, params):
+        outcome = 'finished'
+        try:
+            for event in autoplay(stop=run.cancelled, **params):
+                if not self._put(run, event):
+                    break
+        except Exception as e:
+            print(f"Autoplay error: {e}")
+            self._put(run, {'type': 'error', 'error': str(e)})
+            outcome = 'failed'
+        finally:
+            if run.cancelled.is_set():
+                outcome = 'cancelled'
+            else:
+                self._put(run, None)
+            with self._lock:
+                self.stats[outcome] += 1
+                self.stats['running'] -= 1
+            self._slots.release()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, max_jobs=self.max_jobs, max_events=self.max_events)
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Autoplay BlackJack rounds and print NDJSON results.")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='basic')
+    parser.add_argument('--rounds', type=int, default=10000)
+    parser.add_argument('--bet', type=int, default=10)
+    parser.add_argument('--bankroll', type=int, default=None)
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--progress', type=int, default=None, help="rounds between progress lines")
+    args = parser.parse_args(argv)
+
+    for event in autoplay(policy=args.policy, rounds=args.rounds, bet=args.bet,
+                          bankroll=args.bankroll, num_decks=args.decks,
+                          progress_every=args.progress):
+        print(json.dumps(event), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,525 @@
+"""High-throughput table simulator for house-edge and risk-of-ruin studies.
+
+``BlackJackGame`` carries everything the web client needs (card objects, a
+message log, decision history, versioning). This engine plays the same rules
+with compact state instead: the shoe is a list of rank indices (0..12, ace
+last, as in ``app.core.cards.RANKS``) and a hand is a running hard total plus
+an ace count. Rules mirrored from the game:
+
+  * the shoe is rebuilt before a round when fewer than 20 cards remain (and
+    mid-round if it runs dry); the dealer's up-card is their second card,
+  * no dealer peek; the dealer draws to 17 and stands on soft 17,
+  * a win pays ``int(bet * 2.5)`` back for a two-card 21 on a hand not
+    created by a split, ``bet * 2`` otherwise; a push returns the bet,
+  * double and split need two cards and ``balance >= initial_bet``; splits
+    need identical ranks and may be repeated,
+  * insurance costs ``initial_bet // 2`` and returns ``(initial_bet // 2) * 3``
+    against a dealer blackjack.
+
+Policies are callables ``policy(hand, upcard, table) -> 'H' | 'S' | 'D' | 'P'``
+and bet rules are callables ``bet(balance, table) -> amount``. Results are
+accumulated in mergeable ``RunningStats`` so chunks played in separate
+processes combine exactly::
+
+    python -m app.sim.engine --rounds 1000000 --workers 4 --bet ai
+"""
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.ai.basic_strategy import basic_decision
+from app.ai.betting import make_ramp
+from app.ai.counter import SYSTEMS
+from app.core.cards import RANKS, VALUES
+
+RANK_VALUES = tuple(VALUES[rank] for rank in RANKS)
+ACE = RANKS.index('A')
+HI_LO = SYSTEMS['hi_lo']
+RESHUFFLE_AT = 20  # ``BlackJackGame.confirm_bets`` rebuilds the shoe below this
+DEALER_STANDS = 17
+Z_95 = 1.959964
+
+
+class SimHand:
+    __slots__ = ('ranks', 'hard', 'aces', 'bet', 'initial_bet', 'is_split', 'doubled', 'insured', 'seat')
+
+    def __init__(self, seat, bet, is_split=False):
+        self.ranks = []
+        self.hard = 0  # aces counted as 1
+        self.aces = 0
+        self.bet = bet
+        self.initial_bet = bet
+        self.is_split = is_split
+        self.doubled = False
+        self.insured = False
+        self.seat = seat
+
+    def add(self, rank):
+        self.ranks.append(rank)
+        if rank == ACE:
+            self.aces += 1
+            self.hard += 1
+        else:
+            self.hard += RANK_VALUES[rank]
+
+    @property
+    def value(self):
+        # Same result as ``calculate_hand_value``: at most one ace counts 11.
+        if self.aces and self.hard + 10 <= 21:
+            return self.hard + 10
+        return self.hard
+
+    @property
+    def soft(self):
+        return bool(self.aces) and self.hard + 10 <= 21
+
+    @property
+    def pair_value(self):
+        ranks = self.ranks
+        if len(ranks) == 2 and ranks[0] == ranks[1]:
+            return RANK_VALUES[ranks[0]]
+        return None
+
+    @property
+    def can_double(self):
+        return len(self.ranks) == 2 and self.seat.balance >= self.initial_bet
+
+    @property
+    def can_split(self):
+        return self.pair_value is not None and self.seat.balance >= self.initial_bet
+
+
+class Seat:
+    """One player: a policy, a bet rule and a balance shared by split hands."""
+    __slots__ = ('policy', 'bet_rule', 'balance', 'insurance', 'ruined')
+
+    def __init__(self, policy, bet_rule, balance=1000, insurance=False):
+        self.policy = policy
+        self.bet_rule = bet_rule
+        self.balance = balance
+        self.insurance = insurance
+        self.ruined = False
+
+
+# -- policies -----------------------------------------------------------------
+
+def basic_policy(hand, upcard, table):
+    return basic_decision(hand.value, hand.soft, hand.pair_value, upcard,
+                          hand.can_double, hand.can_split)
+
+
+def easy_policy(hand, upcard, table):
+    return 'H' if hand.value < 16 else 'S'
+
+
+class QTablePolicy:
+    """Greedy play of a saved Q-table, keyed like ``QLearningAgent.get_state``."""
+
+    def __init__(self, model_path='q_table.json'):
+        from app.ai.qlearning import QLearningAgent
+        self.q_table = QLearningAgent(model_path=model_path).q_table
+
+    def __call__(self, hand, upcard, table):
+        count = table.running_count
+        bucket = -1 if count <= -2 else (1 if count >= 2 else 0)
+        stand, hit = self.q_table.get((hand.value, upcard, bucket), (0.0, 0.0))
+        return 'H' if hit > stand else 'S'
+
+
+def make_policy(name, model_path='q_table.json'):
+    if name == 'basic':
+        return basic_policy
+    if name == 'easy':
+        return easy_policy
+    if name == 'hard':
+        return QTablePolicy(model_path)
+    raise ValueError(f"Unknown policy: {name!r}")
+
+
+# -- bet rules ----------------------------------------------------------------
+
+class FlatBet:
+    __slots__ = ('amount',)
+
+    def __init__(self, amount=10):
+        self.amount = amount
+
+    def __call__(self, balance, table):
+        return self.amount
+
+
+class FractionBet:
+    """Bet a fraction of the balance; the defaults are the AI seats' rule."""
+    __slots__ = ('fraction', 'minimum')
+
+    def __init__(self, fraction=0.1, minimum=10):
+        self.fraction = fraction
+        self.minimum = minimum
+
+    def __call__(self, balance, table):
+        return max(self.minimum, int(balance * self.fraction))
+
+
+class RampBet:
+    """A count-driven ramp from ``app.ai.betting``, fed the table's Hi-Lo true count."""
+    __slots__ = ('ramp',)
+
+    def __init__(self, ramp):
+        self.ramp = ramp
+
+    def __call__(self, balance, table):
+        return self.ramp(balance, table.running_count / max(table.decks_remaining, 0.5))
+
+
+def make_bet_rule(spec):
+    """Parse ``"flat:10"``, ``"fraction:0.05"``, ``"ai"`` (10% of balance, min 10),
+    or a count ramp ``"spread:8"`` / ``"kelly:0.5"``."""
+    name, _, arg = str(spec).partition(':')
+    if name == 'flat':
+        return FlatBet(int(arg or 10))
+    if name == 'fraction':
+        return FractionBet(float(arg or 0.1))
+    if name == 'ai':
+        return FractionBet(0.1, 10)
+    if name in ('spread', 'kelly'):
+        return RampBet(make_ramp(spec))
+    raise ValueError(f"Unknown bet rule: {spec!r}")
+
+
+# -- statistics ---------------------------------------------------------------
+
+class RunningStats:
+    """Welford mean/variance that merges across chunks (Chan et al.)."""
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        if not other.n:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def interval(self, z=Z_95):
+        half = z * self.std / math.sqrt(self.n) if self.n else 0.0
+        return (self.mean - half, self.mean + half)
+
+    def __reduce__(self):
+        return (RunningStats, (self.n, self.mean, self.m2))
+
+
+def wilson_interval(hits, n, z=Z_95):
+    if not n:
+        return (0.0, 0.0)
+    p = hits / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+
+# -- table --------------------------------------------------------------------
+
+class Table:
+    def __init__(self, seats, num_decks=6, rng=None):
+        self.seats = seats
+        self.num_decks = num_decks
+        self.rng = rng or random.Random()
+        self.shoe = []
+        self.running_count = 0
+        self.per_round = RunningStats()  # net result per seat-round, in initial bets
+        self.counts = {
+            'rounds': 0, 'hands': 0, 'wins': 0, 'losses': 0, 'pushes': 0,
+            'blackjacks': 0, 'doubles': 0, 'splits': 0, 'insurance': 0,
+            'wagered': 0, 'net': 0, 'shuffles': 0,
+        }
+        self._new_shoe()
+
+    @property
+    def decks_remaining(self):
+        return len(self.shoe) / 52
+
+    def _new_shoe(self):
+        shoe = list(range(13)) * (4 * self.num_decks)
+        self.rng.shuffle(shoe)
+        self.shoe = shoe
+        self.running_count = 0
+        self.counts['shuffles'] += 1
+
+    def _draw(self, hand):
+        if not self.shoe:
+            self._new_shoe()
+        rank = self.shoe.pop()
+        self.running_count += HI_LO[rank]
+        hand.add(rank)
+
+    def play_round(self):
+        counts = self.counts
+        if len(self.shoe) < RESHUFFLE_AT:
+            self._new_shoe()
+
+        hands, starting = [], []
+        for seat in self.seats:
+            if seat.ruined:
+                continue
+            bet = min(seat.bet_rule(seat.balance, self), seat.balance)
+            if bet <= 0:
+                seat.ruined = True
+                continue
+            seat.balance -= bet
+            starting.append((seat, seat.balance + bet, bet))
+            hands.append(SimHand(seat, bet))
+        if not hands:
+            return False
+
+        dealer = SimHand(None, 0)
+        for _ in range(2):
+            for hand in hands:
+                self._draw(hand)
+            self._draw(dealer)
+        upcard = RANK_VALUES[dealer.ranks[1]]
+
+        if dealer.ranks[1] == ACE:
+            for hand in hands:
+                seat = hand.seat
+                cost = hand.initial_bet // 2
+                if seat.insurance and seat.balance >= cost:
+                    seat.balance -= cost
+                    hand.insured = True
+                    counts['insurance'] += 1
+
+        i = 0
+        while i < len(hands):
+            hand = hands[i]
+            seat = hand.seat
+            while hand.value <= 21:
+                action = seat.policy(hand, upcard, self)
+                if action == 'H':
+                    self._draw(hand)
+                elif action == 'D' and hand.can_double:
+                    seat.balance -= hand.initial_bet
+                    hand.bet += hand.initial_bet
+                    hand.doubled = True
+                    counts['doubles'] += 1
+                    self._draw(hand)
+                    break
+                elif action == 'P' and hand.can_split:
+                    seat.balance -= hand.initial_bet
+                    counts['splits'] += 1
+                    rank = hand.ranks.pop()
+                    hand.hard -= 1 if rank == ACE else RANK_VALUES[rank]
+                    hand.aces -= rank == ACE
+                    new_hand = SimHand(seat, hand.initial_bet, is_split=True)
+                    new_hand.add(rank)
+                    self._draw(hand)
+                    self._draw(new_hand)
+                    hands.insert(i + 1, new_hand)
+                else:
+                    break
+            i += 1
+
+        while dealer.value < DEALER_STANDS:
+            self._draw(dealer)
+
+        dealer_value = dealer.value
+        dealer_bj = dealer_value == 21 and len(dealer.ranks) == 2
+        for hand in hands:
+            seat = hand.seat
+            counts['hands'] += 1
+            if hand.insured and dealer_bj:
+                seat.balance += (hand.initial_bet // 2) * 3
+            value = hand.value
+            if value > 21 or (dealer_value <= 21 and dealer_value > value):
+                counts['losses'] += 1
+            elif dealer_value > 21 or value > dealer_value:
+                natural = value == 21 and len(hand.ranks) == 2 and not hand.is_split
+                seat.balance += int(hand.bet * (2.5 if natural else 2.0))
+                counts['wins'] += 1
+                counts['blackjacks'] += natural
+            else:
+                seat.balance += hand.bet
+                counts['pushes'] += 1
+
+        counts['rounds'] += 1
+        for seat, before, bet in starting:
+            net = seat.balance - before
+            counts['wagered'] += bet
+            counts['net'] += net
+            self.per_round.add(net / bet)
+        return True
+
+    def run(self, rounds):
+        for _ in range(rounds):
+            if not self.play_round():
+                break
+        return self
+
+
+# -- drivers ------------------------------------------------------------------
+
+def build_table(spec, seed=None):
+    """Build a table from a picklable spec (see ``simulate`` for the keys)."""
+    policy = make_policy(spec.get('policy', 'basic'), spec.get('model_path', 'q_table.json'))
+    seats = [
+        Seat(policy, make_bet_rule(spec.get('bet', 'flat:10')),
+             balance=spec.get('bankroll') or 10 ** 15,
+             insurance=spec.get('insurance', False))
+        for _ in range(spec.get('seats', 1))
+    ]
+    return Table(seats, num_decks=spec.get('num_decks', 6), rng=random.Random(seed))
+
+
+def _run_chunk(spec, rounds, seed):
+    table = build_table(spec, seed).run(rounds)
+    return table.counts, table.per_round
+
+
+def _ruin_chunk(spec, trials, rounds, seed):
+    rng = random.Random(seed)
+    ruined, finals, ruin_rounds = 0, [], []
+    for _ in range(trials):
+        table = build_table(spec, rng.getrandbits(64))
+        seat = table.seats[0]
+        minimum = seat.bet_rule(spec['bankroll'], table)
+        for n in range(1, rounds + 1):
+            table.play_round()
+            if seat.balance < min(minimum, seat.bet_rule(seat.balance, table)):
+                seat.ruined = True
+                break
+        if seat.ruined:
+            ruined += 1
+            ruin_rounds.append(n)
+        finals.append(seat.balance)
+    return ruined, finals, ruin_rounds
+
+
+def _split(total, parts):
+    base, extra = divmod(total, parts)
+    return [base + (i < extra) for i in range(parts) if base + (i < extra)]
+
+
+def _map(func, jobs, workers):
+    if workers <= 1:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *zip(*jobs)))
+
+
+def simulate(rounds, policy='basic', bet='flat:10', seats=1, num_decks=6, insurance=False,
+             bankroll=None, workers=1, seed=None, model_path='q_table.json'):
+    """Play ``rounds`` rounds (split over ``workers`` processes) and summarise.
+
+    ``edge`` is the player's net result per initial bet; with the default
+    unlimited ``bankroll`` no seat can go broke, so it is the house edge of
+    ``policy`` under this game's rules (negative means the house wins).
+    """
+    spec = {'policy': policy, 'bet': bet, 'seats': seats, 'num_decks': num_decks,
+            'insurance': insurance, 'bankroll': bankroll, 'model_path': model_path}
+    rng = random.Random(seed)
+    chunks = _split(rounds, max(1, workers))
+    started = time.perf_counter()
+    results = _map(_run_chunk, [(spec, n, rng.getrandbits(64)) for n in chunks], workers)
+    elapsed = time.perf_counter() - started
+
+    counts, per_round = {}, RunningStats()
+    for chunk_counts, chunk_stats in results:
+        for key, value in chunk_counts.items():
+            counts[key] = counts.get(key, 0) + value
+        per_round.merge(chunk_stats)
+
+    low, high = per_round.interval()
+    return {
+        **counts,
+        'policy': policy,
+        'bet': bet,
+        'edge': per_round.mean,
+        'edge_ci95': [low, high],
+        'std_per_round': per_round.std,
+        'workers': workers,
+        'elapsed': elapsed,
+        'rounds_per_second': counts.get('rounds', 0) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def risk_of_ruin(bankroll, rounds, trials=1000, policy='basic', bet='flat:10', num_decks=6,
+                 insurance=False, workers=1, seed=None, model_path='q_table.json'):
+    """Fraction of ``trials`` sessions that go broke within ``rounds`` rounds.
+
+    A session is ruined once the balance cannot cover the bet rule's stake.
+    """
+    spec = {'policy': policy, 'bet': bet, 'seats': 1, 'num_decks': num_decks,
+            'insurance': insurance, 'bankroll': bankroll, 'model_path': model_path}
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    chunks = _split(trials, max(1, workers))
+    results = _map(_ruin_chunk, [(spec, n, rounds, rng.getrandbits(64)) for n in chunks], workers)
+
+    ruined, finals, ruin_rounds = 0, [], []
+    for chunk_ruined, chunk_finals, chunk_rounds in results:
+        ruined += chunk_ruined
+        finals.extend(chunk_finals)
+        ruin_rounds.extend(chunk_rounds)
+    finals.sort()
+    ruin_rounds.sort()
+    return {
+        'trials': trials,
+        'rounds': rounds,
+        'bankroll': bankroll,
+        'ruined': ruined,
+        'risk_of_ruin': ruined / trials if trials else 0.0,
+        'risk_ci95': list(wilson_interval(ruined, trials)),
+        'median_final_bankroll': finals[len(finals) // 2] if finals else bankroll,
+        'median_rounds_to_ruin': ruin_rounds[len(ruin_rounds) // 2] if ruin_rounds else None,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Simulate BlackJack tables at high volume.")
+    parser.add_argument('--rounds', type=int, default=100000)
+    parser.add_argument('--policy', choices=('basic', 'easy', 'hard'), default='basic')
+    parser.add_argument('--bet', default='flat:10', help="flat:N, fraction:F, ai, spread:U or kelly:F")
+    parser.add_argument('--seats', type=int, default=1)
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--insurance', action='store_true')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--ruin-bankroll', type=int, default=None,
+                        help="estimate risk of ruin for this bankroll instead")
+    parser.add_argument('--trials', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.ruin_bankroll:
+        result = risk_of_ruin(args.ruin_bankroll, args.rounds, trials=args.trials, policy=args.policy,
+                              bet=args.bet, num_decks=args.decks, insurance=args.insurance,
+                              workers=args.workers, seed=args.seed)
+    else:
+        result = simulate(args.rounds, policy=args.policy, bet=args.bet, seats=args.seats,
+                          num_decks=args.decks, insurance=args.insurance,
+                          workers=args.workers, seed=args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""AI-only tournaments on real ``BlackJackGame`` tables.
+
+Entrants are AI tiers, optionally with their own Q-table, written as
+``EASY``, ``MEDIUM``, ``HARD`` or ``HARD@path/to/q_table.json``; HARD seats
+play their Q-table greedily (no exploration). Every table seats all entrants
+(rotating the seat order from table to table, since the first seat draws
+first) and plays ``rounds`` rounds through the normal game flow:
+``start_new_round`` places the AI bets (by default 10 % of the balance,
+minimum 10; ``bet_ramp`` picks another ramp from ``app.ai.betting``),
+``confirm_bets`` deals and plays every seat with one shared ``ShoeEvaluator``
+per round (the batched AI decisions) and settles the round. A seat that can
+no longer cover the minimum bet leaves the table.
+
+Tables are independent, so they are spread over a process pool in small
+batches that keep every worker busy; results are merged into ``Standings``
+as batches finish. Ranking is by ``edge`` (net result per unit wagered),
+because bets scale with each seat's bankroll. Each round is also checked
+for invariants (the round settles, every seat gets a result, no balance goes
+negative), so a long tournament doubles as a soak test of the game engine::
+
+    python -m app.sim.tournament --entrants EASY MEDIUM HARD --tables 500 --rounds 50
+    python -m app.sim.tournament --entrants HARD@q_table.json HARD@q_new.json --workers 8
+    python -m app.sim.tournament --entrants HARD MEDIUM --bet-ramp kelly:0.5
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.ai.betting import make_ramp
+from app.ai.qlearning import DEFAULT_MODEL_PATH
+from app.core.game import BlackJackGame, Hand
+
+TIERS = ('EASY', 'MEDIUM', 'HARD')
+START_BALANCE = 1000
+MIN_BET = 10
+BATCHES_PER_WORKER = 4
+
+
+def parse_entrants(specs):
+    """Turn ``TIER[@q_table]`` specs into ``(name, difficulty, model_path)`` tuples.
+
+    Repeated specs get a ``#n`` suffix so every seat has its own name.
+    """
+    entrants, seen = [], {}
+    for spec in specs:
+        difficulty, _, model_path = spec.partition('@')
+        difficulty = difficulty.upper()
+        if difficulty not in TIERS:
+            raise ValueError(f"Unknown tier '{difficulty}' (expected one of {', '.join(TIERS)})")
+        if model_path and not os.path.exists(model_path):
+            raise ValueError(f"Q-table not found: {model_path}")
+        seen[spec] = seen.get(spec, 0) + 1
+        name = spec if seen[spec] == 1 else f"{spec}#{seen[spec]}"
+        entrants.append((name, difficulty, model_path or None))
+    return entrants
+
+
+def build_table(entrants, rotation=0, num_decks=6, balance=START_BALANCE, bet_ramp=None,
+                rng=None):
+    game = BlackJackGame(num_decks=num_decks, track_accuracy=False, rng=rng)
+    game.bet_ramp = bet_ramp
+    shift = rotation % len(entrants)
+    for name, difficulty, model_path in entrants[shift:] + entrants[:shift]:
+        game.players.append(Hand(name, balance=balance, is_ai=True, player_id=name))
+        if difficulty == 'HARD':
+            # An explicit path gets a greedy agent of its own (see ``get_agent``).
+            model_path = model_path or DEFAULT_MODEL_PATH
+        game.seat_policies[name] = (difficulty, model_path)
+    return game
+
+
+def _new_seat_result():
+    return {'hands': 0, 'wins': 0, 'losses': 0, 'pushes': 0, 'wagered': 0, 'net': 0,
+            'final_balance': START_BALANCE, 'busted_out': False}
+
+
+def play_table(entrants, rounds, table_index=0, num_decks=6, seed=None, bet_ramp=None):
+    """Play one table to completion and return its per-seat results.
+
+    ``seed`` seeds the table's own shoe RNG, so the table is reproducible
+    without touching the global ``random`` state.
+    """
+    game = build_table(entrants, rotation=table_index, num_decks=num_decks, bet_ramp=bet_ramp,
+                       rng=random.Random(seed))
+    seats = {name: _new_seat_result() for name, _, _ in entrants}
+    violations, error = 0, None
+    played = 0
+    started = time.perf_counter()
+    try:
+        while played < rounds:
+            game.players = [p for p in game.players if p.balance >= MIN_BET]
+            if not game.players:
+                break
+            before = {p.player_id: p.balance for p in game.players}
+            game.start_new_round(num_ai=0)
+            game.confirm_bets()
+            played += 1
+
+            if not game.game_over or len(game.round_results) != len(before):
+                violations += 1
+            for result in game.round_results:
+                seat = seats[result['owner']]
+                seat['hands'] += 1
+                seat['wagered'] += result['bet']
+                outcome = result['outcome']
+                seat['wins' if outcome == 'win' else 'losses' if outcome == 'loss' else 'pushes'] += 1
+            for p in game.players:
+                seats[p.player_id]['net'] += p.balance - before[p.player_id]
+                if p.balance < 0:
+                    violations += 1
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    for name, seat in seats.items():
+        seat['final_balance'] = START_BALANCE + seat['net']
+        seat['busted_out'] = seat['final_balance'] < MIN_BET
+    return {
+        'table': table_index,
+        'rounds': played,
+        'seats': seats,
+        'ai_decisions': game.stats['ai_decisions_total'],
+        'violations': violations,
+        'error': error,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def _play_batch(entrants, table_indices, rounds, num_decks, seeds, bet_ramp=None):
+    return [play_table(entrants, rounds, index, num_decks, seed, bet_ramp)
+            for index, seed in zip(table_indices, seeds)]
+
+
+class Standings:
+    """Per-entrant totals merged from finished tables."""
+
+    def __init__(self, entrants):
+        self.rows = {name: dict(_new_seat_result(), entrant=name, tables=0, table_wins=0,
+                                final_balance_sum=0, busted_out=0)
+                     for name, _, _ in entrants}
+        self.tables = self.rounds = self.ai_decisions = self.violations = 0
+        self.errors = []
+
+    def add(self, table):
+        self.tables += 1
+        self.rounds += table['rounds']
+        self.ai_decisions += table['ai_decisions']
+        self.violations += table['violations']
+        if table['error']:
+            self.errors.append({'table': table['table'], 'error': table['error']})
+        best = max(seat['final_balance'] for seat in table['seats'].values())
+        for name, seat in table['seats'].items():
+            row = self.rows[name]
+            row['tables'] += 1
+            for key in ('hands', 'wins', 'losses', 'pushes', 'wagered', 'net'):
+                row[key] += seat[key]
+            row['final_balance_sum'] += seat['final_balance']
+            row['busted_out'] += seat['busted_out']
+            row['table_wins'] += seat['final_balance'] == best
+
+    def table(self):
+        """Standings rows, best ``edge`` first."""
+        rows = []
+        for row in self.rows.values():
+            tables = row['tables'] or 1
+            rows.append({
+                'entrant': row['entrant'],
+                'tables': row['tables'],
+                'hands': row['hands'],
+                'wins': row['wins'],
+                'losses': row['losses'],
+                'pushes': row['pushes'],
+                'wagered': row['wagered'],
+                'net': row['net'],
+                'edge': row['net'] / row['wagered'] if row['wagered'] else 0.0,
+                'win_rate': row['wins'] / row['hands'] if row['hands'] else 0.0,
+                'table_wins': row['table_wins'],
+                'busted_out': row['busted_out'],
+                'mean_final_balance': row['final_balance_sum'] / tables,
+            })
+        rows.sort(key=lambda r: r['edge'], reverse=True)
+        for rank, row in enumerate(rows, 1):
+            row['rank'] = rank
+        return rows
+
+
+def run_tournament(entrants, tables=100, rounds=50, workers=None, num_decks=6, seed=None,
+                   on_progress=None, bet_ramp=None):
+    """Play ``tables`` tables of ``rounds`` rounds and return standings and throughput.
+
+    ``entrants`` are specs (see ``parse_entrants``) or parsed tuples.
+    ``workers`` defaults to every core; 1 plays in this process.
+    ``on_progress(standings)`` is called after each finished batch.
+    ``bet_ramp`` sizes every seat's bets (see ``app.ai.betting``).
+    """
+    if entrants and isinstance(entrants[0], str):
+        entrants = parse_entrants(entrants)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(tables)]
+    # Small batches balance the load; each still amortizes the process round trip.
+    batch = max(1, tables // (max(1, workers) * BATCHES_PER_WORKER))
+    jobs = [(list(range(start, min(start + batch, tables))), seeds[start:start + batch])
+            for start in range(0, tables, batch)]
+
+    standings = Standings(entrants)
+    started = time.perf_counter()
+
+    def merge(results):
+        for table in results:
+            standings.add(table)
+        if on_progress:
+            on_progress(standings)
+
+    if workers <= 1:
+        for indices, batch_seeds in jobs:
+            merge(_play_batch(entrants, indices, rounds, num_decks, batch_seeds, bet_ramp))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_play_batch, entrants, indices, rounds, num_decks, batch_seeds,
+                                   bet_ramp)
+                       for indices, batch_seeds in jobs]
+            for future in as_completed(futures):
+                merge(future.result())
+    elapsed = time.perf_counter() - started
+
+    return {
+        'entrants': [name for name, _, _ in entrants],
+        'bet_ramp': bet_ramp,
+        'standings': standings.table(),
+        'tables': standings.tables,
+        'rounds': standings.rounds,
+        'ai_decisions': standings.ai_decisions,
+        'violations': standings.violations,
+        'errors': standings.errors,
+        'workers': workers,
+        'elapsed': elapsed,
+        'tables_per_second': standings.tables / elapsed if elapsed > 0 else 0.0,
+        'rounds_per_second': standings.rounds / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Play an AI-only BlackJack tournament.")
+    parser.add_argument('--entrants', nargs='+', default=list(TIERS),
+                        help="TIER or TIER@q_table.json, e.g. HARD@q_table.json")
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=50, help="rounds per table")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--bet-ramp', default=None, help="flat:N, fraction:F, spread:U or kelly:F")
+    args = parser.parse_args(argv)
+
+    try:
+        entrants = parse_entrants(args.entrants)
+        if args.bet_ramp:
+            make_ramp(args.bet_ramp)
+    except ValueError as e:
+        parser.error(str(e))
+    result = run_tournament(entrants, tables=args.tables, rounds=args.rounds, workers=args.workers,
+                            num_decks=args.decks, seed=args.seed, bet_ramp=args.bet_ramp)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
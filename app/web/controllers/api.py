@@ -1,40 +1,151 @@
-from flask import Blueprint, jsonify, request, session, current_app
+import json
+import queue
+from datetime import datetime
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request, session, current_app
 from app.core.game import BlackJackGame
-from app.ai.factory import get_simulator, get_agent
-from app.data.models import db, PlayerModel, Leaderboard
+from app.ai.basic_strategy import hand_total
+from app.ai.factory import get_simulator, get_agent, get_analytics, get_grader, get_deviations
+from app.data import leaderboard
+from app.data.models import db, GameSession
+from app.core.room_manager import game_manager
+from app.sim.autoplay import POLICIES
+from app.web.controllers.sockets import socketio, spectators
 
 api_bp = Blueprint('api', __name__)
 
 # Shared, process-wide Monte Carlo simulator (500 samples).
 mc_sim = get_simulator(num_simulations=500)
+INDEX_ACTIONS = {'H': 'PEDIR (Hit)', 'S': 'PLANTARSE (Stand)', 'D': 'DOBLAR (Double)',
+                 'P': 'DIVIDIR (Split)'}
+
+def get_game_store():
+    return current_app.extensions['game_store']
 
 def get_game_session():
-    """Retrieve or create a game session for the current user."""
-    if 'game' not in session:
-        session['game'] = BlackJackGame()
-    return session['game']
+    """Retrieve or create the game for the current user.
+
+    The game itself lives in the server-side ``GameStore``; the session only
+    carries its id. Sessions from before the store still hold a pickled game
+    under ``'game'``; it is moved into the store on first access.
+    """
+    store = get_game_store()
+    game_id = session.get('game_id')
+    game = store.get(game_id) if game_id else None
+    if game is None:
+        game = session.pop('game', None) or BlackJackGame()
+        game_id = store.new_id()
+        session['game_id'] = game_id
+        store.put(game_id, game)
+    return game
 
 def save_game_session(game):
-    """Save the game state back to the session."""
-    session['game'] = game
+    """Mark the game dirty so the store writes it behind."""
+    get_game_store().put(session['game_id'], game)
+
+def get_balance_writer():
+    return current_app.extensions['balance_writer']
+
+def get_identities():
+    return current_app.extensions['identities']
 
 def sync_player_db(game):
-    """Sync key player stats to DB."""
-    try:
-        if game.game_over and len(game.players) > 0:
-            if 'user_id' in session:
-                player = PlayerModel.query.get(session['user_id'])
-                if player:
-                    player.balance = game.players[0].balance
-                    db.session.commit()
-    except Exception as e:
-        print(f"Database Sync Error: {e}")
-        db.session.rollback()
+    """Queue the player's balance and finished hands for the write-behind flush.
 
-@api_bp.route('/start', methods=['POST'])
-def start_game():
+    Balances are coalesced per player and written in batches off the request
+    path; a finished round asks for an early flush. Each settled round's
+    results are consumed once and appended to the round history pipeline.
+    """
+    if game.game_over and game.players and 'user_id' in session:
+        user_id = session['user_id']
+        writer = get_balance_writer()
+        writer.record(user_id, game.players[0].balance)
+        writer.request_flush()
+        get_identities().update_balance(user_id, game.players[0].balance)
+
+        if game.round_results:
+            history = current_app.extensions['history_writer']
+            for result in game.round_results:
+                if result['is_ai']:
+                    continue
+                history.append({
+                    'player_id': user_id,
+                    'difficulty': game.difficulty,
+                    'outcome': result['outcome'],
+                    'bet': result['bet'],
+                    'payout': result['payout'],
+                    'balance_after': game.players[0].balance,
+                    'played_at': datetime.utcnow(),
+                })
+            game.round_results = []
+
+def state_etag(game):
+    return f"{session.get('game_id', 'game')}-{game.version}"
+
+def state_response(game):
+    """Full game state tagged with its version ETag."""
+    response = jsonify(game.get_state())
+    response.set_etag(state_etag(game))
+    return response
+
+def check_expected_version(game, data):
+    """Reject stale actions (duplicate clicks, other tabs) before touching the game.
+
+    Clients pass the version they last saw as ``If-Match`` or as
+    ``expected_version`` in the JSON body; omitting both skips the check.
+    """
+    expected = data.get('expected_version')
+    if expected is not None:
+        try:
+            stale = int(expected) != game.version
+        except (TypeError, ValueError):
+            stale = True
+    elif request.if_match:
+        stale = not request.if_match.contains(state_etag(game))
+    else:
+        return None
+    if not stale:
+        return None
+    response = jsonify({'error': 'Version conflict', 'version': game.version})
+    response.set_etag(state_etag(game))
+    return response, 409
+
+def game_action(func):
+    """Route decorator for state-changing game actions.
+
+    Loads the game, enforces the expected version, runs ``func(game, data)``
+    and then persists and returns the new state. ``func`` may return a
+    response to short-circuit (e.g. an auth error).
+    """
+    @wraps(func)
+    def wrapper():
+        game = get_game_session()
+        data = request.get_json(silent=True) or {}
+        conflict = check_expected_version(game, data)
+        if conflict is not None:
+            return conflict
+        error = func(game, data)
+        if error is not None:
+            return error
+        sync_player_db(game)
+        save_game_session(game)
+        return state_response(game)
+    return wrapper
+
+@api_bp.route('/state', methods=['GET'])
+def get_game_state():
+    """Current state; answers 304 without serializing when the ETag matches."""
     game = get_game_session()
-    data = request.get_json() or {}
+    if request.if_none_match.contains(state_etag(game)):
+        response = current_app.response_class(status=304)
+        response.set_etag(state_etag(game))
+        return response
+    return state_response(game)
+
+@api_bp.route('/start', methods=['POST'])
+@game_action
+def start_game(game, data):
     num_ai = int(data.get('num_ai', 2))
     difficulty = data.get('difficulty', 'HARD')
     
@@ -46,7 +157,7 @@ def start_game():
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
         
-    user = PlayerModel.query.get(session['user_id'])
+    user = get_identities().get(session['user_id'])
     if not user:
         session.clear()
         return jsonify({'error': 'User not found, re-login required'}), 401
@@ -54,83 +165,123 @@ def start_game():
     game.start_new_round(num_ai=num_ai, difficulty=difficulty)
     # Set player name to auth username
     game.players[0].owner_name = user.name
-    # Sync balance from DB
-    game.players[0].balance = user.balance
-    
-    save_game_session(game)
-    return jsonify(game.get_state())
+    # Sync balance from DB (or the newer value still waiting to be written)
+    game.players[0].balance = get_balance_writer().pending(user.id, user.balance)
 
 @api_bp.route('/bet', methods=['POST'])
-def place_bet():
-    game = get_game_session()
-    data = request.get_json()
+@game_action
+def place_bet(game, data):
     amount = int(data.get('amount', 10))
     if amount < 1: amount = 10
     
     if game.players:
         game.players[0].place_bet(amount)
         game.confirm_bets()
-    
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/hit', methods=['POST'])
-def hit():
-    game = get_game_session()
+@game_action
+def hit(game, data):
     game.player_hit()
-    sync_player_db(game)
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/stand', methods=['POST'])
-def stand():
-    game = get_game_session()
+@game_action
+def stand(game, data):
     game.player_stand()
-    sync_player_db(game)
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/double', methods=['POST'])
-def double_down():
-    game = get_game_session()
+@game_action
+def double_down(game, data):
     game.player_double_down()
-    sync_player_db(game)
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/split', methods=['POST'])
-def split():
-    game = get_game_session()
+@game_action
+def split(game, data):
     game.player_split()
-    sync_player_db(game)
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/insurance', methods=['POST'])
-def insurance():
-    game = get_game_session()
+@game_action
+def insurance(game, data):
     game.player_insurance()
-    sync_player_db(game)
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/withdraw', methods=['POST'])
-def withdraw_game():
-    game = get_game_session()
+@game_action
+def withdraw_game(game, data):
     if game.players:
         game.players[0].withdrawn = True
         game.check_game_over()
-    save_game_session(game)
-    return jsonify(game.get_state())
 
 @api_bp.route('/refill', methods=['POST'])
-def refill_balance():
-    game = get_game_session()
+@game_action
+def refill_balance(game, data):
     if game.players:
         game.players[0].balance = 1000
-    sync_player_db(game)
+        game.touch()
+
+# Actions accepted by /api/batch, mapped to the undecorated route bodies.
+BATCH_ACTIONS = {
+    'start': start_game.__wrapped__,
+    'bet': place_bet.__wrapped__,
+    'hit': hit.__wrapped__,
+    'stand': stand.__wrapped__,
+    'double': double_down.__wrapped__,
+    'split': split.__wrapped__,
+    'insurance': insurance.__wrapped__,
+    'withdraw': withdraw_game.__wrapped__,
+    'refill': refill_balance.__wrapped__,
+}
+MAX_BATCH_ACTIONS = 50
+
+@api_bp.route('/batch', methods=['POST'])
+def batch_actions():
+    """Apply an ordered list of actions to one loaded game.
+
+    Body: ``{"actions": ["hit", {"action": "bet", "amount": 20}, ...],
+    "expected_version": 7}``. Steps run in order and stop at the first one
+    that fails; the game is persisted once and the response carries the final
+    state plus one result per executed step.
+    """
+    game = get_game_session()
+    data = request.get_json(silent=True) or {}
+    conflict = check_expected_version(game, data)
+    if conflict is not None:
+        return conflict
+
+    actions = data.get('actions')
+    if not isinstance(actions, list) or not actions:
+        return jsonify({'error': 'actions must be a non-empty list'}), 400
+    if len(actions) > MAX_BATCH_ACTIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_ACTIONS} actions per batch'}), 400
+
+    results = []
+    for step in actions:
+        if isinstance(step, str):
+            step = {'action': step}
+        name = step.get('action') if isinstance(step, dict) else None
+        func = BATCH_ACTIONS.get(name)
+        if func is None:
+            results.append({'action': name, 'ok': False, 'error': 'Unknown action'})
+            break
+        try:
+            error = func(game, step)
+        except (TypeError, ValueError) as e:
+            results.append({'action': name, 'ok': False, 'error': str(e)})
+            break
+        if error is not None:
+            if 'game_id' not in session:
+                return error  # the step cleared the session (user gone): nothing to persist
+            body, status = error
+            results.append({'action': name, 'ok': False, 'status': status,
+                            'error': body.get_json().get('error')})
+            break
+        # Per step so a round settled mid-batch is recorded before the next start.
+        sync_player_db(game)
+        results.append({'action': name, 'ok': True, 'version': game.version,
+                        'message': game.message})
+
     save_game_session(game)
-    return jsonify(game.get_state())
+    response = jsonify({'state': game.get_state(), 'results': results})
+    response.set_etag(state_etag(game))
+    return response
 
 @api_bp.route('/probability', methods=['GET'])
 def get_probability():
@@ -157,12 +308,31 @@ def get_probability():
         reason = f"El Dealer tiene carta débil ({d_val}), podría pasarse."
     elif d_val >= 7:
         reason = f"El Dealer tiene carta fuerte ({d_val}), necesitas sumar más."
+    recommendation = 'PEDIR (Hit)' if prob_hit > prob_stand else 'PLANTARSE (Stand)'
+
+    # Count-based index plays override the estimate once the true count crosses them.
+    deviations = get_deviations()
+    true_count = game.counter.true_count
+    cards = current_hand.cards
+    total, soft = hand_total(cards)
+    pair = cards[0].value if len(cards) == 2 and cards[0].rank == cards[1].rank else None
+    index_play = None
+    system = game.counter.system
+    play = deviations.lookup(total, soft, pair, d_val, true_count, system)
+    if play is not None and (play[1] in ('H', 'S') or len(cards) == 2):
+        name, action, index = play
+        index_play = {'name': name, 'action': action, 'index': index}
+        recommendation = INDEX_ACTIONS[action]
+        reason = f"Jugada índice {name}: conteo verdadero {true_count:+.1f} (índice {index:+d})."
 
     return jsonify({
         'hit_win_rate': prob_hit,
         'stand_win_rate': prob_stand,
-        'recommendation': 'PEDIR (Hit)' if prob_hit > prob_stand else 'PLANTARSE (Stand)',
-        'reason': reason
+        'recommendation': recommendation,
+        'reason': reason,
+        'true_count': round(true_count, 2),
+        'index_play': index_play,
+        'insurance': d_val == 11 and deviations.take_insurance(true_count, system),
     })
 
 @api_bp.route('/qvalues', methods=['GET'])
@@ -185,8 +355,17 @@ def get_qvalues():
 
 @api_bp.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
-    entries = Leaderboard.query.order_by(Leaderboard.peak_balance.desc()).limit(10).all()
-    return jsonify([entry.to_dict() for entry in entries])
+    return jsonify(leaderboard.top())
+
+@api_bp.route('/leaderboard/ranks', methods=['GET'])
+def get_leaderboard_ranks():
+    """Keyset-paginated ranking: pass the previous page's ``next`` as ``after``."""
+    try:
+        result = leaderboard.page(after=request.args.get('after'),
+                                  limit=request.args.get('limit', leaderboard.TOP_N))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
 
 @api_bp.route('/leaderboard', methods=['POST'])
 def save_leaderboard():
@@ -195,6 +374,9 @@ def save_leaderboard():
         if not game.players or len(game.players) == 0:
             return jsonify({'success': False, 'message': 'No player data'})
         
+        if game.pending_grades:
+            game.touch()  # folds move grades finished since the last action
+            save_game_session(game)
         player = game.players[0]
         stats = game.stats
         
@@ -204,33 +386,139 @@ def save_leaderboard():
         ai_acc = (stats['ai_decisions_correct'] / stats['ai_decisions_total'] * 100) if stats['ai_decisions_total'] > 0 else 0
         player_acc = (stats['player_decisions_correct'] / stats['player_decisions_total'] * 100) if stats['player_decisions_total'] > 0 else 0
         
-        entry = Leaderboard(
-            player_name=player.owner_name,
-            peak_balance=player.balance,
+        improved = leaderboard.submit(
+            player.owner_name,
+            player.balance,
             rounds_played=stats['rounds_played'],
             win_rate=win_rate,
             ai_accuracy=ai_acc,
             player_accuracy=player_acc
         )
-        
-        db.session.add(entry)
-        db.session.commit()
+        if not improved:
+            return jsonify({'success': True, 'message': 'Tu mejor marca sigue en el Hall of Fame.'})
         return jsonify({'success': True, 'message': 'Entrada guardada en el Hall of Fame!'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
+def _summarize(rounds, wins, losses, draws):
+    rounds = rounds or 0
+    return {
+        'rounds_played': rounds,
+        'wins': wins or 0,
+        'losses': losses or 0,
+        'draws': draws or 0,
+        'win_rate': round((wins or 0) / rounds * 100, 1) if rounds else 0.0,
+    }
+
+@api_bp.route('/stats/me', methods=['GET'])
+def get_my_stats():
+    """Per-difficulty results of the logged-in player (pre-aggregated rows)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    rows = GameSession.query.filter_by(player_id=session['user_id']).all()
+    by_difficulty = {
+        gs.difficulty: _summarize(gs.rounds_played, gs.wins, gs.losses, gs.draws) for gs in rows
+    }
+    overall = _summarize(*(sum(getattr(gs, c) or 0 for gs in rows)
+                           for c in ('rounds_played', 'wins', 'losses', 'draws')))
+    return jsonify({'overall': overall, 'by_difficulty': by_difficulty})
+
+@api_bp.route('/stats/difficulty', methods=['GET'])
+def get_difficulty_stats():
+    """Results of all players grouped by difficulty (pre-aggregated rows)."""
+    rows = db.session.query(
+        GameSession.difficulty,
+        db.func.sum(GameSession.rounds_played),
+        db.func.sum(GameSession.wins),
+        db.func.sum(GameSession.losses),
+        db.func.sum(GameSession.draws),
+        db.func.count(GameSession.player_id),
+    ).group_by(GameSession.difficulty).all()
+    return jsonify({
+        difficulty: dict(_summarize(rounds, wins, losses, draws), players=players)
+        for difficulty, rounds, wins, losses, draws, players in rows
+    })
+
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Operational counters of the background components."""
+    ext = current_app.extensions
+    return jsonify({
+        'game_store': ext['game_store'].metrics(),
+        'balance_writer': ext['balance_writer'].metrics(),
+        'history_writer': ext['history_writer'].metrics(),
+        'sessions': ext['session_sweeper'].metrics() if 'session_sweeper' in ext else None,
+        'autoplay': ext['autoplay'].metrics(),
+        'grader': get_grader().metrics(),
+        'rooms': game_manager.metrics(),
+        'spectators': spectators.metrics(),
+        'identities': ext['identities'].metrics(),
+        'passwords': ext['password_hasher'].metrics(),
+        'event_loop': ext['loop_monitor'].metrics() if 'loop_monitor' in ext else None,
+    })
+
+@api_bp.route('/autoplay', methods=['POST'])
+def autoplay():
+    """Run N rounds server-side with one policy and stream NDJSON events.
+
+    The rounds are played on the autoplay worker pool; this handler only relays
+    the ``progress`` events and the final ``summary`` as they arrive.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+    policy = str(data.get('policy', 'basic')).lower()
+    if policy not in POLICIES:
+        return jsonify({'error': f"Unknown policy. Use one of: {', '.join(sorted(POLICIES))}"}), 400
+    try:
+        rounds = int(data.get('rounds', 1000))
+        bet = int(data.get('bet', 10))
+        bankroll = data.get('bankroll')
+        bankroll = int(bankroll) if bankroll is not None else None
+        progress_every = data.get('progress_every')
+        progress_every = int(progress_every) if progress_every is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rounds, bet, bankroll and progress_every must be integers'}), 400
+    rounds = max(1, min(rounds, current_app.config['AUTOPLAY_MAX_ROUNDS']))
+    bet = max(1, bet)
+    if progress_every is not None:
+        progress_every = max(1, progress_every)
+
+    run = current_app.extensions['autoplay'].submit(
+        policy=policy, rounds=rounds, bet=bet, bankroll=bankroll, progress_every=progress_every)
+    if run is None:
+        return jsonify({'error': 'Too many simulations running, try again later'}), 429
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event = run.events.get_nowait()
+                except queue.Empty:
+                    socketio.sleep(0.05)  # cooperative wait, keeps the server responsive
+                    continue
+                if event is None:
+                    return
+                yield json.dumps(event) + '\n'
+        finally:
+            run.cancel()  # the client disconnected (GeneratorExit) or the run ended
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def _cached_response(payload, etag):
+    """JSON response that clients revalidate with ``If-None-Match`` (304 if unchanged)."""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @api_bp.route('/strategy/heatmap', methods=['GET'])
 def get_strategy_heatmap():
     try:
-        agent = get_agent()
-        heatmap = agent.generate_strategy_heatmap()
-        return jsonify({
-            'heatmap': heatmap,
-            'rows': list(range(4, 22)),
-            'cols': list(range(2, 12)),
-            'legend': {0: 'Stand', 1: 'Hit', 2: 'Equal'}
-        })
+        artifact = get_analytics().artifact()
+        return _cached_response(artifact['heatmap'], artifact['etag'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -239,17 +527,18 @@ def get_strategy_details():
     try:
         player_sum = int(request.args.get('player_sum', 15))
         dealer_card = int(request.args.get('dealer_card', 10))
-        agent = get_agent()
-        details = agent.get_strategy_details(player_sum, dealer_card)
-        return jsonify({'player_sum': player_sum, 'dealer_card': dealer_card, 'details': details})
+        analytics = get_analytics()
+        details = analytics.details(player_sum, dealer_card)
+        return _cached_response(
+            {'player_sum': player_sum, 'dealer_card': dealer_card, 'details': details},
+            analytics.artifact()['etag'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/strategy/compare', methods=['GET'])
 def compare_strategies():
     try:
-        agent = get_agent()
-        comparison = agent.compare_with_basic_strategy()
-        return jsonify(comparison)
+        artifact = get_analytics().artifact()
+        return _cached_response(artifact['compare'], artifact['etag'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
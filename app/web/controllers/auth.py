@@ -1,10 +1,15 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, session, request
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, redirect, url_for, flash, session, request, current_app
 from app.data.models import db, PlayerModel
 from app.web.forms import LoginForm, RegisterForm
+from app.web.passwords import HasherBusy
 
 auth_bp = Blueprint('auth', __name__)
 
+BUSY_MESSAGE = 'Servidor ocupado, intenta de nuevo en unos segundos.'
+
+def get_hasher():
+    return current_app.extensions['password_hasher']
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if 'user_id' in session:
@@ -13,7 +18,21 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = PlayerModel.query.filter_by(name=form.username.data).first()
-        if user and user.password_hash and check_password_hash(user.password_hash, form.password.data):
+        hasher = get_hasher()
+        try:
+            valid = bool(user and user.password_hash and hasher.verify(user.password_hash, form.password.data))
+        except HasherBusy:
+            flash(BUSY_MESSAGE, 'error')
+            return render_template('login.html', form=form), 503
+        if valid and hasher.needs_rehash(user.password_hash):
+            # Hash parameters changed since this password was stored. Best
+            # effort: when busy, the next login upgrades it instead.
+            try:
+                user.password_hash = hasher.hash(form.password.data)
+                db.session.commit()
+            except HasherBusy:
+                pass
+        if valid:
             session['user_id'] = user.id
             session['username'] = user.name
             flash('Bienvenido de nuevo!', 'success')
@@ -35,7 +54,11 @@ def register():
         if existing:
             flash('El nombre de usuario ya existe.', 'error')
         else:
-            hashed = generate_password_hash(form.password.data)
+            try:
+                hashed = get_hasher().hash(form.password.data)
+            except HasherBusy:
+                flash(BUSY_MESSAGE, 'error')
+                return render_template('register.html', form=form), 503
             new_user = PlayerModel(name=form.username.data, password_hash=hashed, balance=1000)
             db.session.add(new_user)
             db.session.commit()
@@ -47,6 +70,11 @@ def register():
 
 @auth_bp.route('/logout')
 def logout():
+    game_id = session.get('game_id')
+    if game_id:
+        current_app.extensions['game_store'].delete(game_id)
+    if 'user_id' in session:
+        current_app.extensions['identities'].invalidate(session['user_id'])
     session.clear()
     flash('Has cerrado sesión.', 'info')
     return redirect(url_for('auth.login'))
@@ -1,6 +1,5 @@
-from flask import render_template, redirect, url_for, session
+from flask import render_template, redirect, url_for, session, current_app
 from . import web_bp
-from app.data.models import PlayerModel
 
 @web_bp.route('/favicon.ico')
 def favicon():
@@ -11,7 +10,7 @@ def index():
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
         
-    user = PlayerModel.query.get(session['user_id'])
+    user = current_app.extensions['identities'].get(session['user_id'])
     if not user:
         session.clear()
         return redirect(url_for('auth.login'))
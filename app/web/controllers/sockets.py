@@ -1,20 +1,239 @@
 from flask import request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from app.core.room_manager import game_manager
+from app.core.spectate import SpectatorFeed, spectator_state
+from app.core.state_diff import PatchStream
+from app.core.wire import compact_state, patch_message, snapshot_message
 
 socketio = SocketIO()
 
+# Wire formats a client can ask for with ``format`` in create_room/join_room.
+# Each format has its own sub-room ("<room_id>:<format>") and patch stream.
+FORMATS = ('json', 'compact')
+
+# {(room_id, format): PatchStream} - last state sent to that audience.
+room_streams = {}
+# {room_id: {format: set(sid)}} and {sid: format}
+room_formats = {}
+client_formats = {}
+
+# Read-only watchers; served by the spectator tick, never by player broadcasts.
+spectators = SpectatorFeed()
+_spectator_task = None
+
+
+def _format_room(room_id, fmt):
+    return f"{room_id}:{fmt}"
+
+
+def _requested_format(data):
+    fmt = (data or {}).get('format', 'json')
+    return fmt if fmt in FORMATS else 'json'
+
+
+def _stream(room_id, fmt):
+    stream = room_streams.get((room_id, fmt))
+    if stream is None:
+        stream = room_streams[(room_id, fmt)] = PatchStream()
+    return stream
+
+
+def _state_message(stream, game, fmt):
+    if fmt == 'compact':
+        event, payload = stream.message(compact_state(game), version=game.version)
+        if event == 'game_update':
+            return event, snapshot_message(payload)
+        return event, patch_message(payload['base_version'], payload['version'], payload['ops'])
+    return stream.message(game.get_state())
+
+
+def full_state(game, fmt):
+    """The complete state in ``fmt`` (joins and resyncs)."""
+    if fmt == 'compact':
+        return snapshot_message(compact_state(game))
+    return game.get_state()
+
+
+def broadcast_state(room_id, game):
+    """Send each format audience a ``game_patch`` against its last state (or a snapshot)."""
+    if game_manager.store is not None:
+        # Audiences on other workers are not tracked here: serve every format.
+        fmts = FORMATS
+    else:
+        fmts = [fmt for fmt, sids in room_formats.get(room_id, {}).items() if sids]
+    for fmt in fmts:
+        event, payload = _state_message(_stream(room_id, fmt), game, fmt)
+        emit(event, payload, to=_format_room(room_id, fmt))
+
+
+def _reset_streams(room_id):
+    """Make the room's next broadcast a snapshot (another worker changed it)."""
+    for fmt in FORMATS:
+        room_streams.pop((room_id, fmt), None)
+
+
+def sync_room(room):
+    """Refresh ``room`` from the shared store, if any; returns its game."""
+    if game_manager.sync(room):
+        _reset_streams(room.room_id)
+    return room.game
+
+
+def commit_room(room):
+    """Publish the caller's change; on a cross-worker conflict resend the state."""
+    if game_manager.commit(room):
+        return True
+    if not game_manager.is_live(room):
+        return False  # the room is gone; ``forget_room`` told its clients
+    _reset_streams(room.room_id)
+    emit('error', {'message': "La sala cambio en otro servidor, vuelve a intentarlo."})
+    emit('game_update', full_state(room.game, client_formats.get(request.sid, 'json')))
+    return False
+
+
+def subscribe(room_id, game, fmt):
+    """Add the caller to the room's ``fmt`` audience, in sync with the current state.
+
+    Call after broadcasting the change that let them in: the audience's stream
+    is then advanced to the current state, which is also the joiner's baseline.
+    """
+    s_id = request.sid
+    room_formats.setdefault(room_id, {}).setdefault(fmt, set()).add(s_id)
+    client_formats[s_id] = fmt
+    join_room(_format_room(room_id, fmt))
+    _state_message(_stream(room_id, fmt), game, fmt)
+
+
+def unsubscribe(s_id):
+    fmt = client_formats.pop(s_id, None)
+    room_id = game_manager.player_rooms.get(s_id)
+    if fmt and room_id:
+        room_formats.get(room_id, {}).get(fmt, set()).discard(s_id)
+
+
+def forget_room(room_id, closed=True):
+    """Drop broadcast state of a room the registry removed (empty, idle or gone).
+
+    ``closed`` is ``False`` when only this worker's copy went away; players
+    are told (and the Socket.IO rooms closed) only when the room itself did.
+    """
+    for fmt in room_formats.pop(room_id, {}):
+        room_streams.pop((room_id, fmt), None)
+    if closed:
+        socketio.emit('room_closed', {'room_id': room_id}, to=room_id)
+        for audience in [room_id] + [_format_room(room_id, fmt) for fmt in FORMATS]:
+            socketio.close_room(audience)
+        if spectators.forget(room_id):
+            socketio.emit('room_closed', {'room_id': room_id}, to=_spectator_room(room_id))
+            socketio.close_room(_spectator_room(room_id))
+
+
+def _spectator_room(room_id):
+    return f"{room_id}:spectators"
+
+
+def spectator_tick():
+    """Send each watched room's spectators one coalesced update, if it changed.
+
+    With a shared store only the room's owner does this, for the spectators
+    on every worker (the message queue fans the emit out), and publishes
+    what it sent as the baseline for new spectators. Rooms watched here are
+    claimed when their owner stopped heartbeating.
+    """
+    spectators.stats['ticks'] += 1
+    store = game_manager.store
+    if store is None:
+        room_ids = spectators.rooms()
+    else:
+        for room_id in spectators.rooms():
+            if store.claim(room_id):
+                spectators.streams.pop(room_id, None)  # start the new owner's stream afresh
+        room_ids = store.fed_rooms()
+    for room_id in room_ids:
+        room = game_manager.find_room(room_id) if store else game_manager.rooms.get(room_id)
+        if room is None:
+            continue
+        with room.lock:
+            message = spectators.message(room_id, sync_room(room))
+        if message is None:
+            continue
+        if store is not None:
+            store.publish_feed(room_id, spectators.streams[room_id].last_state)
+        socketio.emit(*message, to=_spectator_room(room_id))
+
+
+def _spectator_snapshot(room_id, room):
+    """The state a new (or resyncing) spectator of ``room`` starts from."""
+    store = game_manager.store
+    if store is not None:
+        # The owner's last message is the base of its next patch.
+        state = store.feed(room_id)
+        if state is not None:
+            return state
+        with room.lock:
+            return spectator_state(sync_room(room))
+    with room.lock:
+        return spectators.snapshot(room_id, sync_room(room))
+
+
+def _start_spectator_loop():
+    global _spectator_task
+    if _spectator_task is None:
+        _spectator_task = socketio.start_background_task(_spectator_loop)
+
+
+def _spectator_loop():
+    while True:
+        socketio.sleep(spectators.interval)
+        try:
+            spectator_tick()
+        except Exception as e:
+            print(f"[SPECTATOR ERROR] {e}")
+
+
+def _count_spectators(room_id):
+    """Tell the shared store how many spectators of ``room_id`` this worker has."""
+    if game_manager.store is not None:
+        game_manager.store.set_spectators(room_id, len(spectators.watchers.get(room_id, ())))
+
+
+def _stop_spectating(s_id):
+    room_id = spectators.remove(s_id)
+    if room_id:
+        leave_room(_spectator_room(room_id))
+        _count_spectators(room_id)
+
+
+game_manager.on_remove = forget_room
+
 # --- Lobby Management ---
 
 @socketio.on('create_room')
 def on_create_room(data):
     s_id = request.sid
-    room_id = game_manager.create_room(s_id)
-    game_manager.join_room(room_id, s_id, "Host")
-    game = game_manager.rooms[room_id]
-    game.add_player("Host", player_id=s_id)
-    join_room(room_id)
-    emit('room_created', {'room_id': room_id, 'game_state': game.get_state()})
+    if s_id in game_manager.player_rooms:
+        emit('error', {'message': "Already in a room"})
+        return
+    _stop_spectating(s_id)
+    difficulty = (data or {}).get('difficulty', 'HARD')
+    room_id = game_manager.create_room(s_id, difficulty=difficulty)
+    if room_id is None:
+        emit('error', {'message': "No hay salas disponibles, intenta mas tarde."})
+        return
+    game, msg = game_manager.join_room(room_id, s_id, "Host")
+    room = game_manager.rooms[room_id]
+    with room.lock:
+        game = sync_room(room)
+        game.add_player("Host", player_id=s_id)
+        commit_room(room)
+        join_room(room_id)
+        fmt = _requested_format(data)
+        emit('room_created', {'room_id': room_id, 'game_state': game.get_state(), 'compact': fmt == 'compact'})
+        subscribe(room_id, game, fmt)
+        if fmt == 'compact':
+            emit('game_update', full_state(game, fmt))
+    if game_manager.store is not None:
+        _start_spectator_loop()  # this worker owns the room: it feeds its spectators
 
 @socketio.on('join_room')
 def on_join_room(data):
@@ -25,11 +244,48 @@ def on_join_room(data):
     if not game:
         emit('error', {'message': msg})
         return
-    found = any(p.player_id == s_id for p in game.players)
-    if not found:
-        game.add_player(username, player_id=s_id)
-    emit('game_joined', {'room_id': room_id, 'game_state': game.get_state()})
-    emit('game_update', game.get_state(), to=room_id)
+    _stop_spectating(s_id)
+    join_room(room_id)
+    room = game_manager.rooms[room_id]
+    with room.lock:
+        game = sync_room(room)
+        found = any(p.player_id == s_id for p in game.players)
+        if not found:
+            game.add_player(username, player_id=s_id)
+            if not commit_room(room):
+                return
+        fmt = _requested_format(data)
+        emit('game_joined', {'room_id': room_id, 'game_state': game.get_state(), 'compact': fmt == 'compact'})
+        broadcast_state(room_id, game)
+        subscribe(room_id, game, fmt)
+        if fmt == 'compact':
+            emit('game_update', full_state(game, fmt))
+
+@socketio.on('spectate')
+def on_spectate(data):
+    """Watch a room read-only, with coalesced and redacted updates."""
+    s_id = request.sid
+    room_id = (data or {}).get('room_id')
+    if s_id in game_manager.player_rooms:
+        emit('error', {'message': "Already in a room"})
+        return
+    room = game_manager.find_room(room_id)
+    if room is None:
+        emit('error', {'message': "Room not found"})
+        return
+    _stop_spectating(s_id)
+    if not spectators.add(room_id, s_id):
+        emit('error', {'message': "No hay mas lugares para espectadores en esta sala."})
+        return
+    join_room(_spectator_room(room_id))
+    _count_spectators(room_id)
+    emit('spectating', {'room_id': room_id, 'game_state': _spectator_snapshot(room_id, room)})
+    _start_spectator_loop()
+
+
+@socketio.on('stop_spectating')
+def on_stop_spectating(data=None):
+    _stop_spectating(request.sid)
 
 
 # --- Game Actions ---
@@ -37,26 +293,27 @@ def on_join_room(data):
 def handle_game_action(action_func):
     """Helper to wrap game actions and broadcast update."""
     s_id = request.sid
-    game = game_manager.get_game(s_id)
-    if not game:
+    room = game_manager.get_room(s_id)
+    if not room:
         emit('error', {'message': "Not in a multiplayer room"})
         return
     try:
-        current_p = game.players[game.current_player_idx]
-        if current_p.player_id != s_id:
-            emit('error', {'message': "Not your turn!"})
-            return
-        if action_func == 'hit':
-            game.player_hit()
-        elif action_func == 'stand':
-            game.player_stand()
-        elif action_func == 'double':
-            game.player_double_down()
-        elif action_func == 'split':
-            game.player_split()
-        room_id = game_manager.player_rooms.get(s_id)
-        if room_id:
-            emit('game_update', game.get_state(), to=room_id)
+        with room.lock:
+            game = sync_room(room)
+            current_p = game.players[game.current_player_idx]
+            if current_p.player_id != s_id:
+                emit('error', {'message': "Not your turn!"})
+                return
+            if action_func == 'hit':
+                game.player_hit()
+            elif action_func == 'stand':
+                game.player_stand()
+            elif action_func == 'double':
+                game.player_double_down()
+            elif action_func == 'split':
+                game.player_split()
+            if commit_room(room):
+                broadcast_state(room.room_id, game)
     except Exception as e:
         print(f"[SOCKET ERROR] {e}")
         import traceback
@@ -81,17 +338,32 @@ def on_split():
 @socketio.on('start_round')
 def on_start_round(data):
     s_id = request.sid
-    game = game_manager.get_game(s_id)
-    if not game:
+    room = game_manager.get_room(s_id)
+    if not room:
         return
-    if game.players and game.players[0].player_id != s_id:
-        emit('error', {'message': "Solo el anfitrion puede iniciar una nueva ronda."})
+    with room.lock:
+        game = sync_room(room)
+        if game.players and game.players[0].player_id != s_id:
+            emit('error', {'message': "Solo el anfitrion puede iniciar una nueva ronda."})
+            return
+        difficulty = data.get('difficulty', 'HARD')
+        game.start_new_round(num_ai=0, difficulty=difficulty)
+        if commit_room(room):
+            broadcast_state(room.room_id, game)
+
+@socketio.on('resync')
+def on_resync(data=None):
+    """A client missed a patch (version gap): send it the full state."""
+    room = game_manager.get_room(request.sid)
+    if room:
+        with room.lock:
+            game = sync_room(room)
+            emit('game_update', full_state(game, client_formats.get(request.sid, 'json')))
         return
-    difficulty = data.get('difficulty', 'HARD')
-    game.start_new_round(num_ai=0, difficulty=difficulty)
-    room_id = game_manager.player_rooms.get(s_id)
-    if room_id:
-        emit('game_update', game.get_state(), to=room_id)
+    room_id = spectators.watching.get(request.sid)
+    room = game_manager.find_room(room_id) if room_id else None
+    if room:
+        emit('game_update', _spectator_snapshot(room_id, room))
 
 @socketio.on('connect')
 def on_connect():
@@ -99,12 +371,16 @@ def on_connect():
 
 @socketio.on('disconnect')
 def on_disconnect():
-    game_manager.remove_player(request.sid)
+    _stop_spectating(request.sid)
+    unsubscribe(request.sid)
+    room_id = game_manager.remove_player(request.sid)
+    if room_id:
+        leave_room(room_id)
 
 @socketio.on('start_training')
 def handle_training(data):
     """Run real Q-Learning training in chunks and stream actual progress."""
-    from app.ai.factory import get_agent
+    from app.ai.factory import get_agent, get_analytics
     episodes = int(data.get('episodes', 100))
     episodes = max(10, min(episodes, 5000))
     agent = get_agent()
@@ -127,6 +403,8 @@ def handle_training(data):
         })
         socketio.sleep(0)
     final_rate = (cumulative_wins / cumulative_total) if cumulative_total else 0.0
+    # Rebuild the /api/strategy/* artifacts for the new Q-table version.
+    get_analytics().refresh()
     emit('training_complete', {
         'episodes': done,
         'win_rate': round(final_rate, 4),
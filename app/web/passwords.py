@@ -0,0 +1,147 @@
+"""Password hashing kept off the event loop.
+
+Werkzeug's hashes (scrypt or PBKDF2) are deliberately slow: tens to hundreds of
+milliseconds of CPU per call. Run inline in an eventlet handler, one login
+stalls every socket game in the process for that long. ``PasswordHasher``
+runs each hash in a native thread instead (``eventlet.tpool`` when the server
+runs on eventlet; the hash functions release the GIL), and caps how many run
+at once so a burst of logins queues instead of starving the CPU. A caller
+that cannot get a slot within ``timeout`` seconds gets ``HasherBusy``; a hash
+that has started cannot be cancelled, so the timeout bounds the wait only.
+
+Latency is recorded per operation (queue wait and hashing separately) for
+``GET /api/metrics``; ``LoopMonitor`` reports the event loop's own lag next
+to it, so slow logins and a stalled loop can be told apart.
+"""
+
+import threading
+import time
+from collections import deque
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+LATENCY_SAMPLES = 512
+
+
+class HasherBusy(Exception):
+    """Every hashing slot stayed busy for longer than the timeout."""
+
+
+def method_prefix(method):
+    """The method prefix Werkzeug stores for ``method``, with defaults filled in.
+
+    Mirrors ``werkzeug.security._hash_internal``: ``'scrypt'`` is stored as
+    ``'scrypt:32768:8:1'`` and ``'pbkdf2'`` as ``'pbkdf2:sha256:<iterations>'``.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = args if len(args) == 3 else (2 ** 15, 8, 1)
+        return f"scrypt:{int(n)}:{int(r)}:{int(p)}"
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', salt_length=16, max_concurrent=4, timeout=5.0,
+                 offload=None, semaphore_factory=threading.BoundedSemaphore):
+        self.method = method
+        self.salt_length = salt_length
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        # ``offload(func, *args)`` runs ``func`` off the event loop (default: inline).
+        self._offload = offload or (lambda func, *args: func(*args))
+        self._slots = semaphore_factory(max_concurrent)
+        self._lock = threading.Lock()
+        self._prefix = method_prefix(method)
+        self.stats = {'hashed': 0, 'verified': 0, 'rejected_busy': 0, 'errors': 0, 'running': 0}
+        self._latency = {op: {'wait': deque(maxlen=LATENCY_SAMPLES), 'hash': deque(maxlen=LATENCY_SAMPLES)}
+                         for op in ('hash', 'verify')}
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run('verify', check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when ``pwhash`` was made with other parameters than ``method``."""
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def _run(self, op, func, *args):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.stats['rejected_busy'] += 1
+            raise HasherBusy(f"no password hashing slot within {self.timeout}s")
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.stats['running'] += 1
+        try:
+            result = self._offload(func, *args)
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.stats['running'] -= 1
+        elapsed = time.perf_counter() - started - waited
+        with self._lock:
+            self.stats['hashed' if op == 'hash' else 'verified'] += 1
+            self._latency[op]['wait'].append(waited)
+            self._latency[op]['hash'].append(elapsed)
+        return result
+
+    def metrics(self):
+        with self._lock:
+            latency = {
+                op: {
+                    f'{part}_ms_{name}': round(_percentile(samples, q) * 1000, 2)
+                    for part, samples in parts.items()
+                    for name, q in (('p50', 0.5), ('p95', 0.95), ('max', 1.0))
+                }
+                for op, parts in self._latency.items()
+            }
+            return dict(self.stats, method=self.method, max_concurrent=self.max_concurrent,
+                        timeout=self.timeout, latency=latency)
+
+
+class LoopMonitor:
+    """Measures how late the event loop wakes a sleeping task (its lag)."""
+
+    def __init__(self, interval=0.5, sleep=time.sleep):
+        self.interval = interval
+        self._sleep = sleep
+        self._samples = deque(maxlen=LATENCY_SAMPLES)
+        self.running = False
+
+    def run(self):
+        self.running = True
+        while self.running:
+            started = time.perf_counter()
+            self._sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def stop(self):
+        self.running = False
+
+    def metrics(self):
+        samples = list(self._samples)
+        return {
+            'interval': self.interval,
+            'samples': len(samples),
+            'lag_ms_p50': round(_percentile(samples, 0.5) * 1000, 2),
+            'lag_ms_p95': round(_percentile(samples, 0.95) * 1000, 2),
+            'lag_ms_max': round(_percentile(samples, 1.0) * 1000, 2),
+        }
@@ -1,3 +1,7 @@
+// Last game-state version seen; sent as If-Match so the server can reject
+// duplicate clicks or actions from a stale tab with 409 instead of replaying them.
+let gameVersion = null;
+
 export async function fetchData(url, data = null, method = 'POST') {
     console.log(`[API REQUEST] ${method} ${url}`, data);
     try {
@@ -6,6 +10,9 @@ export async function fetchData(url, data = null, method = 'POST') {
             'Content-Type': 'application/json',
             'X-CSRFToken': csrfToken
         };
+        if (method !== 'GET' && gameVersion !== null) {
+            headers['If-Match'] = gameVersion;
+        }
 
         const config = {
             method: method,
@@ -17,7 +24,16 @@ export async function fetchData(url, data = null, method = 'POST') {
         }
 
         const response = await fetch(url, config);
+        if (response.status === 409) {
+            // Someone else moved the game on; resync with the current state.
+            gameVersion = null;
+            return fetchData('/api/state', null, 'GET');
+        }
         const json = await response.json();
+        const etag = response.headers.get('ETag');
+        if (etag && json && json.version !== undefined) {
+            gameVersion = etag;
+        }
         console.log(`[API RESPONSE] ${url}:`, json);
         return json;
     } catch (e) {
@@ -1,5 +1,5 @@
 import { fetchData } from './api.js';
-import { socket } from './socket_client.js';
+import { socket, wireFormat } from './socket_client.js';
 import { updateUI, showToast, playSound, enterMultiplayer } from './ui.js';
 
 let currentBet = 10;
@@ -31,14 +31,20 @@ window.enterSinglePlayer = () => {
 };
 
 window.createRoom = () => {
-    socket.emit('create_room', { difficulty: 'HARD' });
+    socket.emit('create_room', { difficulty: 'HARD', format: wireFormat });
 };
 
 window.joinRoom = () => {
     const code = document.getElementById('room-code-input').value.toUpperCase();
     const user = document.getElementById('username-input').value || "Guest";
     if (!code) { showToast("Ingrese un código válido"); return; }
-    socket.emit('join_room', { room_id: code, username: user });
+    socket.emit('join_room', { room_id: code, username: user, format: wireFormat });
+};
+
+window.spectateRoom = () => {
+    const code = document.getElementById('room-code-input').value.toUpperCase();
+    if (!code) { showToast("Ingrese un código válido"); return; }
+    socket.emit('spectate', { room_id: code });
 };
 
 window.addBet = (amount) => {
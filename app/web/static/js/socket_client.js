@@ -1,7 +1,49 @@
 import { updateUI, showToast, enterMultiplayer } from './ui.js';
+import { WIRE_FORMAT, decodeMessage, expandState } from './wire.js';
 
 export const socket = io();
 
+// Sent with create_room / join_room to opt in to the compact wire format.
+export const wireFormat = WIRE_FORMAT;
+
+// Room state kept locally so `game_patch` messages can be applied to it. With
+// the compact format this is the compact array state (version at index 0).
+let roomState = null;
+
+function isCompact(payload) {
+    return Array.isArray(payload) || payload instanceof ArrayBuffer || payload instanceof Uint8Array;
+}
+
+function stateVersion(state) {
+    return Array.isArray(state) ? state[0] : state.version;
+}
+
+function setRoomState(state) {
+    roomState = state;
+    updateUI(Array.isArray(state) ? expandState(state) : state);
+}
+
+// Mirrors app/core/state_diff.py: ['s', path, value] set, ['d', path] delete,
+// ['a', path, values] append, ['t', path, length] truncate.
+function applyPatch(state, ops) {
+    for (const op of ops) {
+        const [kind, path] = op;
+        if (path.length === 0 && kind === 's') {
+            state = op[2];
+            continue;
+        }
+        let target = state;
+        for (const key of path.slice(0, -1)) target = target[key];
+        const last = path[path.length - 1];
+        const seq = path.length ? target[last] : state;
+        if (kind === 's') target[last] = op[2];
+        else if (kind === 'd') delete target[last];
+        else if (kind === 'a') seq.push(...op[2]);
+        else if (kind === 't') seq.length = op[2];
+    }
+    return state;
+}
+
 export function initSockets() {
     socket.on('connect', () => {
         console.log('[Socket] Connected!', socket.id);
@@ -12,14 +54,30 @@ export function initSockets() {
         console.log('[Socket] Disconnected');
     });
 
-    socket.on('game_update', (state) => {
+    socket.on('game_update', (payload) => {
+        const state = isCompact(payload) ? decodeMessage(payload)[1] : payload;
         console.log('[Socket] Game Update Rule:', state);
-        updateUI(state);
+        setRoomState(state);
+    });
+
+    socket.on('game_patch', (payload) => {
+        let patch = payload;
+        if (isCompact(payload)) {
+            const [, base_version, version, ops] = decodeMessage(payload);
+            patch = { base_version, version, ops };
+        }
+        if (!roomState || stateVersion(roomState) !== patch.base_version) {
+            // Missed an update (or joined mid-stream): ask for a full snapshot.
+            socket.emit('resync', {});
+            return;
+        }
+        setRoomState(applyPatch(roomState, patch.ops));
     });
 
     // Lobby Events
     socket.on('room_created', (data) => {
         console.log("Room Created:", data);
+        if (!data.compact) roomState = data.game_state;
         enterMultiplayer(data.room_id, data.game_state);
         showToast(`Sala Creada: ${data.room_id}`);
         alert(`COMPARTE ESTE CÓDIGO CON TUS AMIGOS: ${data.room_id}`);
@@ -27,10 +85,25 @@ export function initSockets() {
 
     socket.on('game_joined', (data) => {
         console.log("Joined Room:", data);
+        if (!data.compact) roomState = data.game_state;
         enterMultiplayer(data.room_id, data.game_state);
         showToast(`Unido a la sala ${data.room_id}`);
     });
 
+    // Spectators get JSON states, at most a few per second, with the
+    // dealer's hole card hidden until the round is settled.
+    socket.on('spectating', (data) => {
+        roomState = data.game_state;
+        window.isSpectator = true;
+        enterMultiplayer(data.room_id, data.game_state);
+        showToast(`Viendo la sala ${data.room_id}`);
+    });
+
+    socket.on('room_closed', (data) => {
+        roomState = null;
+        showToast(`La sala ${data.room_id} se cerro`);
+    });
+
     socket.on('error', (data) => {
         showToast(`Error: ${data.message}`);
     });
@@ -324,7 +324,9 @@ async function updateAdvice() {
     try {
         const data = await fetchData('/api/probability', null, 'GET');
         if (!data || !data.recommendation) return;
-        document.getElementById('ai-advice').innerHTML = `<strong>Sugerencia:</strong> ${data.recommendation}`;
+        const index = data.index_play ? ` <small>(jugada índice ${data.index_play.name})</small>` : '';
+        const insurance = data.insurance ? ' <small>Seguro recomendado</small>' : '';
+        document.getElementById('ai-advice').innerHTML = `<strong>Sugerencia:</strong> ${data.recommendation}${index}${insurance}`;
         document.getElementById('prob-hit').innerText = (data.hit_win_rate * 100).toFixed(1) + "%";
         document.getElementById('prob-stand').innerText = (data.stand_win_rate * 100).toFixed(1) + "%";
         updateQValues();
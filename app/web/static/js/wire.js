@@ -0,0 +1,129 @@
+// Decoder for the compact room-state wire format (see app/core/wire.py).
+// Messages arrive as MessagePack bytes (or plain arrays when the server has no
+// MessagePack library): ['S', state] snapshots and ['P', base, version, ops]
+// patches of the compact state.
+
+export const WIRE_FORMAT = 'compact';
+
+const RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A'];
+const SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades'];
+const VALUES = { J: 10, Q: 10, K: 10, A: 11 };
+const HAND_FLAGS = ['is_ai', 'busted', 'standing', 'withdrawn', 'is_double'];
+const STAT_KEYS = [
+    'rounds_played', 'player_wins', 'ai_wins', 'ai_decisions_total',
+    'ai_decisions_correct', 'player_decisions_total', 'player_decisions_correct',
+];
+const HISTORY_KEYS = ['player', 'action', 'reason', 'prob_hit', 'count', 'difficulty'];
+
+// Card objects are immutable; build the 52 of them once.
+const CARDS = Array.from({ length: 52 }, (_, code) => {
+    const rank = RANKS[code % 13];
+    return { rank, suit: SUITS[Math.floor(code / 13)], value: VALUES[rank] || Number(rank) };
+});
+
+// -- MessagePack (the subset the server emits) ------------------------------
+
+const textDecoder = new TextDecoder();
+
+function unpack(buffer) {
+    const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let pos = 0;
+
+    const str = (len) => {
+        const s = textDecoder.decode(bytes.subarray(pos, pos + len));
+        pos += len;
+        return s;
+    };
+    const array = (len) => {
+        const out = new Array(len);
+        for (let i = 0; i < len; i++) out[i] = read();
+        return out;
+    };
+    const map = (len) => {
+        const out = {};
+        for (let i = 0; i < len; i++) {
+            const key = read();
+            out[key] = read();
+        }
+        return out;
+    };
+    const u8 = () => view.getUint8(pos++);
+    const u16 = () => { const v = view.getUint16(pos); pos += 2; return v; };
+    const u32 = () => { const v = view.getUint32(pos); pos += 4; return v; };
+
+    function read() {
+        const b = u8();
+        if (b <= 0x7f) return b;
+        if (b >= 0xe0) return b - 0x100;
+        if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+        if ((b & 0xf0) === 0x90) return array(b & 0x0f);
+        if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+        let v;
+        switch (b) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: v = bytes.slice(pos + 1, pos + 1 + bytes[pos]); pos += 1 + v.length; return v;
+            case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+            case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+            case 0xcc: return u8();
+            case 0xcd: return u16();
+            case 0xce: return u32();
+            case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+            case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+            case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+            case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+            case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+            case 0xd9: return str(u8());
+            case 0xda: return str(u16());
+            case 0xdb: return str(u32());
+            case 0xdc: return array(u16());
+            case 0xdd: return array(u32());
+            case 0xde: return map(u16());
+            case 0xdf: return map(u32());
+        }
+        throw new Error(`Unsupported MessagePack byte 0x${b.toString(16)}`);
+    }
+
+    return read();
+}
+
+// -- compact state -> get_state() shape ------------------------------------
+
+function expandHand([owner, playerId, flags, codes, value, balance, bet]) {
+    const hand = {
+        owner, player_id: playerId, cards: codes.map((code) => CARDS[code]),
+        value, balance, bet,
+    };
+    HAND_FLAGS.forEach((name, bit) => { hand[name] = Boolean(flags & (1 << bit)); });
+    return hand;
+}
+
+function zip(keys, values) {
+    const out = {};
+    keys.forEach((key, i) => { out[key] = values[i]; });
+    return out;
+}
+
+export function expandState(state) {
+    const [version, players, dealer, idx, count, suggestion, gameOver, waiting,
+        message, stats, history] = state;
+    return {
+        players: players.map(expandHand),
+        dealer_hand: expandHand(dealer),
+        current_player_idx: idx,
+        count,
+        suggestion,
+        game_over: gameOver,
+        waiting_for_bets: waiting,
+        message,
+        stats: zip(STAT_KEYS, stats),
+        decision_history: history.map((entry) => zip(HISTORY_KEYS, entry)),
+        version,
+    };
+}
+
+export function decodeMessage(data) {
+    return Array.isArray(data) ? data : unpack(data);
+}
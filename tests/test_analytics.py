@@ -0,0 +1,31 @@
+from app.ai.analytics import StrategyAnalytics
+from app.ai.qlearning import QLearningAgent
+
+
+def _analytics(tmp_path):
+    agent = QLearningAgent(epsilon=0.0, model_path=str(tmp_path / 'q_table_test.json'))
+    return agent, StrategyAnalytics(agent)
+
+
+def test_artifact_is_reused_while_version_is_unchanged(tmp_path):
+    agent, analytics = _analytics(tmp_path)
+    first = analytics.artifact()
+    assert analytics.artifact() is first
+    assert len(first['heatmap']['heatmap']) == 18
+    assert analytics.details(15, 10) == agent.get_strategy_details(15, 10)
+
+
+def test_learning_invalidates_artifact_and_etag(tmp_path):
+    agent, analytics = _analytics(tmp_path)
+    before = analytics.artifact()
+    agent.learn((16, 10, 0), action=1, reward=1, next_state=(18, 10, 0), done=True)
+    after = analytics.artifact()
+    assert after is not before
+    assert after['etag'] != before['etag']
+    assert after['details'][(16, 10)]['Neutral']['q_hit'] > 0
+
+
+def test_etag_is_stable_across_instances(tmp_path):
+    _, first = _analytics(tmp_path)
+    _, second = _analytics(tmp_path)
+    assert first.artifact()['etag'] == second.artifact()['etag']
@@ -0,0 +1,85 @@
+from flask import Flask
+
+from app.data.game_store import GameStore
+from app.data.identity import Identity, IdentityCache
+from app.data.write_behind import WriteBehindQueue
+from app.web.controllers.api import api_bp
+
+
+def _client(tmp_path, user_id=1):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(api_bp, url_prefix='/api')
+    history = []
+    app.extensions['game_store'] = GameStore(path=str(tmp_path / 'games.db'), flush_interval=0)
+    app.extensions['balance_writer'] = WriteBehindQueue(lambda rows: None, interval=0)
+    app.extensions['history_writer'] = WriteBehindQueue(history.extend, interval=0)
+    app.extensions['identities'] = IdentityCache(loader=lambda uid: Identity(uid, 'ana', 1000), ttl=0)
+    client = app.test_client()
+    if user_id is not None:
+        with client.session_transaction() as s:
+            s['user_id'] = user_id
+    return client, app, history
+
+
+def test_stale_version_is_rejected_and_unchanged_state_is_304(tmp_path):
+    client, _, _ = _client(tmp_path)
+    started = client.post('/api/start', json={'num_ai': 0})
+    etag, version = started.headers['ETag'], started.get_json()['version']
+
+    assert client.get('/api/state', headers={'If-None-Match': etag}).status_code == 304
+    assert client.post('/api/bet', json={'amount': 10, 'expected_version': version - 1}).status_code == 409
+    conflict = client.post('/api/bet', json={'amount': 10}, headers={'If-Match': '"stale-0"'})
+    assert conflict.status_code == 409 and conflict.get_json()['version'] == version
+    assert conflict.headers['ETag'] == etag
+
+    placed = client.post('/api/bet', json={'amount': 10}, headers={'If-Match': etag})
+    assert placed.status_code == 200 and placed.headers['ETag'] != etag
+    assert client.get('/api/state', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_batch_runs_in_order_and_stops_at_the_first_failure(tmp_path):
+    client, _, _ = _client(tmp_path)
+    response = client.post('/api/batch', json={
+        'actions': [{'action': 'start', 'num_ai': 0}, {'action': 'bet', 'amount': 20}, 'shuffle', 'stand'],
+    })
+    body = response.get_json()
+    assert [(r['action'], r['ok']) for r in body['results']] == [('start', True), ('bet', True), ('shuffle', False)]
+    assert body['results'][2]['error'] == 'Unknown action'
+    versions = [r['version'] for r in body['results'][:2]]
+    assert versions == sorted(versions) and body['state']['version'] == versions[-1]
+    assert response.headers['ETag'].endswith(f"-{versions[-1]}\"")
+    assert client.get('/api/state', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    anonymous, _, _ = _client(tmp_path, user_id=None)
+    body = anonymous.post('/api/batch', json={'actions': ['start', 'hit']}).get_json()
+    assert body['results'] == [{'action': 'start', 'ok': False, 'status': 401, 'error': 'Unauthorized'}]
+
+
+def test_batch_returns_the_401_of_a_start_for_a_deleted_user(tmp_path):
+    client, app, _ = _client(tmp_path)
+    app.extensions['identities'] = IdentityCache(loader=lambda uid: None, ttl=0)
+    response = client.post('/api/batch', json={'actions': ['start', 'hit']})
+    assert response.status_code == 401
+    assert response.get_json() == {'error': 'User not found, re-login required'}
+    with client.session_transaction() as s:
+        assert 'game_id' not in s and 'user_id' not in s
+
+
+def test_batch_checks_expected_version(tmp_path):
+    client, _, _ = _client(tmp_path)
+    version = client.post('/api/start', json={'num_ai': 0}).get_json()['version']
+    stale = client.post('/api/batch', json={'actions': ['hit'], 'expected_version': version + 5})
+    assert stale.status_code == 409 and stale.get_json()['version'] == version
+    ok = client.post('/api/batch', json={'actions': [{'action': 'bet', 'amount': 10}], 'expected_version': version})
+    assert ok.status_code == 200 and ok.get_json()['results'][0]['ok']
+
+
+def test_batch_records_each_round_settled_before_a_new_start(tmp_path):
+    client, app, history = _client(tmp_path)
+    round_ = [{'action': 'start', 'num_ai': 0}, {'action': 'bet', 'amount': 10}, 'stand']
+    body = client.post('/api/batch', json={'actions': round_ + round_}).get_json()
+    assert all(r['ok'] for r in body['results']) and body['state']['game_over']
+    app.extensions['history_writer'].flush()
+    assert len(history) == 2
+    assert all(row['bet'] == 10 and row['player_id'] == 1 for _, row in history)
@@ -0,0 +1,84 @@
+import time
+
+from app.ai.basic_strategy import basic_action, hand_total
+from app.core.cards import Card
+from app.core.game import BlackJackGame, Hand
+from app.sim.autoplay import AutoplayJobs, autoplay, medium_policy
+
+
+def _cards(*ranks):
+    return [Card(rank, 'Hearts') for rank in ranks]
+
+
+def test_hand_total_detects_soft_hands():
+    assert hand_total(_cards('A', '6')) == (17, True)
+    assert hand_total(_cards('A', '6', '9')) == (16, False)
+
+
+def test_basic_strategy_chart_samples():
+    assert basic_action(_cards('8', '8'), 10) == 'P'
+    assert basic_action(_cards('K', 'K'), 6) == 'S'
+    assert basic_action(_cards('6', '5'), 10) == 'D'
+    assert basic_action(_cards('10', '6'), 10) == 'H'
+    assert basic_action(_cards('10', '3'), 2) == 'S'
+    assert basic_action(_cards('A', '7'), 4) == 'D'
+    assert basic_action(_cards('A', '7'), 4, can_double=False) == 'S'
+
+
+def test_medium_policy_compares_exact_shoe_win_rates():
+    game = BlackJackGame(num_decks=6, track_accuracy=False)
+    game.dealer_hand.cards = _cards('5', '10')
+    for ranks, action in ((('10', '9'), 'S'), (('4', '3'), 'H')):
+        hand = Hand('seat')
+        for card in _cards(*ranks):
+            hand.add_card(card)
+        assert medium_policy(game, hand) == action
+
+
+def test_autoplay_summary_is_consistent():
+    events = list(autoplay(policy='basic', rounds=200, bet=10, progress_every=50))
+    progress, summary = events[:-1], events[-1]
+    assert [e['rounds'] for e in progress] == [50, 100, 150]
+    assert summary['type'] == 'summary' and summary['rounds'] == 200
+    assert summary['wins'] + summary['losses'] + summary['pushes'] == summary['hands'] >= 200
+    assert summary['bankroll_curve'][-1] == summary['bankroll']
+    assert abs(summary['ev_per_hand'] * 200 * 10 - (summary['bankroll'] - summary['bankroll_curve'][0])) < 1e-6
+    assert summary['rounds_per_second'] > 0
+
+
+def test_autoplay_stops_when_bankroll_runs_out():
+    summary = list(autoplay(policy='easy', rounds=10000, bet=10, bankroll=20))[-1]
+    assert summary['ruined'] is True and summary['bankroll'] < 10
+
+
+def test_jobs_stream_events_and_respect_the_slot_limit():
+    jobs = AutoplayJobs(max_jobs=1)
+    run = jobs.submit(policy='easy', rounds=5000, bet=10)
+    assert jobs.submit(policy='easy', rounds=50, bet=10) is None
+    received = []
+    while True:
+        event = run.events.get(timeout=10)
+        if event is None:
+            break
+        received.append(event)
+    assert received[-1]['type'] == 'summary'
+    metrics = jobs.metrics()
+    assert metrics['rejected'] == 1
+    jobs.close()
+
+
+def test_cancelled_run_stops_and_frees_its_slot():
+    jobs = AutoplayJobs(max_jobs=1, max_events=2)
+    run = jobs.submit(policy='easy', rounds=100000, bet=10, progress_every=1)
+    first = run.events.get(timeout=10)
+    assert first['type'] == 'progress'
+    time.sleep(0.2)
+    assert run.events.full()  # the reader stalled: the run waits instead of buffering
+    run.cancel()
+    deadline = time.time() + 10
+    while jobs.metrics()['running'] and time.time() < deadline:
+        time.sleep(0.01)
+    metrics = jobs.metrics()
+    assert metrics['cancelled'] == 1 and metrics['running'] == 0
+    assert jobs.submit(policy='easy', rounds=10, bet=10) is not None
+    jobs.close()
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.ai import betting
+from app.ai.counter import CardCounter
+from app.ai.betting import get_ramp, make_ramp, simulate_bankrolls
+from app.core.game import BlackJackGame
+from app.sim.engine import make_bet_rule, simulate
+
+
+def test_ramps_size_bets_from_the_count():
+    assert get_ramp()(1234, 5.0) == max(10, int(1234 * 0.1))  # the AI seats' historic rule
+    assert make_ramp('flat:25')(1000, 9) == 25
+    spread = make_ramp('spread:4')
+    assert [spread(1000, tc) for tc in (-3, 1.4, 2.6, 4, 12)] == [10, 10, 20, 30, 40]
+    kelly = make_ramp('kelly:0.5')
+    assert kelly(1000, -2) == 10
+    assert kelly(100000, 4) > kelly(100000, 2) > 10
+    with pytest.raises(ValueError):
+        make_ramp('martingale')
+    with pytest.raises(ValueError):
+        make_ramp('kelly:half')
+
+
+def test_vector_and_scalar_bets_agree():
+    balances = np.array([50.0, 1000.0, 20000.0, 300000.0])
+    counts = np.array([-4, 0, 3, 7])
+    for spec in ('flat:10', 'fraction:0.1', 'spread:8', 'kelly:0.5'):
+        ramp = make_ramp(spec)
+        vector = ramp.amounts(balances, counts)
+        assert list(vector) == [ramp(b, tc) for b, tc in zip(balances, counts)], spec
+
+
+def test_simulated_bankrolls_grow_or_go_broke():
+    winning = (np.zeros(100, dtype=np.int8), np.ones(100, dtype=np.float32))
+    losing = (np.zeros(100, dtype=np.int8), -np.ones(100, dtype=np.float32))
+    up = simulate_bankrolls(['flat:10', 'fraction:0.1'], paths=50, rounds=20, samples=winning, seed=1)
+    assert up['flat:10']['median_final_bankroll'] == 1200 and up['flat:10']['risk_of_ruin'] == 0
+    assert up['fraction:0.1']['growth_per_round'] == pytest.approx(np.log(1.1), rel=1e-3)
+    down = simulate_bankrolls(['flat:100'], paths=50, rounds=20, samples=losing, seed=1)['flat:100']
+    assert down['risk_of_ruin'] == 1 and down['median_rounds_to_ruin'] == 10
+    assert down['growth_per_round'] is None and down['mean_bet'] == 100
+
+    mixed = (np.zeros(100, dtype=np.int8), np.linspace(-1, 1, 100, dtype=np.float32))
+    same = simulate_bankrolls(['fraction:0.1', 'ai'], paths=200, rounds=50, samples=mixed, seed=2)
+    assert same['fraction:0.1']['mean_final_bankroll'] == same['ai']['mean_final_bankroll']  # shared draws
+
+
+def test_engine_and_game_use_count_ramps():
+    result = simulate(2000, bet='kelly:0.5', seed=4)
+    assert result['rounds'] == 2000 and result['wagered'] >= 2000 * 10
+    assert make_bet_rule('spread:8').ramp.units == 8
+
+    game = BlackJackGame()
+    game.bet_ramp = 'spread:8'
+    game.counter.running_count = 24  # six decks left: true count +4
+    game.start_new_round(num_ai=2)
+    assert [p.current_bet for p in game.players if p.is_ai] == [30, 30]
+    game.counter = CardCounter('zen', num_decks=6)  # not on the ramps' Hi-Lo scale
+    game.counter.running_count = 48
+    game.start_new_round(num_ai=2)
+    assert [p.current_bet for p in game.players if p.is_ai] == [10, 10]
+
+    betting.configure(default='flat:15')
+    try:
+        game.bet_ramp = None
+        game.start_new_round(num_ai=2)
+        assert [p.current_bet for p in game.players if p.is_ai] == [15, 15]
+    finally:
+        betting.configure(default=betting.DEFAULT_RAMP)
@@ -0,0 +1,95 @@
+import pickle
+
+from app.core.cards import Card, Deck
+from app.core.codec import HAND_FLAGS, HAND_SCHEMA_VERSION, encode_hand
+from app.core.game import BlackJackGame, Hand
+
+
+def _played_game():
+    game = BlackJackGame()
+    game.start_new_round(num_ai=2)
+    game.players[0].place_bet(50)
+    game.confirm_bets()
+    return game
+
+
+def test_card_and_hand_are_slotted():
+    assert not hasattr(Card('A', 'Spades'), '__dict__')
+    assert not hasattr(Hand(), '__dict__')
+
+
+def test_card_code_round_trip():
+    card = Card('Q', 'Clubs')
+    assert Card.from_code(card.code).rank == 'Q'
+    assert Card.from_code(card.code).suit == 'Clubs'
+    assert pickle.loads(pickle.dumps(card)) is Card.from_code(card.code)
+
+
+def test_hand_round_trip_preserves_fields():
+    hand = Hand("Ana", balance=730, player_id='sid-1')
+    hand.add_card(Card('A', 'Hearts'))
+    hand.add_card(Card('K', 'Spades'))
+    hand.current_bet = 40
+    hand.initial_bet = 20
+    hand.is_double_down = True
+
+    clone = pickle.loads(pickle.dumps(hand))
+    assert clone.to_dict() == hand.to_dict()
+    assert clone.initial_bet == 20
+    assert encode_hand(clone)[0] == HAND_SCHEMA_VERSION
+
+
+def test_game_pickle_round_trip():
+    game = _played_game()
+    clone = pickle.loads(pickle.dumps(game))
+    assert clone.get_state() == game.get_state()
+    assert [c.code for c in clone.deck.cards] == [c.code for c in game.deck.cards]
+
+
+def test_empty_deck_round_trip():
+    deck = Deck()
+    deck.cards = []
+    assert pickle.loads(pickle.dumps(deck)).remaining() == 0
+
+
+def test_legacy_dict_state_is_migrated():
+    hand = Hand.__new__(Hand)
+    hand.__setstate__({
+        'owner_name': 'Fran', 'cards': [Card('A', 'Spades'), Card('6', 'Spades')],
+        'value': 17, 'balance': 990, 'current_bet': 10,
+    })
+    assert hand.value == 17
+    assert hand.balance == 990
+    assert hand.initial_bet == 0
+    assert hand.is_ai is False and hand.split_pair_value is None
+
+    deck = Deck.__new__(Deck)
+    deck.__setstate__({'cards': [Card('2', 'Hearts')]})
+    assert deck.remaining() == 1
+
+
+def test_split_hands_share_one_account_across_pickling():
+    game = _played_game()
+    human = game.players[0]
+    human.cards = [Card('8', 'Hearts'), Card('8', 'Spades')]
+    human.calculate()
+    game.player_split()
+    clone = pickle.loads(pickle.dumps(game))
+    first, second = clone.players[0], clone.players[1]
+    assert first.account is second.account
+    first.balance -= 5
+    assert second.balance == first.balance
+
+
+def test_schema_2_hands_are_relinked_by_the_game():
+    v2 = (2, 'Ana', None, 1 << HAND_FLAGS.index('is_split'), b'', 700, 10, 10, None)
+    source = Hand('Ana', balance=700)
+    split = Hand.__new__(Hand)
+    split.__setstate__(v2)
+    assert split.balance == 700 and split.is_split
+
+    game = BlackJackGame()
+    state = dict(game.__dict__, players=[source, split])
+    restored = BlackJackGame.__new__(BlackJackGame)
+    restored.__setstate__(state)
+    assert restored.players[1].account is restored.players[0].account
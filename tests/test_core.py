@@ -59,3 +59,52 @@ def test_turn_advances_through_ai_to_dealer():
     assert len(game.players) == 3
     game.player_stand()
     assert game.game_over is True
+
+
+def test_settled_round_reports_per_hand_results():
+    game = _new_game(num_ai=1)
+    game.player_stand()
+    outcomes = {r['owner']: r for r in game.round_results}
+    assert set(outcomes) == {'Human', 'AI_1'}
+    assert outcomes['Human']['outcome'] in ('win', 'loss', 'draw')
+    assert outcomes['Human']['bet'] == 100
+    game.start_new_round()
+    assert game.round_results == []
+
+
+def test_version_tracks_state_changes():
+    game = BlackJackGame()
+    assert game.get_state()['version'] == 0
+    game.start_new_round(num_ai=0)
+    game.players[0].place_bet(10)
+    game.confirm_bets()
+    dealt = game.version
+    assert dealt > 0
+    game.player_stand()
+    finished = game.version
+    assert finished > dealt
+    game.player_hit()  # no-op once the round is over
+    assert game.version == finished
+
+
+def test_split_hands_do_not_carry_into_next_round():
+    from app.core.cards import Card
+    game = _new_game()
+    player = game.players[0]
+    player.cards = [Card('8', 'Hearts'), Card('8', 'Spades')]
+    player.calculate()
+    game.player_split()
+    assert len(game.players) == 2
+    game.start_new_round(num_ai=0)
+    assert len(game.players) == 1 and game.players[0] is player
+
+
+def test_players_with_the_same_name_keep_separate_balances():
+    game = BlackJackGame()
+    game.add_player("Player", balance=500)
+    game.add_player("Player", balance=800)
+    game.start_new_round(num_ai=0)
+    first, second = game.players
+    first.place_bet(100)
+    second.place_bet(50)
+    assert (first.balance, second.balance) == (400, 750)
@@ -30,3 +30,71 @@ def test_suggestion_thresholds():
     assert 'High' in counter.get_suggestion() or 'Aggressive' in counter.get_suggestion()
     counter.running_count = -5
     assert 'Low' in counter.get_suggestion() or 'Conservative' in counter.get_suggestion()
+
+
+def test_systems_balance_over_a_full_shoe():
+    from app.ai.counter import SYSTEMS
+    from app.core.cards import Deck
+    for system in SYSTEMS:
+        counter = CardCounter(system=system, num_decks=2)
+        start = counter.running_count
+        counter.update_many(Deck(num_decks=2).cards)
+        drift = 8 if system == 'ko' else 0  # KO gains 4 per deck
+        assert counter.running_count - start == drift
+        assert counter.cards_remaining == 0
+        assert abs(counter.true_count) < 1e-9
+
+
+def test_true_count_uses_exact_cards_remaining():
+    from app.core.cards import Deck
+    deck = Deck(num_decks=6)
+    counter = CardCounter(num_decks=6)
+    for _ in range(78):
+        counter.update(deck.deal())
+    assert counter.cards_remaining == deck.remaining() == 234
+    assert counter.true_count == counter.running_count / 4.5
+    assert counter.get_true_count() == counter.true_count
+
+
+def test_bulk_update_matches_single_updates():
+    cards = [Card(r, 'Spades') for r in ['2', '4', '9', 'K', 'A', '6', '7']]
+    one, many = CardCounter(system='zen'), CardCounter(system='zen')
+    for card in cards:
+        one.update(card)
+    many.update_many(cards)
+    assert (one.running_count, one.true_count) == (many.running_count, many.true_count)
+    assert many.running_count == 1 + 2 + 0 - 2 - 1 + 2 + 1
+
+
+def test_unknown_system_is_rejected():
+    import pytest
+    with pytest.raises(ValueError):
+        CardCounter(system='wong_halves')
+
+
+def test_counter_pickles_and_migrates_legacy_state():
+    import pickle
+    counter = CardCounter(system='omega_2', num_decks=6)
+    counter.update(Card('5', 'Clubs'))
+    restored = pickle.loads(pickle.dumps(counter))
+    assert (restored.system, restored.running_count, restored.cards_remaining) == ('omega_2', 2, 311)
+
+    legacy = CardCounter.__new__(CardCounter)
+    legacy.__setstate__({'running_count': 3, 'total_cards_dealt': 12})
+    assert legacy.system == 'hi_lo'
+    assert legacy.running_count == 3 and legacy.cards_remaining == 300
+
+
+def test_configured_system_applies_to_new_games():
+    import pytest
+    from app.ai import counter as counter_module
+    from app.core.game import BlackJackGame
+    counter_module.configure('ko')
+    try:
+        assert BlackJackGame(num_decks=2).counter.system == 'ko'
+        assert CardCounter(system='zen').system == 'zen'
+        with pytest.raises(ValueError):
+            counter_module.configure('red_seven')
+    finally:
+        counter_module.configure(counter_module.DEFAULT_SYSTEM)
+    assert BlackJackGame().counter.system == 'hi_lo'
@@ -0,0 +1,72 @@
+from app.ai.counter import CardCounter
+from app.ai.deviations import PLAYS, DeviationTable, fit_index, generate
+from app.core.cards import Card
+from app.core.game import BlackJackGame, Hand
+
+
+def _cards(*ranks):
+    return [Card(rank, 'Hearts') for rank in ranks]
+
+
+def test_default_indices_apply_in_their_direction(tmp_path):
+    table = DeviationTable.load(str(tmp_path / 'missing.json'))
+    assert table.lookup(16, False, None, 10, 0.2) == ("16 vs 10", 'S', 0)
+    assert table.lookup(16, False, None, 10, -0.6) is None
+    assert table.lookup(12, False, None, 4, -1.4) == ("12 vs 4", 'H', -1)
+    assert table.lookup(12, False, None, 4, 0) is None
+    assert table.decide(_cards('K', 'K'), 6, 4.1) == ('P', "10,10 vs 6")
+    assert table.decide(_cards('K', 'K'), 6, 4.1, can_split=False) == ('S', None)
+    assert table.take_insurance(3) and not table.take_insurance(2.4)
+
+
+def test_fit_index_finds_the_crossing_and_its_direction():
+    rising = {tc: [1000, 1000 * 0.05 * (tc - 2), 0.0] for tc in range(-4, 8)}
+    falling = {tc: [1000, 1000 * 0.05 * (-1 - tc), 0.0] for tc in range(-4, 8)}
+    assert fit_index(rising) == (2, '>=')
+    assert fit_index(falling) == (-1, '<=')
+    assert fit_index({tc: [1000, 0.0, 0.0] for tc in range(-4, 8)}) == (None, None)
+    assert fit_index({0: [10, 5.0, 0.0], 1: [10, 8.0, 0.0]}) == (None, None)
+
+
+def test_generated_indices_are_plausible():
+    artifact = generate(trials=20000, plays=PLAYS[:1], seed=11)
+    [(name, total, soft, pair, upcard, basic, deviation, index, direction)] = artifact['plays']
+    assert (name, total, upcard, basic, deviation, direction) == ("16 vs 10", 16, 10, 'H', 'S', '>=')
+    assert -2 <= index <= 3
+    assert 2 <= artifact['insurance'] <= 4
+
+
+def test_shipped_table_and_hard_ai_use_index_plays():
+    table = DeviationTable.load()
+    assert table.system == 'hi_lo'
+    _, action, _, at_or_above = table.plays[(16, False, None, 10)]
+    assert action == 'S' and at_or_above
+    _, action, _, at_or_above = table.plays[(12, False, None, 4)]
+    assert action == 'H' and not at_or_above
+
+    game = BlackJackGame(num_decks=6, track_accuracy=False)
+    game.dealer_hand.cards = _cards('5', '10')
+    player = Hand('bot', is_ai=True, player_id='bot')
+    for card in _cards('10', '6'):
+        player.add_card(card)
+    game.counter.running_count = 60  # true count ~ +10
+    game.ai_turn(player)
+    assert player.standing and len(player.cards) == 2
+    assert game.decision_history[-1]['reason'] == "Index Play"
+
+
+def test_counts_from_another_system_match_no_index_play(tmp_path):
+    table = DeviationTable.load(str(tmp_path / 'missing.json'))
+    assert table.lookup(16, False, None, 10, 4, system='hi_lo') is not None
+    assert table.lookup(16, False, None, 10, 4, system='zen') is None
+    assert not table.take_insurance(6, system='zen')
+
+    game = BlackJackGame(num_decks=6, track_accuracy=False)
+    game.counter = CardCounter('zen', num_decks=6)
+    game.dealer_hand.cards = _cards('5', '10')
+    player = Hand('bot', is_ai=True, player_id='bot')
+    for card in _cards('10', '6'):
+        player.add_card(card)
+    game.counter.running_count = 120
+    game.ai_turn(player)
+    assert all(entry['reason'] != "Index Play" for entry in game.decision_history)
@@ -0,0 +1,73 @@
+import random
+
+from app.sim.engine import (
+    ACE, FlatBet, RunningStats, Seat, Table, basic_policy, make_bet_rule, simulate,
+)
+
+TEN, NINE, EIGHT, SEVEN = 8, 7, 6, 5  # rank indices into RANKS
+
+
+def _table(policy=basic_policy, insurance=False):
+    seat = Seat(policy, FlatBet(10), balance=1000, insurance=insurance)
+    return Table([seat], rng=random.Random(0)), seat
+
+
+def _rig(table, ranks):
+    # Cards are popped from the end; padding keeps the shoe above the reshuffle mark.
+    table.shoe = [0] * 30 + list(reversed(ranks))
+
+
+def test_natural_pays_three_to_two():
+    table, seat = _table()
+    _rig(table, [ACE, NINE, TEN, EIGHT])  # player A,10 vs dealer 9,8
+    table.play_round()
+    assert seat.balance == 1015
+    assert table.counts['blackjacks'] == 1
+
+
+def test_split_aces_follow_the_games_payouts():
+    split_pairs = lambda hand, up, t: 'P' if hand.pair_value else 'S'
+    table, seat = _table(split_pairs)
+    # Player A,A vs dealer 10,7; each ace draws a ten. As in ``determine_winners``
+    # only the hand created by the split loses the 3:2 natural payout.
+    _rig(table, [ACE, TEN, ACE, SEVEN, TEN, TEN])
+    table.play_round()
+    assert seat.balance == 1000 - 20 + 25 + 20
+    assert table.counts['splits'] == 1 and table.counts['hands'] == 2
+
+
+def test_insurance_pays_against_dealer_blackjack():
+    table, seat = _table(insurance=True)
+    _rig(table, [TEN, TEN, NINE, ACE])  # player 19 vs dealer 10,A
+    table.play_round()
+    # -10 bet, -5 insurance, +15 insurance payout
+    assert seat.balance == 1000 - 10 - 5 + 15
+
+
+def test_running_stats_merge_matches_single_pass():
+    values = [random.gauss(0, 1) for _ in range(500)]
+    whole, left, right = RunningStats(), RunningStats(), RunningStats()
+    for v in values:
+        whole.add(v)
+    for v in values[:123]:
+        left.add(v)
+    for v in values[123:]:
+        right.add(v)
+    left.merge(right)
+    assert left.n == whole.n
+    assert abs(left.mean - whole.mean) < 1e-12 and abs(left.std - whole.std) < 1e-9
+
+
+def test_simulate_is_reproducible_and_reports_an_interval():
+    first = simulate(2000, seed=7)
+    assert first == {**simulate(2000, seed=7), 'elapsed': first['elapsed'],
+                     'rounds_per_second': first['rounds_per_second']}
+    low, high = first['edge_ci95']
+    assert low <= first['edge'] <= high
+    assert first['net'] == round(first['edge'] * first['wagered'])
+
+
+def test_ai_bet_rule_is_ten_percent_with_a_floor():
+    rule = make_bet_rule('ai')
+    assert rule(1000, None) == 100
+    assert rule(50, None) == 10
@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+
+from app.core.game import BlackJackGame
+from app.data.game_store import GameStore
+
+
+def _store(tmp_path, **kwargs):
+    kwargs.setdefault('flush_interval', 0)
+    return GameStore(path=str(tmp_path / 'games.db'), **kwargs)
+
+
+def _game(bet=25):
+    game = BlackJackGame()
+    game.start_new_round(num_ai=1)
+    game.players[0].place_bet(bet)
+    game.confirm_bets()
+    return game
+
+
+def test_put_is_write_behind_until_flush(tmp_path):
+    store = _store(tmp_path)
+    store.put('g1', _game())
+    assert store.metrics()['dirty'] == 1
+    assert store.metrics()['writes'] == 0
+    assert store.flush() == 1
+    assert store.metrics()['dirty'] == 0
+    assert store.flush() == 0
+
+
+def test_games_survive_a_restart(tmp_path):
+    game = _game(bet=40)
+    store = _store(tmp_path)
+    store.put('g1', game)
+    store.close()
+
+    reopened = _store(tmp_path)
+    loaded = reopened.get('g1')
+    assert loaded is not None
+    assert loaded.get_state() == game.get_state()
+    assert reopened.get('missing') is None
+
+
+def test_lru_eviction_writes_dirty_games_first(tmp_path):
+    store = _store(tmp_path, max_entries=2)
+    for game_id in ('a', 'b', 'c'):
+        store.put(game_id, _game())
+    metrics = store.metrics()
+    assert metrics['cached'] == 2
+    assert metrics['evictions'] == 1
+    assert metrics['writes'] == 1
+    # The evicted game is reloaded from SQLite rather than lost.
+    assert store.get('a') is not None
+    assert store.metrics()['loads'] == 1
+
+
+def test_expire_purges_stale_rows(tmp_path):
+    store = _store(tmp_path, ttl=-1)
+    store.put('old', _game())
+    store.flush()
+    assert store.expire() == 1
+
+
+def test_flush_writes_outside_the_store_lock(tmp_path):
+    store = _store(tmp_path)
+    store.put('g1', _game())
+    writing, release = threading.Event(), threading.Event()
+
+    class SlowConnection:
+        def __init__(self, conn):
+            self._conn = conn
+
+        def __getattr__(self, name):
+            return getattr(self._conn, name)
+
+        def __enter__(self):
+            return self._conn.__enter__()
+
+        def __exit__(self, *exc):
+            return self._conn.__exit__(*exc)
+
+        def executemany(self, *args):
+            writing.set()
+            release.wait(5)
+            raise sqlite3.OperationalError('database is locked')
+
+    real = store._conn
+    store._conn = SlowConnection(real)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert writing.wait(5)
+    store.put('g2', _game())  # not blocked by the write in progress
+    assert store.get('g1') is not None
+    release.set()
+    flusher.join(5)
+    store._conn = real
+    assert store.metrics()['errors'] == 1
+    assert store.flush() == 2  # the failed row was marked dirty again
+
+
+def test_delete_during_flush_is_not_revived(tmp_path):
+    store = _store(tmp_path)
+    store.put('g1', _game())
+    store.delete('g1')
+    store._write([('g1', b'stale', 0.0)])  # a snapshot taken before the delete
+    assert store.get('g1') is None
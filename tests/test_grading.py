@@ -0,0 +1,78 @@
+import pickle
+
+from app.ai import factory
+from app.ai.grading import DecisionGrader, grade, snapshot
+from app.ai.montecarlo import MonteCarloSimulator
+from app.core.cards import Card, Deck
+from app.core.game import BlackJackGame, Hand
+
+
+def _hand(*ranks):
+    hand = Hand()
+    for rank in ranks:
+        hand.add_card(Card(rank, 'Clubs'))
+    return hand
+
+
+def test_grade_prefers_standing_on_twenty():
+    sim = MonteCarloSimulator(num_simulations=200)
+    snap_stand = snapshot(_hand('K', 'Q'), Card('7', 'Hearts'), Deck(6), 0)
+    snap_hit = snapshot(_hand('K', 'Q'), Card('7', 'Hearts'), Deck(6), 1)
+    assert grade(snap_stand, sim) is True
+    assert grade(snap_hit, sim) is False
+
+
+def test_snapshot_is_compact():
+    codes, upcard, counts, action = snapshot(_hand('5', '6'), Card('9', 'Spades'), Deck(6), 1)
+    assert len(codes) == 2 and sum(counts) == 312 and len(counts) == 13 and action == 1
+
+
+def test_grader_results_are_collected_once():
+    grader = DecisionGrader(MonteCarloSimulator(num_simulations=20))
+    ticket = grader.submit(snapshot(_hand('K', 'Q'), Card('7', 'Hearts'), Deck(1), 0))
+    grader.drain()
+    results, pending = grader.collect([ticket, 'unknown-1'])
+    assert list(results) == [ticket] and pending == []
+    assert grader.collect([ticket]) == ({}, [])
+
+
+def test_moves_are_graded_off_the_action_path():
+    factory.reset()
+    game = BlackJackGame()
+    game.start_new_round(num_ai=0)
+    game.players[0].place_bet(10)
+    game.confirm_bets()
+    game.player_stand()
+    # The stand returned without scoring; the grade is in flight (or just landed).
+    assert game.stats['player_decisions_total'] + len(game.pending_grades) == 1
+
+    factory.get_grader().drain()
+    game.fold_grades()
+    assert game.stats['player_decisions_total'] == 1
+    assert game.pending_grades == []
+
+
+def test_a_restored_game_never_collects_another_games_grade():
+    factory.reset()
+    restored = BlackJackGame()
+    restored.start_new_round(num_ai=0)
+    restored.players[0].place_bet(10)
+    restored.confirm_bets()
+    # Issued by the grader of a process that then restarted.
+    restored.pending_grades = [factory.get_grader().submit(
+        snapshot(_hand('K', 'Q'), Card('7', 'Hearts'), Deck(1), 0))]
+    saved = pickle.dumps(restored)
+
+    factory.reset()  # the new process's grader
+    game = BlackJackGame()
+    game.start_new_round(num_ai=0)
+    game.players[0].place_bet(10)
+    game.confirm_bets()
+    game.player_stand()
+    factory.get_grader().drain()
+
+    restored = pickle.loads(saved)
+    restored.fold_grades()
+    assert restored.stats['player_decisions_total'] == 0 and restored.pending_grades == []
+    game.fold_grades()
+    assert game.stats['player_decisions_total'] == 1
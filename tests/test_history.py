@@ -0,0 +1,46 @@
+from flask import Flask
+
+from app.data.models import (GameSession, PlayerModel, RoundHistory, bulk_update_balances, db,
+                             record_rounds)
+
+
+def _app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def _row(player_id, outcome, difficulty='HARD'):
+    return {'player_id': player_id, 'difficulty': difficulty, 'outcome': outcome,
+            'bet': 10, 'payout': 20 if outcome == 'win' else 0}
+
+
+def test_record_rounds_inserts_history_and_upserts_aggregates():
+    app = _app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(PlayerModel(id=1, name='ana'))
+        db.session.commit()
+
+        record_rounds([_row(1, 'win'), _row(1, 'loss'), _row(1, 'win', 'EASY')])
+        record_rounds([_row(1, 'draw'), _row(1, 'withdrawn')])
+
+        assert RoundHistory.query.count() == 5
+        hard = GameSession.query.filter_by(player_id=1, difficulty='HARD').one()
+        assert (hard.rounds_played, hard.wins, hard.losses, hard.draws) == (4, 1, 1, 1)
+        easy = GameSession.query.filter_by(player_id=1, difficulty='EASY').one()
+        assert (easy.rounds_played, easy.wins) == (1, 1)
+
+
+def test_bulk_update_balances_skips_missing_players():
+    app = _app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(PlayerModel(id=1, name='ana', balance=1000))
+        db.session.commit()
+
+        bulk_update_balances([(1, 5), (999, 7)])
+
+        db.session.expire_all()
+        assert db.session.get(PlayerModel, 1).balance == 5
@@ -0,0 +1,50 @@
+import time
+
+from flask import Flask
+
+from app.data.identity import Identity, IdentityCache
+
+
+def _cache(**kwargs):
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        return Identity(user_id, f"p{user_id}", 1000) if user_id < 100 else None
+
+    return IdentityCache(loader=loader, **kwargs), loads
+
+
+def test_process_cache_expires_and_evicts_least_recent():
+    cache, loads = _cache(ttl=0.05, max_entries=2)
+    assert cache.get(1) == Identity(1, 'p1', 1000)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)  # evicts 2, the least recently used
+    cache.get(2)
+    assert loads == [1, 2, 3, 2]
+    time.sleep(0.06)
+    cache.get(2)
+    assert loads[-1] == 2 and cache.metrics()['expired'] == 1
+    assert cache.get(500) is None and cache.get(500) is None
+    assert loads.count(500) == 2  # unknown players are not cached
+
+
+def test_request_memo_and_balance_write_through():
+    cache, loads = _cache(ttl=0)
+    app = Flask(__name__)
+    with app.test_request_context():
+        cache.get(7)
+        cache.get(7)
+        cache.update_balance(7, 1500)
+        assert cache.get(7).balance == 1500
+    assert loads == [7] and cache.metrics()['request_hits'] == 2
+
+    cache, loads = _cache(ttl=30)
+    cache.get(7)
+    cache.update_balance(7, 990)
+    assert cache.get(7) == Identity(7, 'p7', 990) and loads == [7]
+    cache.invalidate(7)
+    assert cache.get(7).balance == 1000 and loads == [7, 7]
+    assert cache.metrics()['invalidations'] == 1
@@ -0,0 +1,75 @@
+from flask import Flask
+
+from app.data import leaderboard
+from app.data.models import Leaderboard, db, upgrade_schema
+
+
+def _app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def _submit(name, peak):
+    return leaderboard.submit(name, peak, rounds_played=1, win_rate=50.0)
+
+
+def test_submit_keeps_each_players_best():
+    with _app().app_context():
+        db.create_all()
+        leaderboard.invalidate()
+        assert _submit('ana', 1500) is True
+        assert _submit('ana', 1200) is False
+        assert _submit('ana', 1800) is True
+        assert Leaderboard.query.count() == 1
+        assert leaderboard.top()[0]['peak_balance'] == 1800
+
+
+def test_top_is_cached_until_a_write():
+    with _app().app_context():
+        db.create_all()
+        leaderboard.invalidate()
+        _submit('ana', 1000)
+        assert [e['player_name'] for e in leaderboard.top()] == ['ana']
+        # A raw insert bypasses invalidation, so the cached answer is served.
+        db.session.add(Leaderboard(player_name='bob', peak_balance=5000, rounds_played=1, win_rate=0))
+        db.session.commit()
+        assert [e['player_name'] for e in leaderboard.top()] == ['ana']
+        _submit('cid', 2000)
+        assert [e['player_name'] for e in leaderboard.top()] == ['bob', 'cid', 'ana']
+
+
+def test_keyset_pages_cover_the_ranking_once():
+    with _app().app_context():
+        db.create_all()
+        for i in range(7):
+            _submit(f'p{i}', 1000 + (i % 3) * 100)  # ties exercise the id tiebreak
+        seen, cursor = [], None
+        while True:
+            result = leaderboard.page(after=cursor, limit=3)
+            seen.extend(e['player_name'] for e in result['entries'])
+            cursor = result['next']
+            if cursor is None:
+                break
+        expected = [e.player_name for e in leaderboard._ranked().all()]
+        assert seen == expected and len(seen) == 7
+
+
+def test_upgrade_collapses_legacy_duplicates():
+    app = _app()
+    with app.app_context():
+        db.session.execute(db.text(
+            'CREATE TABLE leaderboard (id INTEGER PRIMARY KEY, player_name VARCHAR(50) NOT NULL,'
+            ' peak_balance INTEGER NOT NULL, rounds_played INTEGER NOT NULL, win_rate FLOAT NOT NULL,'
+            ' ai_accuracy FLOAT, player_accuracy FLOAT, achieved_at DATETIME)'))
+        for peak in (900, 1400, 1100):
+            db.session.execute(db.text(
+                "INSERT INTO leaderboard (player_name, peak_balance, rounds_played, win_rate)"
+                " VALUES ('ana', :peak, 1, 0)"), {'peak': peak})
+        db.session.commit()
+        upgrade_schema()
+        rows = db.session.execute(db.text('SELECT peak_balance FROM leaderboard')).all()
+        assert rows == [(1400,)]
+        names = {ix['name'] for ix in db.inspect(db.engine).get_indexes('leaderboard')}
+        assert {'uq_leaderboard_player_name', 'ix_leaderboard_rank'} <= names
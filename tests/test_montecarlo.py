@@ -37,3 +37,23 @@ def test_deck_argument_is_respected():
     hand = _hand('9', '7')
     dealer = Card('6', 'Clubs')
     assert 0.0 <= mc.simulate_hit_win_rate(hand, dealer, deck=Deck(num_decks=6)) <= 1.0
+
+
+def test_shoe_evaluator_dealer_distribution_sums_to_one():
+    ev = MonteCarloSimulator().evaluator(Deck(num_decks=6))
+    for upcard in range(2, 12):
+        dist = ev.dealer_distribution(upcard)
+        assert abs(sum(dist.values()) - 1.0) < 1e-9
+        assert set(dist) <= {17, 18, 19, 20, 21, 22}
+
+
+def test_shoe_evaluator_agrees_with_sampling():
+    deck = Deck(num_decks=6)
+    mc = MonteCarloSimulator(num_simulations=3000)
+    ev = mc.evaluator(deck)
+    hand = _hand('10', '6')
+    dealer = Card('9', 'Clubs')
+    (p_hit, p_stand), = ev.evaluate([(hand, dealer)])
+    assert abs(p_stand - mc.simulate_stand_win_rate(hand, dealer, deck=deck)) < 0.05
+    assert abs(p_hit - mc.simulate_hit_win_rate(hand, dealer, deck=deck)) < 0.05
+    assert ev.stand_win_rate(20, 5) > ev.hit_win_rate(_hand('10', '10').cards, 5)
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from app.web.passwords import HasherBusy, LoopMonitor, PasswordHasher, method_prefix
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+def test_hash_verify_and_rehash_detection():
+    hasher = PasswordHasher(method=FAST)
+    stored = hasher.hash('secreto')
+    assert stored.startswith(FAST + '$')
+    assert hasher.verify(stored, 'secreto') and not hasher.verify(stored, 'otro')
+    assert not hasher.needs_rehash(stored)
+    assert PasswordHasher(method='pbkdf2:sha256:2000').needs_rehash(stored)
+    metrics = hasher.metrics()
+    assert metrics['verified'] == 2 and metrics['hashed'] == 1
+    assert metrics['running'] == 0 and metrics['latency']['verify']['hash_ms_max'] >= 0
+
+
+
+def test_method_prefix_matches_what_werkzeug_stores():
+    for method in ('scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', FAST):
+        stored = PasswordHasher(method=method).hash('x')
+        assert stored.split('$', 1)[0] == method_prefix(method), method
+    with pytest.raises(ValueError):
+        method_prefix('md5')
+
+
+def test_concurrency_cap_rejects_after_timeout():
+    started, release = threading.Event(), threading.Event()
+
+    def offload(func, *args):
+        started.set()
+        release.wait(5)
+        return func(*args)
+
+    hasher = PasswordHasher(method=FAST, max_concurrent=1, timeout=0.05, offload=offload)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(hasher.hash('a')))
+    worker.start()
+    assert started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.verify(FAST + '$x$y', 'b')
+    release.set()
+    worker.join(5)
+    assert hasher.verify(results[0], 'a')
+    metrics = hasher.metrics()
+    assert metrics['rejected_busy'] == 1 and metrics['running'] == 0
+    assert metrics['latency']['hash']['hash_ms_max'] > 0
+
+
+def test_loop_monitor_reports_lag():
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            monitor.stop()
+
+    monitor = LoopMonitor(interval=0.01, sleep=sleep)
+    monitor.run()
+    metrics = monitor.metrics()
+    assert metrics['samples'] == 3 and metrics['lag_ms_max'] == 0.0
@@ -37,3 +37,12 @@ def test_learn_updates_q_value(tmp_path):
     before = list(agent.get_q_values(state))
     agent.learn(state, action=1, reward=-1, next_state=(21, 10, 0), done=True)
     assert agent.get_q_values(state)[1] != before[1]
+
+
+def test_version_moves_once_per_saved_episode(tmp_path):
+    agent = _agent(tmp_path)
+    version = agent.version
+    agent.learn((12, 10, 0), action=1, reward=0, next_state=(15, 10, 0), done=False)
+    assert agent.version == version
+    agent.learn((15, 10, 0), action=1, reward=-1, next_state=(25, 10, 0), done=True)
+    assert agent.version == version + 1
@@ -0,0 +1,40 @@
+from app.core.room_manager import ROOM_ID_ALPHABET, GameManager
+
+
+def test_room_ids_are_unique_codes():
+    manager = GameManager(max_rooms=200)
+    ids = {manager.create_room(f"host{i}") for i in range(200)}
+    assert len(ids) == 200
+    assert all(len(i) == 6 and set(i) <= set(ROOM_ID_ALPHABET) for i in ids)
+    assert manager.create_room("one-too-many") is None
+    assert manager.metrics()['rejected_full'] == 1
+
+
+def test_seat_limit_and_empty_room_removal():
+    removed = []
+    manager = GameManager(max_seats=2)
+    manager.on_remove = lambda room_id, closed: removed.append((room_id, closed))
+    room_id = manager.create_room("a")
+    assert manager.join_room(room_id, "a", "A")[0] is not None
+    assert manager.join_room(room_id, "b", "B")[0] is not None
+    assert manager.join_room(room_id, "c", "C") == (None, "Room is full")
+    assert manager.join_room(room_id, "a", "A") == (None, "Already in a room")
+
+    metrics = manager.metrics()
+    assert metrics['players'] == 2 and metrics['full_rooms'] == 1
+
+    assert manager.remove_player("a") == room_id
+    assert room_id in manager.rooms
+    manager.remove_player("b")
+    assert room_id not in manager.rooms and removed == [(room_id, True)]
+
+
+def test_idle_rooms_are_evicted():
+    manager = GameManager(idle_ttl=60)
+    stale = manager.create_room("a")
+    manager.join_room(stale, "a", "A")
+    fresh = manager.create_room("b")
+    manager.rooms[stale].last_active -= 120
+    assert manager.evict_idle() == 1
+    assert list(manager.rooms) == [fresh]
+    assert manager.get_game("a") is None
@@ -0,0 +1,157 @@
+import time
+
+from app.core.room_manager import GameManager
+from app.data.room_store import RoomStore
+
+
+def _workers(tmp_path, **kwargs):
+    """Two registries sharing one store file, as two worker processes would."""
+    path = str(tmp_path / 'rooms.db')
+    managers = []
+    for name in ('w1', 'w2'):
+        manager = GameManager(**kwargs)
+        manager.configure(store=RoomStore(path=path, worker_id=name))
+        manager.removed = []
+        manager.on_remove = lambda room_id, closed, m=manager: m.removed.append((room_id, closed))
+        managers.append(manager)
+    return managers
+
+
+def test_save_is_compare_and_swap(tmp_path):
+    path = str(tmp_path / 'rooms.db')
+    a, b = RoomStore(path=path, worker_id='a'), RoomStore(path=path, worker_id='b')
+    assert a.create('R1', {'n': 0})
+    assert not b.create('R1', {'n': 1})
+
+    assert a.save('R1', {'n': 1}, expected_version=0) == 1
+    assert b.save('R1', {'n': 2}, expected_version=0) is None  # stale copy
+    assert b.load('R1') == (1, {'n': 1})
+    assert b.metrics()['conflicts'] == 1
+
+
+def test_seats_are_shared_and_last_seat_deletes_the_room(tmp_path):
+    path = str(tmp_path / 'rooms.db')
+    a, b = RoomStore(path=path, worker_id='a'), RoomStore(path=path, worker_id='b')
+    a.create('R1', {})
+    assert a.reserve_seat('R1', 2)
+    assert b.reserve_seat('R1', 2)
+    assert not a.reserve_seat('R1', 2)
+    assert b.release_seat('R1') == 1
+    assert a.release_seat('R1') == 0
+    assert a.version('R1') is None
+
+
+def test_rooms_of_a_stopped_worker_can_be_claimed(tmp_path):
+    path = str(tmp_path / 'rooms.db')
+    a = RoomStore(path=path, worker_id='a', owner_ttl=30)
+    b = RoomStore(path=path, worker_id='b', owner_ttl=30)
+    a.create('R1', {})
+    assert not b.claim('R1')
+    a.close()
+    assert b.claim('R1')
+    assert b.owner('R1') == 'b'
+
+
+def test_only_the_owner_feeds_spectators_on_any_worker(tmp_path):
+    path = str(tmp_path / 'rooms.db')
+    a, b = RoomStore(path=path, worker_id='a'), RoomStore(path=path, worker_id='b')
+    a.create('R1', {})
+    a.reserve_seat('R1', 2)
+    b.set_spectators('R1', 3)  # watched only from worker b
+    assert a.fed_rooms() == ['R1'] and b.fed_rooms() == []
+    a.publish_feed('R1', {'version': 4})
+    assert b.feed('R1') == {'version': 4}
+
+    b.set_spectators('R1', 0)
+    assert a.fed_rooms() == []
+    b.set_spectators('R1', 1)
+    a.release_seat('R1')  # the room goes, and its spectator rows with it
+    assert a.fed_rooms() == [] and b.feed('R1') is None
+
+
+def test_players_on_different_workers_share_a_room(tmp_path):
+    w1, w2 = _workers(tmp_path, max_seats=2)
+    room_id = w1.create_room('host')
+    game, _ = w1.join_room(room_id, 'host', 'Host')
+    room1 = w1.rooms[room_id]
+    game.add_player('Host', player_id='host')
+    assert w1.commit(room1)
+
+    # The second worker loads the room it has never seen and seats a guest.
+    game2, msg = w2.join_room(room_id, 'guest', 'Guest')
+    assert msg == "Joined"
+    room2 = w2.rooms[room_id]
+    assert not w2.sync(room2)
+    game2.add_player('Guest', player_id='guest')
+    assert w2.commit(room2)
+    assert w1.join_room(room_id, 'third', 'Third') == (None, "Room is full")
+
+    # The first worker's copy is stale: committing over it is refused and
+    # replaced by the stored copy, which then syncs cleanly.
+    room1.game.add_player('Lost', player_id='lost')
+    assert not w1.commit(room1)
+    assert [p.player_id for p in room1.game.players] == ['host', 'guest']
+    assert w1.metrics()['conflicts'] == 1
+
+    room2.game.start_new_round(num_ai=0)
+    assert w2.commit(room2)
+    assert w1.sync(room1)
+    assert room1.game.version == room2.game.version
+
+
+def test_idle_eviction_keeps_rooms_played_elsewhere(tmp_path):
+    w1, w2 = _workers(tmp_path, idle_ttl=60)
+    room_id = w1.create_room('a')
+    w1.join_room(room_id, 'a', 'A')
+    w2.join_room(room_id, 'b', 'B')
+    room2 = w2.rooms[room_id]
+    room2.game.add_player('B', player_id='b')
+    w2.commit(room2)
+
+    w1.rooms[room_id].last_active -= 120
+    assert w1.evict_idle() == 0
+    assert w1.evict_idle(now=time.monotonic() + 120) == 1
+    assert room_id not in w1.rooms
+    # Only the local copy and seat went away; the other worker still plays.
+    assert w2.store.version(room_id) is not None
+    assert w1.removed == [(room_id, False)]
+
+
+def test_a_room_gone_from_the_store_is_dropped_not_retried(tmp_path):
+    w1, w2 = _workers(tmp_path)
+    room_id = w1.create_room('a')
+    w1.join_room(room_id, 'a', 'A')
+    room = w1.rooms[room_id]
+    room.game.add_player('A', player_id='a')
+    assert w1.commit(room)
+
+    assert w2.store.expire(-1) == [room_id]
+    room.game.start_new_round(num_ai=0)
+    assert not w1.commit(room)
+    assert not w1.is_live(room) and room_id not in w1.rooms and 'a' not in w1.player_rooms
+    assert not w1.commit(room)  # a handler still holding it: no retry, no second close
+    metrics = w1.metrics()
+    assert metrics['conflicts'] == 0 and metrics['gone'] == 1
+    assert w1.removed == [(room_id, True)]
+
+    room_id = w1.create_room('b')
+    w2.join_room(room_id, 'c', 'C')
+    room2 = w2.rooms[room_id]
+    w1.store.expire(-1)
+    assert not w2.sync(room2) and not w2.is_live(room2)
+    assert w2.removed == [(room_id, True)]
+    assert w2.join_room(room_id, 'd', 'D') == (None, "Room not found")
+
+
+def test_store_calls_go_through_the_offload_hook(tmp_path):
+    calls = []
+
+    def offload(func, *args, **kwargs):
+        calls.append(func.__name__)
+        return func(*args, **kwargs)
+
+    store = RoomStore(path=str(tmp_path / 'rooms.db'), worker_id='a', offload=offload)
+    store.create('R1', {'n': 0})
+    assert store.save('R1', {'n': 1}, expected_version=0) == 1
+    assert store.load('R1') == (1, {'n': 1})
+    assert calls == ['create', 'save', 'load']
@@ -0,0 +1,48 @@
+import os
+import struct
+
+from app.data.session_sweeper import _COUNT_FILES, SessionSweeper
+
+
+def _write(directory, name, size=100, expires=0, mtime=None):
+    path = directory / name
+    path.write_bytes(struct.pack('I', expires) + b'x' * size)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_expired_sessions_are_removed(tmp_path):
+    now = 1_000_000
+    _write(tmp_path, 'dead', expires=now - 1, mtime=now)
+    _write(tmp_path, 'idle', mtime=now - 7200)
+    _write(tmp_path, 'live', expires=now + 60, mtime=now)
+    stats = SessionSweeper(str(tmp_path), max_age=3600).sweep(now=now)
+    assert sorted(os.listdir(tmp_path)) == ['live']
+    assert stats['expired'] == 2
+    assert stats['files'] == 1
+
+
+def test_count_cap_evicts_least_recently_written(tmp_path):
+    now = 1_000_000
+    for i in range(5):
+        _write(tmp_path, f's{i}', mtime=now - 100 + i)
+    stats = SessionSweeper(str(tmp_path), max_age=0, max_files=2).sweep(now=now)
+    assert sorted(os.listdir(tmp_path)) == ['s3', 's4']
+    assert stats['evicted'] == 3
+
+
+def test_byte_cap_and_bookkeeping_file(tmp_path):
+    now = 1_000_000
+    count_file = sorted(_COUNT_FILES)[0]
+    _write(tmp_path, count_file, size=0, mtime=now - 10_000)
+    _write(tmp_path, 'old', size=500, mtime=now - 20)
+    _write(tmp_path, 'new', size=500, mtime=now - 10)
+    stats = SessionSweeper(str(tmp_path), max_age=0, max_bytes=600).sweep(now=now)
+    assert sorted(os.listdir(tmp_path)) == sorted([count_file, 'new'])
+    assert stats['bytes'] == 504
+
+
+def test_missing_directory_is_not_an_error(tmp_path):
+    stats = SessionSweeper(str(tmp_path / 'absent')).sweep()
+    assert stats['files'] == 0
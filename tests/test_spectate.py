@@ -0,0 +1,59 @@
+from app.core.game import BlackJackGame
+from app.core.spectate import HIDDEN_CARD, SpectatorFeed, spectator_state
+from app.core.state_diff import apply
+
+
+def _dealt_game():
+    game = BlackJackGame(track_accuracy=False)
+    game.add_player("Host", player_id="host")
+    game.start_new_round(num_ai=0)
+    game.players[0].place_bet(10)
+    game.confirm_bets()
+    return game
+
+
+def test_hole_card_and_derived_values_are_hidden_during_play():
+    game = _dealt_game()
+    hole, upcard = game.dealer_hand.cards
+    state = spectator_state(game)
+
+    assert state['dealer_hand']['cards'] == [HIDDEN_CARD, upcard.to_dict()]
+    assert state['dealer_hand']['value'] == upcard.value
+    assert state['count'] == game.counter.running_count - game.counter.tag(hole)
+    # The players' own state is untouched.
+    assert game.get_state()['dealer_hand']['cards'][0] == hole.to_dict()
+
+
+def test_hole_card_is_revealed_once_the_round_is_settled():
+    game = _dealt_game()
+    while not game.game_over:
+        game.player_stand()
+    assert spectator_state(game) == game.get_state()
+
+
+def test_changes_between_ticks_are_coalesced_into_one_patch():
+    game = _dealt_game()
+    feed = SpectatorFeed(max_rate=4)
+    assert feed.add("R1", "s1")
+    baseline = feed.snapshot("R1", game)
+    assert feed.message("R1", game) is None  # nothing new since the snapshot
+
+    base_version = baseline['version']
+    game.player_hit()
+    game.touch()
+    event, payload = feed.message("R1", game)
+    assert event == 'game_patch'
+    assert payload['base_version'] == base_version
+    assert apply(baseline, payload['ops']) == spectator_state(game)
+    assert feed.metrics()['coalesced'] == game.version - base_version - 1 >= 1
+
+
+def test_spectator_seats_are_limited_and_released():
+    feed = SpectatorFeed(max_per_room=1)
+    assert feed.add("R1", "s1")
+    assert not feed.add("R1", "s2")
+    assert feed.remove("s1") == "R1"
+    assert feed.rooms() == []
+    assert feed.add("R1", "s2")
+    assert feed.forget("R1") == {"s2"}
+    assert feed.metrics()['spectators'] == 0
@@ -0,0 +1,48 @@
+import copy
+import json
+
+from app.core.game import BlackJackGame
+from app.core.state_diff import PatchStream, apply, diff
+
+
+def _states():
+    game = BlackJackGame()
+    game.add_player("Host", player_id='a')
+    game.add_player("Guest", player_id='b')
+    game.start_new_round(num_ai=0)
+    states = [copy.deepcopy(game.get_state())]
+    for p in game.players:
+        p.place_bet(10)
+    game.confirm_bets()
+    states.append(copy.deepcopy(game.get_state()))
+    game.player_hit()
+    states.append(copy.deepcopy(game.get_state()))
+    game.player_stand()
+    states.append(copy.deepcopy(game.get_state()))
+    game.start_new_round(num_ai=0)
+    states.append(copy.deepcopy(game.get_state()))
+    return states
+
+
+def test_patches_rebuild_every_state():
+    states = _states()
+    for old, new in zip(states, states[1:]):
+        assert apply(copy.deepcopy(old), diff(old, new)) == new
+
+
+def test_list_and_key_edge_cases():
+    old = {'a': [1, 2, 3], 'b': {'x': 1}, 'c': True}
+    new = {'a': [1, 5], 'b': {}, 'c': 1, 'd': None}
+    assert apply(copy.deepcopy(old), diff(old, new)) == new
+    assert diff(new, new) == []
+
+
+def test_stream_sends_small_patches_and_periodic_snapshots():
+    states = _states()
+    stream = PatchStream(snapshot_every=2)
+    events = [stream.message(state) for state in states]
+    assert [e for e, _ in events][:4] == ['game_update', 'game_patch', 'game_patch', 'game_update']
+    _, patch = events[1]
+    assert patch['base_version'] == states[0]['version']
+    assert patch['version'] == states[1]['version']
+    assert len(json.dumps(events[2][1])) < len(json.dumps(states[2])) / 3
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from app.ai.factory import get_agent
+from app.sim.tournament import build_table, parse_entrants, play_table, run_tournament
+
+ENTRANTS = parse_entrants(['EASY', 'MEDIUM', 'EASY'])
+
+
+def test_parse_entrants_names_repeats_and_rejects_unknown_tiers(tmp_path):
+    assert [name for name, _, _ in ENTRANTS] == ['EASY', 'MEDIUM', 'EASY#2']
+    q_table = tmp_path / 'q.json'
+    q_table.write_text('{}')
+    assert parse_entrants([f'hard@{q_table}']) == [(f'hard@{q_table}', 'HARD', str(q_table))]
+    with pytest.raises(ValueError):
+        parse_entrants(['EXPERT'])
+    with pytest.raises(ValueError):
+        parse_entrants([f'HARD@{tmp_path / "missing.json"}'])
+
+
+def test_seats_rotate_and_play_their_own_tier():
+    game = build_table(ENTRANTS, rotation=1)
+    assert [p.player_id for p in game.players] == ['MEDIUM', 'EASY#2', 'EASY']
+    game.start_new_round(num_ai=0)
+    game.confirm_bets()
+    assert game.game_over
+    expected = {name: difficulty for name, difficulty, _ in ENTRANTS}
+    tiers = {entry['player']: entry['difficulty'] for entry in game.decision_history}
+    assert tiers == expected
+
+
+def test_play_table_is_reproducible_and_consistent():
+    random.seed(1)
+    first = play_table(ENTRANTS, rounds=25, table_index=0, seed=7)
+    random.seed(2)  # other users of the global RNG do not affect the table
+    second = play_table(ENTRANTS, rounds=25, table_index=0, seed=7)
+    assert first['seats'] == second['seats']
+    assert first['violations'] == 0 and first['error'] is None
+    for seat in first['seats'].values():
+        assert seat['wins'] + seat['losses'] + seat['pushes'] == seat['hands']
+        assert seat['final_balance'] == 1000 + seat['net']
+
+
+def test_tables_shuffle_with_their_own_rng_and_hard_seats_act_greedily():
+    shoes = [build_table(ENTRANTS, rng=random.Random(3)).deck.cards for _ in range(2)]
+    assert shoes[0] == shoes[1]
+
+    game = build_table([('HARD', 'HARD', None)])
+    _, model_path = game.seat_policies['HARD']
+    assert get_agent(model_path).epsilon == 0.0 and get_agent().epsilon > 0
+
+
+def test_run_tournament_merges_tables_into_standings():
+    result = run_tournament(['EASY', 'MEDIUM'], tables=6, rounds=10, workers=1, seed=3)
+    assert result['tables'] == 6
+    assert result['violations'] == 0 and result['errors'] == []
+    assert result['tables_per_second'] > 0
+    standings = result['standings']
+    assert [row['rank'] for row in standings] == [1, 2]
+    assert standings[0]['edge'] >= standings[1]['edge']
+    assert all(row['tables'] == 6 for row in standings)
+    assert sum(row['table_wins'] for row in standings) >= 6
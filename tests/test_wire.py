@@ -0,0 +1,38 @@
+import copy
+import json
+
+from app.core.game import BlackJackGame
+from app.core.state_diff import apply, diff
+from app.core.wire import compact_state, expand_state, snapshot_message, unpack
+
+
+def _game():
+    game = BlackJackGame()
+    game.start_new_round(num_ai=3, difficulty="EASY")
+    game.players[0].place_bet(25)
+    game.confirm_bets()
+    return game
+
+
+def test_compact_state_expands_to_get_state():
+    game = _game()
+    game.player_stand()
+    assert expand_state(compact_state(game)) == game.get_state()
+
+
+def test_snapshot_round_trips_and_is_smaller():
+    game = _game()
+    message = snapshot_message(compact_state(game))
+    kind, state = unpack(message)
+    assert kind == 'S'
+    assert expand_state(state) == game.get_state()
+    size = len(message) if isinstance(message, bytes) else len(json.dumps(message))
+    assert size < len(json.dumps(game.get_state())) / 2
+
+
+def test_compact_patches_apply_to_compact_state():
+    game = _game()
+    before = compact_state(game)
+    game.player_hit()
+    after = compact_state(game)
+    assert apply(copy.deepcopy(before), diff(before, after)) == after
@@ -0,0 +1,82 @@
+import threading
+
+from app.data.write_behind import WriteBehindQueue
+
+
+def test_records_are_coalesced_per_key():
+    batches = []
+    queue = WriteBehindQueue(batches.append, interval=0)
+    for balance in (990, 980, 1010):
+        queue.record(1, balance)
+    queue.record(2, 500)
+    assert queue.pending(1) == 1010
+    assert queue.flush() == 2
+    assert sorted(batches[0]) == [(1, 1010), (2, 500)]
+    assert queue.pending(1, 'gone') == 'gone'
+    assert queue.flush() == 0
+
+
+def test_failed_flush_keeps_newer_values():
+    calls = []
+
+    def flaky(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    queue = WriteBehindQueue(flaky, interval=0)
+    queue.record(1, 900)
+    queue.record(2, 700)
+    assert queue.flush() == 0
+    queue.record(1, 950)  # arrives while the batch is being retried
+    assert queue.flush() == 2
+    assert sorted(calls[1]) == [(1, 950), (2, 700)]
+    assert queue.metrics()['failures'] == 1
+
+
+def test_merge_function_accumulates():
+    batches = []
+    queue = WriteBehindQueue(batches.append, interval=0, merge=lambda a, b: a + b)
+    queue.record('wins', 1)
+    queue.record('wins', 2)
+    queue.flush()
+    assert batches == [[('wins', 3)]]
+
+
+def test_request_flush_wakes_background_thread():
+    flushed = threading.Event()
+    queue = WriteBehindQueue(lambda rows: flushed.set(), interval=60, min_interval=0)
+    queue.start()
+    try:
+        queue.record(1, 100)
+        queue.request_flush()
+        assert flushed.wait(5)
+    finally:
+        queue.close()
+
+
+def test_close_flushes_remaining_values():
+    batches = []
+    queue = WriteBehindQueue(batches.append, interval=60)
+    queue.start()
+    queue.record(7, 1234)
+    queue.close()
+    assert batches == [[(7, 1234)]]
+
+
+def test_append_never_coalesces():
+    batches = []
+    queue = WriteBehindQueue(batches.append, interval=0)
+    queue.append({'outcome': 'win'})
+    queue.append({'outcome': 'win'})
+    queue.flush()
+    assert [row for _, row in batches[0]] == [{'outcome': 'win'}] * 2
+
+
+def test_pending_reads_the_batch_being_written():
+    seen = []
+    queue = WriteBehindQueue(lambda rows: seen.append(queue.pending(1, 'db')), interval=0)
+    queue.record(1, 880)
+    queue.flush()
+    assert seen == [880]
+    assert queue.pending(1, 'db') == 'db'